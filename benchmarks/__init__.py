@@ -0,0 +1 @@
+"""Замеры производительности (python -m benchmarks), не тесты"""
@@ -0,0 +1,63 @@
+"""
+Запуск всех замеров: python -m benchmarks [--only dispatch,modes] [--output файл]
+                                          [--baseline файл] [--threshold 0.2]
+
+Результаты пишутся в JSON. С --baseline прогон сравнивается с базовым,
+и при ухудшении больше порога код возврата 1.
+"""
+import argparse
+import importlib
+import logging
+import sys
+import time
+import traceback
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from benchmarks.harness import BenchmarkSkipped, compare, environment, load_results, write_results
+
+SUITES = ("dispatch", "modes", "noise", "playback", "startup", "volume")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Замеры производительности Sayori")
+    parser.add_argument("--only", help="Через запятую: " + ", ".join(SUITES))
+    parser.add_argument("--output", default=str(Path(__file__).parent / "results.json"))
+    parser.add_argument("--baseline", help="JSON прошлого прогона для сравнения")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Допустимое ухудшение (доля)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    suites = args.only.split(",") if args.only else SUITES
+    output = {"environment": environment(), "results": {}, "skipped": {}, "failed": {}}
+
+    for name in suites:
+        module = importlib.import_module(f"benchmarks.bench_{name}")
+        started = time.perf_counter()
+        try:
+            output["results"][name] = module.run()
+            print(f"✅ {name}: {time.perf_counter() - started:.1f} с")
+        except BenchmarkSkipped as e:
+            output["skipped"][name] = str(e)
+            print(f"⏭  {name}: пропущено ({e})")
+        except Exception as e:
+            output["failed"][name] = str(e)
+            print(f"❌ {name}: {e}")
+            traceback.print_exc()
+
+    write_results(Path(args.output), output)
+    print(f"Результаты: {args.output}")
+
+    if args.baseline:
+        regressions = compare(output, load_results(Path(args.baseline)), args.threshold)
+        if regressions:
+            print(f"Регрессии (порог {args.threshold:.0%}):")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("Регрессий нет")
+    return 1 if output["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""Поиск команды по фразе на синтетических commands.json из 10/100/1000 команд"""
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+sys.path.append(str(Path(__file__).parent.parent))
+from benchmarks.harness import timed
+from core.command_index import CommandIndex
+
+SIZES = (10, 100, 1000)
+_SYLLABLES = ["ка", "ро", "ми", "ле", "ну", "сто", "пра", "вы", "зо", "ти", "ба", "гре", "до", "ши", "ль"]
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+def synthetic_commands(count: int, seed: int = 42) -> Tuple[Dict, List[str], List[str]]:
+    """
+    Раздел voice_commands из count команд (каждая пятая - regex с числом).
+
+    :return: (команды, точные фразы, шаблоны regex без групп)
+    """
+    rng = random.Random(seed)
+    commands: Dict[str, Dict] = {}
+    literals, patterns = [], []
+    per_category = max(1, count // 10)
+    made = 0
+    while made < count:
+        category = commands.setdefault(f"категория {made // per_category}", {})
+        words = " ".join(_word(rng) for _ in range(rng.randint(2, 4)))
+        if made % 5 == 4:
+            phrase = words + r" (\d{1,3})"
+            spec = {"action": "set_volume", "params": {"level": "$1"}, "regex": True}
+            patterns.append(words)
+        else:
+            phrase = words
+            spec = {"action": "show_help", "response": words}
+            literals.append(words)
+        if any(phrase in c for c in commands.values()):
+            continue
+        category[phrase] = spec
+        made += 1
+    return commands, literals, patterns
+
+
+def _typo(rng: random.Random, phrase: str) -> str:
+    i = rng.randrange(len(phrase))
+    return phrase[:i] + rng.choice("абвгдежз") + phrase[i + 1:]
+
+
+def run(repeat: int = 2000) -> Dict[str, Dict]:
+    results = {}
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in SIZES:
+            voice_commands, literals, patterns = synthetic_commands(size)
+            path = Path(tmp) / f"commands_{size}.json"
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"voice_commands": voice_commands}, f, ensure_ascii=False)
+
+            # Загрузка и построение индекса, как при старте ассистента
+            started = time.perf_counter()
+            with open(path, "r", encoding="utf-8") as f:
+                index = CommandIndex(json.load(f)["voice_commands"], fuzzy_threshold=0.75)
+            build_ms = (time.perf_counter() - started) * 1000
+
+            queries = {
+                "exact": [rng.choice(literals) for _ in range(64)],
+                "regex": [f"{rng.choice(patterns)} {rng.randint(0, 100)}" for _ in range(64)],
+                "fuzzy": [_typo(rng, rng.choice(literals)) for _ in range(64)],
+                "miss": [" ".join(_word(rng) for _ in range(3)) + " ъ" for _ in range(64)],
+            }
+            entry = {"build_ms": round(build_ms, 3)}
+            for kind, phrases in queries.items():
+                cycle = iter(phrases * (repeat // len(phrases) + 10))
+                entry[kind] = timed(lambda: index.match(next(cycle)), repeat=repeat, warmup=20)
+            results[f"commands_{size}"] = entry
+    return results
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), ensure_ascii=False, indent=2))
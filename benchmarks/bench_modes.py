@@ -0,0 +1,104 @@
+"""ModeManager.activate с поддельными таблицей процессов и запуском программ"""
+import json
+import logging
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.append(str(Path(__file__).parent.parent))
+from benchmarks.harness import timed
+from core.audio_controller import AudioController
+from core.mode_manager import ModeManager
+from core.process_index import FakeProcessSource
+from core.process_supervisor import ProcessSupervisor
+from core.volume_backends import FakeVolumeBackend
+
+
+class FakePopen:
+    """Процесс, который сразу «запускается» в FakeProcessSource и завершается с кодом 0"""
+    source: FakeProcessSource = None
+
+    def __init__(self, command: List[str], **kwargs):
+        self.args = command
+        self.pid = self.source.spawn(Path(command[0]).name)
+        self.returncode = 0
+        self.stderr = None
+
+    def poll(self):
+        return self.returncode
+
+    def wait(self, timeout=None):
+        return self.returncode
+
+    def communicate(self, timeout=None):
+        return b"", b""
+
+    def terminate(self):
+        pass
+
+    kill = terminate
+
+
+def synthetic_modes(script: Path, apps: int = 6) -> Dict:
+    """Два режима с общими приложениями и разной громкостью"""
+    shared = [{"type": "launch", "target": f"app{i}.exe", "check_running": True} for i in range(apps)]
+    return {
+        "работа": {"actions": shared + [
+            {"type": "launch", "target": "editor.exe", "check_running": True},
+            {"type": "volume", "target": "system", "level": 30},
+            {"type": "script", "path": str(script), "after": 0},
+        ]},
+        "игра": {"actions": shared + [
+            {"type": "kill", "target": "editor.exe"},
+            {"type": "launch", "target": "game.exe", "check_running": True},
+            {"type": "volume", "target": "system", "level": 80},
+        ]},
+    }
+
+
+def run(repeat: int = 200) -> Dict[str, Dict]:
+    logging.getLogger("ModeManager").setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        script = Path(tmp) / "prepare.sh"
+        script.write_text("true\n")
+        modes_path = Path(tmp) / "modes.json"
+        with open(modes_path, "w", encoding="utf-8") as f:
+            json.dump(synthetic_modes(script), f, ensure_ascii=False)
+
+        source = FakeProcessSource()
+        FakePopen.source = source
+        manager = ModeManager(
+            str(modes_path),
+            process_source=source,
+            supervisor=ProcessSupervisor(popen=FakePopen),
+            audio=AudioController({"audio": {"volume_write_interval_ms": 0}}, backend=FakeVolumeBackend())
+        )
+
+        def reset():
+            source.processes.clear()
+            manager.processes.refresh()
+            manager.audio.set_volume(50)
+            manager.audio.flush()
+
+        def switch():
+            manager.activate("игра" if manager.current_mode == "работа" else "работа")
+
+        try:
+            results = {
+                # Все действия режима с нуля (ничего не запущено)
+                "activate_cold": timed(lambda: manager.activate("работа"), repeat=repeat, setup=reset),
+                # Повторная активация: всё уже выполнено, план пустой
+                "activate_repeat": timed(lambda: manager.activate("работа"), repeat=repeat),
+                # Переход между режимами с общими приложениями
+                "switch_overlap": timed(switch, repeat=repeat),
+                "activate_full": timed(lambda: manager.activate("работа", full=True), repeat=repeat, setup=reset),
+            }
+        finally:
+            manager.shutdown()
+            manager.audio.close()
+    return results
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), ensure_ascii=False, indent=2))
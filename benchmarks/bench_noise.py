@@ -0,0 +1,106 @@
+"""
+Выделение фраз при меняющемся шуме: тихая комната, щелчки, вентилятор,
+снова тишина и тихая речь. Постоянный порог сравнивается с отслеживанием
+уровня шума (NoiseFloorTracker).
+"""
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+from benchmarks.harness import timed
+from core.audio_capture import NoiseFloorTracker, RingBuffer, UtteranceSegmenter
+
+_RATE = 16000
+_BLOCK = 480  # 30 мс
+
+
+def _scene(seed: int = 0):
+    """Запись и время начала каждой настоящей фразы (сек)"""
+    rng = np.random.default_rng(seed)
+    parts: List[np.ndarray] = []
+    speech_at: List[float] = []
+    position = 0.0
+
+    def add(samples: np.ndarray, speech: bool = False):
+        nonlocal position
+        if speech:
+            speech_at.append(position)
+        parts.append(samples)
+        position += len(samples) / _RATE
+
+    def noise(seconds: float, rms: float) -> np.ndarray:
+        return rng.standard_normal(int(_RATE * seconds)) * rms
+
+    def speech(seconds: float, rms: float, floor: float) -> np.ndarray:
+        t = np.arange(int(_RATE * seconds)) / _RATE
+        envelope = 0.6 + 0.4 * np.abs(np.sin(2 * np.pi * 3 * t))  # Слоги
+        return np.sin(2 * np.pi * 220 * t) * envelope * rms * 1.4 + noise(seconds, floor)
+
+    for _ in range(3):  # Тихая комната
+        add(noise(1.5, 30))
+        add(speech(1.0, 1500, 30), speech=True)
+    for _ in range(3):  # Щелчки по столу
+        click = noise(1.0, 30)
+        click[:300] += rng.standard_normal(300) * 4000
+        add(click)
+    for _ in range(3):  # Вентилятор
+        add(noise(2.0, 600))
+        add(speech(1.0, 4000, 600), speech=True)
+    add(noise(3.0, 30))
+    for _ in range(3):  # Снова тихо, говорят негромко
+        add(noise(1.5, 30))
+        add(speech(1.0, 400, 30), speech=True)
+    add(noise(1.0, 30))
+    samples = np.clip(np.concatenate(parts), -32768, 32767).astype(np.int16)
+    return samples, speech_at
+
+
+def _segment(samples: np.ndarray, speech_at: List[float], noise: Optional[NoiseFloorTracker]) -> Dict:
+    buffer = RingBuffer(len(samples) + _RATE, backpressure=True)
+    buffer.write(samples)
+    buffer.close()
+    segmenter = UtteranceSegmenter(
+        buffer, _RATE, _BLOCK, energy_threshold=300.0, noise=noise, min_speech=0.1 if noise else 0.0
+    )
+    started = time.process_time()
+    found = []
+    while segmenter.cursor + _BLOCK <= buffer.written:
+        utterance = segmenter.next_utterance(timeout=5.0)
+        if utterance is None:
+            break
+        end = segmenter.cursor / _RATE
+        found.append((end - len(utterance) / _RATE, end))
+    cpu = time.process_time() - started
+
+    # Фраза найдена, если её начало попало в выделенный отрезок
+    detected = sum(any(start - 0.4 <= at <= end for start, end in found) for at in speech_at)
+    junk = sum(not any(start - 0.4 <= at <= end for at in speech_at) for start, end in found)
+    return {
+        "speech": len(speech_at),
+        "detected": detected,
+        "junk_utterances": junk,
+        "false_triggers": segmenter.false_triggers,
+        # Шум, склеенный с речью до phrase_limit, тоже «находит» фразу - видно по длине
+        "max_utterance_s": round(max(end - start for start, end in found), 2) if found else 0.0,
+        "cpu_percent": round(cpu / (len(samples) / _RATE) * 100, 3)
+    }
+
+
+def run() -> Dict[str, Dict]:
+    samples, speech_at = _scene()
+    tracker = NoiseFloorTracker(_RATE)
+    block = samples[:_BLOCK]
+    return {
+        "fixed_threshold": _segment(samples, speech_at, None),
+        "noise_tracking": _segment(samples, speech_at, NoiseFloorTracker(_RATE)),
+        "tracker_update": timed(lambda: tracker.update(block), repeat=2000)
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), ensure_ascii=False, indent=2))
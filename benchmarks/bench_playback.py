@@ -0,0 +1,67 @@
+"""Задержка VoiceEngine.play() до начала звучания: холодный и прогретый кэш, нулевой выход"""
+import json
+import logging
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict
+
+sys.path.append(str(Path(__file__).parent.parent))
+from benchmarks.harness import BenchmarkSkipped, isolated_config, summarize, timed
+
+
+def _engine(cfg: Dict):
+    try:
+        from core.voice_engine import VoiceEngine
+    except ImportError as e:
+        raise BenchmarkSkipped(f"VoiceEngine недоступен: {e}")
+    return VoiceEngine(cfg)
+
+
+def _measure(cfg: Dict, repeat: int) -> Dict[str, Dict]:
+    engine = _engine(cfg)
+    try:
+        sounds = engine.get_loaded_sounds()
+        if not sounds:
+            raise BenchmarkSkipped("нет звуков в папке sounds")
+
+        # Холодный старт: каждый звук играется впервые после сброса кэша
+        cold = []
+        for sound_id in sounds:
+            engine._cache.invalidate(sound_id)
+            cold.append(timed(lambda: engine.play(sound_id), repeat=1, warmup=0)["mean_ms"])
+        engine.stop()
+
+        warm_id = sounds[0]
+        warm = timed(lambda: engine.play(warm_id), repeat=repeat, warmup=5)
+        engine.stop()
+        return {"cold": summarize(cold), "warm": warm}
+    finally:
+        engine.close()
+
+
+def run(repeat: int = 200) -> Dict[str, Dict]:
+    logging.getLogger("VoiceEngine").setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {"files": _measure(isolated_config(Path(tmp), audio={"preload_sounds": []}), repeat)}
+
+        # Тот же замер со звуками из упакованного банка
+        from core.sound_bank import build_bank
+        cfg = isolated_config(
+            Path(tmp), audio={"preload_sounds": []}, paths={"sound_bank": str(Path(tmp) / "sounds.bank")}
+        )
+        audio = cfg["audio"]
+        report = build_bank(
+            cfg["paths"]["sounds"], cfg["paths"]["sound_bank"],
+            sample_rate=audio.get("sample_rate", 44100),
+            channels=audio.get("mixer_channels", 2),
+            silence_threshold_db=audio.get("silence_threshold_db", -45.0),
+            target_loudness_db=audio.get("target_loudness_db", -20.0)
+        )
+        if report["total"] - report["failed"] > 0:
+            results["bank"] = _measure(cfg, repeat)
+    return results
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), ensure_ascii=False, indent=2))
@@ -0,0 +1,90 @@
+"""
+Время запуска в отдельном процессе: импорт модулей, готовность
+распознавателя (можно слушать) и полная готовность ассистента.
+Вместо микрофона - короткая тишина из WAV, чтобы не нужна была звуковая карта.
+"""
+import json
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+from typing import Dict
+
+sys.path.append(str(Path(__file__).parent.parent))
+from benchmarks.harness import ROOT, BenchmarkSkipped, summarize
+
+
+def _child():
+    """Один холодный запуск; печатает замеры в JSON"""
+    import logging
+    logging.disable(logging.CRITICAL)
+
+    started = time.perf_counter()
+    try:
+        import main
+        from benchmarks.harness import isolated_config
+    except ImportError as e:
+        print(json.dumps({"skipped": f"не импортируется main: {e}"}))
+        return
+    imported = time.perf_counter()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        silence = Path(tmp) / "silence.wav"
+        with wave.open(str(silence), "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(16000)
+            w.writeframes(b"\0\0" * 1600)
+        main.cfg.config = isolated_config(
+            Path(tmp),
+            paths={"logs": str(Path(tmp) / "assistant.log")},
+            microphone={"source": "file", "source_path": str(silence), "source_realtime": False}
+        )
+        app = main.SayoriMain.__new__(main.SayoriMain)
+        app.logger = logging.getLogger("Main")
+        try:
+            app._init_components()
+            listening = time.perf_counter()
+            app.assistant = app.startup.result("assistant")
+        except Exception as e:
+            print(json.dumps({"skipped": f"ошибка инициализации: {e}"}))
+            return
+        ready = time.perf_counter()
+        tasks = app.startup.report()
+        app.voice_recognizer.close()
+        app.assistant.shutdown()
+
+    print(json.dumps({
+        "import_ms": (imported - started) * 1000,
+        "listen_ms": (listening - started) * 1000,
+        "init_ms": (ready - imported) * 1000,
+        "total_ms": (ready - started) * 1000,
+        "assistant_ms": tasks.get("assistant", 0.0),
+        "recognizer_ms": tasks.get("recognizer", 0.0)
+    }))
+
+
+def run(repeat: int = 5) -> Dict[str, Dict]:
+    runs = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_startup", "--child"],
+            cwd=ROOT, capture_output=True, text=True, timeout=120
+        )
+        lines = result.stdout.strip().splitlines()
+        if result.returncode or not lines:
+            raise BenchmarkSkipped(f"процесс завершился с кодом {result.returncode}: {result.stderr.strip()[-300:]}")
+        data = json.loads(lines[-1])
+        if "skipped" in data:
+            raise BenchmarkSkipped(data["skipped"])
+        runs.append(data)
+    return {key: summarize([r[key] for r in runs]) for key in runs[0]}
+
+
+if __name__ == "__main__":
+    if "--child" in sys.argv:
+        _child()
+    else:
+        print(json.dumps(run(), ensure_ascii=False, indent=2))
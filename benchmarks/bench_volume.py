@@ -0,0 +1,132 @@
+"""
+Громкость на FakeVolumeBackend: точность плавного изменения, нагрузка
+на процессор и число обращений к бэкенду при частых командах.
+"""
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Dict
+
+sys.path.append(str(Path(__file__).parent.parent))
+from benchmarks.harness import timed
+from core.audio_controller import EASINGS, AudioController, VolumeRamp
+from core.volume_backends import FakeVolumeBackend
+
+# Задержка одного обращения, как у pactl/amixer (порядок величины)
+_LATENCY = 0.002
+
+
+def _controller(volume: int = 30, echo: bool = False):
+    backend = FakeVolumeBackend(volume=volume, latency=_LATENCY, echo=echo)
+    return AudioController({"audio": {}}, backend=backend), backend
+
+
+def _ramp_fidelity(easing: str, duration: float = 0.6) -> Dict[str, float]:
+    """Одно плавное изменение 30 -> 80: отклонение записей от идеальной кривой"""
+    controller, backend = _controller()
+    cpu_started = time.process_time()
+    started = time.monotonic()
+    controller.set_volume(80, smooth=True, duration=duration, easing=easing)
+    controller.flush(duration + 1.0)
+    cpu = time.process_time() - cpu_started
+    controller.close()
+
+    ideal = VolumeRamp(30, 80, started, duration, EASINGS[easing])
+    errors = [abs(volume - ideal.value(at)) for at, volume in backend.history]
+    last_at, last_volume = backend.history[-1]
+    return {
+        "writes": len(backend.history),
+        "skipped": controller.skipped_writes,
+        "max_error_pct": round(max(errors), 2),
+        "final_volume": last_volume,
+        # Когда записано последнее значение относительно конца изменения (<0 - цель достигнута раньше)
+        "final_offset_ms": round((last_at - started - duration) * 1000, 1),
+        "cpu_percent": round(cpu / duration * 100, 2)
+    }
+
+
+def _retargeting(retargets: int = 10, interval: float = 0.05) -> Dict[str, float]:
+    """Новая цель каждые interval секунд, пока идёт изменение: записи одна за другой без скачков"""
+    controller, backend = _controller()
+    started = time.monotonic()
+    for i in range(retargets):
+        controller.set_volume(90 if i % 2 == 0 else 10, smooth=True, duration=0.5)
+        time.sleep(interval)
+    controller.flush(2.0)
+    elapsed = time.monotonic() - started
+    controller.close()
+
+    volumes = [volume for _, volume in backend.history]
+    jumps = [abs(b - a) for a, b in zip(volumes, volumes[1:])]
+    return {
+        "writes": len(volumes),
+        "writes_per_second": round(len(volumes) / elapsed, 1),
+        "max_jump_pct": max(jumps) if jumps else 0
+    }
+
+
+def _burst(commands: int = 50) -> Dict[str, float]:
+    """Команды «громче» подряд: сколько записей дошло до бэкенда"""
+    controller, backend = _controller(volume=0)
+    for _ in range(commands):
+        controller.volume_up(1)
+    controller.flush()
+    controller.close()
+    return {
+        "commands": commands,
+        "reads": backend.reads,
+        "writes": len(backend.writes),
+        "final_volume": backend.volume
+    }
+
+
+def _echoing() -> Dict[str, Dict]:
+    """
+    Бэкенд сообщает и о собственных записях (как pactl subscribe без фильтра эха):
+    шаги, не меняющие целый процент, всё равно не должны доходить до системы
+    """
+    results = {}
+    for target in (62, 60):
+        controller, backend = _controller(volume=60, echo=True)
+        reads = backend.reads
+        controller.set_volume(target, smooth=True, duration=0.5)
+        controller.flush(2.0)
+        backend.settle()
+        controller.close()
+        results[f"ramp_60_{target}"] = {"writes": len(backend.writes), "reads": backend.reads - reads}
+
+    controller, backend = _controller(volume=0, echo=True)
+    for _ in range(20):
+        controller.volume_up(1)
+        controller.flush()
+        backend.settle()
+    controller.close()
+    results["steps"] = {"commands": 20, "writes": len(backend.writes), "final_volume": backend.volume}
+    return results
+
+
+def run(repeat: int = 2000) -> Dict[str, Dict]:
+    logging.getLogger("AudioController").setLevel(logging.WARNING)
+    controller, _ = _controller()
+    levels = iter(range(10 ** 9))
+    try:
+        # Вызов не ждёт бэкенд: значение только передаётся потоку громкости
+        set_call = timed(lambda: controller.set_volume(next(levels) % 100), repeat=repeat)
+        read_call = timed(controller.get_current_volume, repeat=repeat)
+    finally:
+        controller.close()
+
+    return {
+        "set_volume": set_call,
+        "get_volume_cached": read_call,
+        "ramp": {name: _ramp_fidelity(name) for name in EASINGS},
+        "retarget": _retargeting(),
+        "burst": _burst(),
+        "echo": _echoing()
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), ensure_ascii=False, indent=2))
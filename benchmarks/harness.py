@@ -0,0 +1,142 @@
+import json
+import math
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = Path(__file__).parent.parent
+
+# Сравниваемые метрики: у ops больше - лучше, у *_ms - меньше
+_COMPARED = ("p50_ms", "p95_ms", "ops")
+# Разница меньше этой считается шумом таймера (мс)
+_NOISE_MS = 0.05
+
+
+class BenchmarkSkipped(Exception):
+    """Замер невозможен в этом окружении (нет зависимости, устройства и т.п.)"""
+
+
+def timed(fn: Callable[[], Any], repeat: int = 100, warmup: int = 5,
+          setup: Optional[Callable[[], Any]] = None) -> Dict[str, float]:
+    """
+    Многократный замер функции.
+
+    :param setup: Вызывается перед каждым повтором, в замер не входит
+    :return: p50/p95/p99/mean в миллисекундах и ops - вызовов в секунду
+    """
+    for _ in range(warmup):
+        if setup:
+            setup()
+        fn()
+
+    samples: List[float] = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter_ns()
+        fn()
+        samples.append((time.perf_counter_ns() - started) / 1e6)
+    return summarize(samples)
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Сводка по замерам в миллисекундах"""
+    ordered = sorted(samples)
+    pick = lambda p: ordered[min(len(ordered) - 1, max(0, math.ceil(len(ordered) * p / 100) - 1))]
+    mean = sum(ordered) / len(ordered)
+    return {
+        "n": len(ordered),
+        "p50_ms": round(pick(50), 4),
+        "p95_ms": round(pick(95), 4),
+        "p99_ms": round(pick(99), 4),
+        "mean_ms": round(mean, 4),
+        "ops": round(1000 / mean, 1) if mean > 0 else None
+    }
+
+
+def environment() -> Dict[str, str]:
+    """Сведения о машине и ревизии для сравнения прогонов"""
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True, timeout=5
+        ).stdout.strip()
+    except Exception:
+        revision = ""
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "revision": revision
+    }
+
+
+def write_results(path: Path, results: Dict[str, Any]):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+def load_results(path: Path) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _flatten(prefix: str, value: Any, out: Dict[str, float]):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            _flatten(f"{prefix}.{key}" if prefix else key, item, out)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        out[prefix] = float(value)
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Поиск регрессий относительно базового прогона.
+
+    Сравниваются p50/p95 и ops; регрессия - ухудшение больше чем на
+    threshold (доля, 0.2 = 20%). Разница меньше _NOISE_MS не учитывается.
+
+    :return: Описания регрессий (пустой список - всё в норме)
+    """
+    now: Dict[str, float] = {}
+    base: Dict[str, float] = {}
+    _flatten("", current.get("results", {}), now)
+    _flatten("", baseline.get("results", {}), base)
+
+    regressions = []
+    for key, old in base.items():
+        new = now.get(key)
+        if new is None or old <= 0:
+            continue
+        metric = key.rsplit(".", 1)[-1]
+        if metric not in _COMPARED:
+            continue
+        if metric == "ops":
+            change = (old - new) / old
+        else:
+            if new - old < _NOISE_MS:
+                continue
+            change = (new - old) / old
+        if change > threshold:
+            regressions.append(f"{key}: {old:g} -> {new:g} (хуже на {change:.0%})")
+    return regressions
+
+
+def isolated_config(tmp_dir: Path, **overrides) -> Dict[str, Any]:
+    """Копия config.config для замеров: без звуковой карты, банка и облака"""
+    import copy
+    sys.path.insert(0, str(ROOT))
+    import config
+
+    cfg = copy.deepcopy(config.config)
+    cfg["paths"]["sound_bank"] = None
+    cfg["audio"].update(output="mixer", mixer_sink="null", sound_bank_auto_build=False)
+    cfg["recognition"]["backend"] = "stub"
+    for section, values in overrides.items():
+        cfg.setdefault(section, {}).update(values)
+    return cfg
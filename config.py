@@ -1,9 +1,9 @@
 import logging
+import os
+import tempfile
 from pathlib import Path
 from typing import Dict, Any
 
-# Настройка логгера для конфига
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("Config")
 
 BASE_DIR = Path(__file__).parent.absolute()
@@ -14,17 +14,21 @@ ESSENTIAL_DIRS = [
     "sounds/errors",
     "sounds/modes",
     "sounds/volume",
-    "data"
+    "data",
+    "logs"
 ]
 
-# Автосоздание всех нужных папок
-for dir_name in ESSENTIAL_DIRS:
-    dir_path = BASE_DIR / dir_name
-    try:
-        dir_path.mkdir(parents=True, exist_ok=True)
-        logger.info(f"Директория {dir_path} проверена")
-    except Exception as e:
-        logger.error(f"Ошибка создания директории {dir_path}: {e}")
+
+def ensure_directories():
+    """Создание нужных папок (вызывается при запуске, а не при импорте)"""
+    for dir_name in ESSENTIAL_DIRS:
+        dir_path = BASE_DIR / dir_name
+        try:
+            dir_path.mkdir(parents=True, exist_ok=True)
+            logger.debug(f"Директория {dir_path} проверена")
+        except Exception as e:
+            logger.error(f"Ошибка создания директории {dir_path}: {e}")
+
 
 config: Dict[str, Any] = {
     "name": "Sayori",
@@ -32,18 +36,89 @@ config: Dict[str, Any] = {
     "paths": {
         "sounds": str(BASE_DIR / "sounds"),
         "logs": str(BASE_DIR / "logs" / "assistant.log"),
+        "sound_bank": str(BASE_DIR / "data" / "sounds.bank"),  # Собирается: python -m core.sound_bank
         "commands_config": str(BASE_DIR / "data" / "commands.json"),
         "modes_config": str(BASE_DIR / "data" / "modes.json")    
     },
     "audio": {
         "default_volume": 70,
         "volume_step": 10,
-        "sample_rate": 44100
+        "volume_backend": "auto",  # auto, pycaw (Windows), pactl (PulseAudio/PipeWire), amixer (ALSA) или fake
+        "volume_cache_ttl": 5.0,  # Сколько верить прочитанной громкости, если бэкенд не сообщает об изменениях (сек)
+        "volume_write_interval_ms": 30,  # Записи чаще этого склеиваются в одну (и шаг плавного изменения)
+        "volume_echo_window_ms": 250,  # События pactl сразу после своей записи - её эхо, громкость не перечитывается
+        "volume_easing": "ease_in_out",  # Кривая плавного изменения: linear, ease_in, ease_out, ease_in_out
+        "sample_rate": 44100,
+        "cache_budget_mb": 32,  # Объём декодированных звуков в памяти
+        "preload_sounds": ["system/*", "errors/*", "volume/*", "modes/*"],  # Остальные - по требованию
+        "output": "simpleaudio",  # simpleaudio - поток на каждый звук, mixer - один общий поток
+        "mixer_sink": "sounddevice",  # sounddevice, null или file (для тестов без звуковой карты)
+        "duck_level": 0.3,
+        "sound_bank_auto_build": False,  # Проверять и пересобирать банк звуков при запуске
+        "silence_threshold_db": -45.0,  # Порог обрезки тишины по краям звуков (None - не обрезать)
+        "target_loudness_db": -20.0  # Выравнивание громкости звуков по RMS (None - отключено)
     },
     "microphone": {
         "device_index": None,
         "timeout": 3,
-        "calibration_duration": 1.0
+        "noise_tracking": True,  # Порог речи по текущему уровню шума (без калибровки при запуске)
+        "noise_window": 4.0,  # За сколько секунд оценивается уровень шума
+        "noise_percentile": 20.0,  # Процентиль громкости кадров, принимаемый за шум
+        "onset_db": 9.0,  # Речь начинается на столько дБ выше шума...
+        "release_db": 5.0,  # ...и заканчивается ниже этого уровня (гистерезис)
+        "min_energy": 50.0,  # Нижняя граница порогов (RMS)
+        "min_speech": 0.1,  # Более короткие всплески не считаются речью (сек)
+        "energy_threshold": 300,  # Постоянный порог при noise_tracking: False
+        "capture_mode": "stream",  # stream - поток открыт постоянно, context - открытие на каждую фразу
+        "buffer_seconds": 10.0,
+        "block_ms": 30,
+        "pre_roll": 0.3,
+        "source": "microphone",  # microphone, file (source_path) или stdin - см. python main.py --help
+        "source_path": None,  # WAV-файл или папка с записанными командами
+        "source_rate": None,  # Частота сырого PCM из stdin (None - как audio.sample_rate)
+        "source_realtime": True,  # False - подавать запись максимально быстро
+        "source_gap": 1.0,  # Тишина между файлами записи (сек)
+        "source_lead_in": 1.0  # Тишина перед первым файлом записи (сек)
+    },
+    "recognition": {
+        "backend": "google",  # google - облако, vosk - офлайн, stub - заглушка для тестов
+        "vosk_model_path": str(BASE_DIR / "models" / "vosk-model-small-ru")
+    },
+    "pipeline": {
+        "queue_size": 4  # Ёмкость очередей между захватом, распознаванием и выполнением
+    },
+    "wake_spotter": {
+        "spotter": "auto",  # auto, vosk (грамматика из одного слова), template (образцы WAV) или none
+        "templates": str(BASE_DIR / "data" / "wake_word"),  # Записи триггерного слова для template
+        "threshold": 0.12,  # Порог расстояния до образца для template (меньше - строже)
+        "follow_up": 4.0  # Сколько секунд после триггерного слова фразы распознаются без него
+    },
+    "speculation": {
+        "enabled": True,  # Готовить команду (звук, процессы режима) по промежуточным гипотезам распознавания
+        "min_score": 0.9  # Минимальная оценка нечёткого совпадения, по которой команда готовится заранее
+    },
+    "commands": {
+        "fuzzy_threshold": 0.75,  # None - только точное совпадение
+        "hot_reload": True,  # Применять изменения commands.json и modes.json без перезапуска
+        "reload_poll_interval": 1.0  # Период опроса файлов, если inotify недоступен (сек)
+    },
+    "logging": {
+        "level": "INFO",
+        "console": True,
+        "format": "text",  # text или json (JSON Lines с номером фразы - для разбора программами)
+        "max_mb": 5,  # Ротация assistant.log по размеру...
+        "rotate_when": "midnight",  # ...и по времени (как у TimedRotatingFileHandler)
+        "backup_count": 7,
+        "compress": True  # Старые файлы сжимаются в .gz
+    },
+    "control": {
+        "enabled": True,  # Unix-сокет для sayorictl.py (не на Windows)
+        "socket": os.path.join(os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir(), "sayori.sock"),
+        "voice": True  # False - без микрофона, только команды через сокет (python main.py --no-voice)
+    },
+    "tracing": {
+        "enabled": False,  # Замеры задержек по этапам (p50/p95/p99 при выходе и по SIGUSR1)
+        "keep_traces": 32  # Сколько последних фраз хранить поэтапно
     },
     "language": "ru-RU",
     "metadata": {
@@ -84,7 +159,9 @@ def validate_config(cfg: Dict) -> bool:
     return True
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     try:
+        ensure_directories()
         validate_config(config)
         logger.info("✅ Конфигурация успешно валидирована")
         
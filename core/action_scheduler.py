@@ -0,0 +1,222 @@
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+
+@dataclass
+class ActionTiming:
+    """Время выполнения одного действия режима (секунды от начала активации)"""
+    index: int
+    id: str
+    type: Optional[str]
+    start: float = 0.0
+    end: float = 0.0
+    delay: float = 0.0
+    success: bool = False
+    skipped: bool = False
+    error: Optional[str] = None
+    details: Dict[str, Any] = field(default_factory=dict)  # Код выхода процесса и т.п.
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+@dataclass
+class ActivationResult:
+    """Итог активации режима с отчётом по действиям"""
+    mode: str
+    success: bool
+    total_time: float = 0.0
+    actions: List[ActionTiming] = field(default_factory=list)
+    unmet: List[str] = field(default_factory=list)  # Невыполненные требования режима
+
+    def __bool__(self) -> bool:
+        return self.success
+
+    @property
+    def failed(self) -> List[ActionTiming]:
+        return [t for t in self.actions if not t.success]
+
+    @property
+    def executed(self) -> List[ActionTiming]:
+        return [t for t in self.actions if not t.skipped]
+
+    def summary(self) -> str:
+        parts = [
+            f"{t.id}:{t.type}={'пропущено' if t.skipped else f'{t.duration * 1000:.0f}мс'}"
+            + ("" if t.details.get("returncode") is None else f"(код {t.details['returncode']})")
+            + ("" if t.success or t.skipped else "(ошибка)")
+            for t in self.actions
+        ]
+        return f"{self.total_time * 1000:.0f} мс [{', '.join(parts)}]"
+
+
+class ActionScheduler:
+    def __init__(self, executor: Callable[[Dict, Dict], bool], max_workers: int = 4):
+        """
+        Выполнение действий режима как графа зависимостей на пуле потоков.
+
+        Действие может указать id и after/depends_on (id или номер другого
+        действия, строка или список). Независимые действия идут параллельно,
+        delay отсчитывается от завершения зависимостей (по таймеру, поток
+        пула на время ожидания не занимается).
+
+        :param executor: Выполняет одно действие, возвращает успех;
+                         вторым аргументом получает словарь для подробностей
+        :param max_workers: Число потоков пула
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.executor = executor
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="mode-action")
+
+    @staticmethod
+    def _action_id(action: Dict, index: int) -> str:
+        return str(action.get("id", index))
+
+    def validate(self, actions: List[Dict]) -> List[str]:
+        """Ошибки графа действий и задержек (пустой список - можно выполнять)"""
+        errors = []
+        for i, action in enumerate(actions):
+            delay = action.get("delay", 0.0)
+            if isinstance(delay, bool) or not isinstance(delay, (int, float)) or delay < 0:
+                errors.append(f"Действие {self._action_id(action, i)}: некорректная задержка '{delay}'")
+        try:
+            self._resolve_dependencies(actions)
+        except ValueError as e:
+            errors.append(str(e))
+        return errors
+
+    def _resolve_dependencies(self, actions: List[Dict]) -> List[List[int]]:
+        """Номера зависимостей для каждого действия. ValueError при ошибках графа"""
+        ids = {}
+        for i, action in enumerate(actions):
+            ids.setdefault(self._action_id(action, i), i)
+            ids.setdefault(str(i), i)
+
+        deps = []
+        for i, action in enumerate(actions):
+            refs = action.get("after", action.get("depends_on", []))
+            if not isinstance(refs, list):
+                refs = [refs]
+            resolved = []
+            for ref in refs:
+                if str(ref) not in ids:
+                    raise ValueError(f"Действие {self._action_id(action, i)}: неизвестная зависимость '{ref}'")
+                resolved.append(ids[str(ref)])
+            deps.append(resolved)
+
+        # Проверка на циклы (алгоритм Кана)
+        indegree = [len(d) for d in deps]
+        dependents = [[] for _ in actions]
+        for i, d in enumerate(deps):
+            for j in d:
+                dependents[j].append(i)
+        queue = [i for i, n in enumerate(indegree) if n == 0]
+        visited = 0
+        while queue:
+            i = queue.pop()
+            visited += 1
+            for j in dependents[i]:
+                indegree[j] -= 1
+                if indegree[j] == 0:
+                    queue.append(j)
+        if visited != len(actions):
+            raise ValueError("Циклическая зависимость между действиями")
+        return deps
+
+    def run(self, actions: List[Dict]) -> List[ActionTiming]:
+        """Выполнение всех действий. Возвращает отчёт в исходном порядке"""
+        deps = self._resolve_dependencies(actions)
+        dependents: List[List[int]] = [[] for _ in actions]
+        for i, d in enumerate(deps):
+            for j in d:
+                dependents[j].append(i)
+
+        waiting = [set(d) for d in deps]
+        blocked = [False] * len(actions)
+        timings: List[Optional[ActionTiming]] = [None] * len(actions)
+        futures: Dict[Future, int] = {}
+        origin = time.perf_counter()
+
+        def release(index: int, ok: bool):
+            """Снятие зависимости; действия с проваленными зависимостями пропускаются"""
+            stack = [(index, ok)]
+            while stack:
+                done, done_ok = stack.pop()
+                for j in dependents[done]:
+                    waiting[j].discard(done)
+                    blocked[j] = blocked[j] or not done_ok
+                    if waiting[j]:
+                        continue
+                    if blocked[j]:
+                        now = time.perf_counter() - origin
+                        timings[j] = ActionTiming(
+                            j, self._action_id(actions[j], j), actions[j].get("type"),
+                            start=now, end=now, skipped=True, error="не выполнена зависимость"
+                        )
+                        stack.append((j, False))
+                    else:
+                        submit(j)
+
+        def submit(index: int):
+            delay = float(actions[index].get("delay", 0.0))
+            if delay > 0:
+                futures[self._submit_after(delay, index, actions[index], origin)] = index
+            else:
+                futures[self._pool.submit(self._run_one, index, actions[index], origin)] = index
+
+        for i, d in enumerate(deps):
+            if not d:
+                submit(i)
+
+        while futures:
+            done, _ = wait(list(futures), return_when=FIRST_COMPLETED)
+            for future in done:
+                index = futures.pop(future)
+                timings[index] = future.result()
+                release(index, timings[index].success)
+
+        return timings
+
+    def _submit_after(self, delay: float, index: int, action: Dict, origin: float) -> Future:
+        """Отправка действия в пул по таймеру: до истечения delay поток пула свободен"""
+        result: Future = Future()
+
+        def forward(inner: Future):
+            error = inner.exception()
+            if error is not None:
+                result.set_exception(error)
+            else:
+                result.set_result(inner.result())
+
+        def start():
+            try:
+                self._pool.submit(self._run_one, index, action, origin).add_done_callback(forward)
+            except Exception as e:
+                result.set_exception(e)
+
+        timer = threading.Timer(delay, start)
+        timer.daemon = True
+        timer.start()
+        return result
+
+    def _run_one(self, index: int, action: Dict, origin: float) -> ActionTiming:
+        timing = ActionTiming(index, self._action_id(action, index), action.get("type"))
+        timing.delay = float(action.get("delay", 0.0))
+        timing.start = time.perf_counter() - origin
+        try:
+            timing.success = bool(self.executor(action, timing.details))
+            if not timing.success:
+                timing.error = timing.details.get("error")
+        except Exception as e:
+            timing.error = str(e)
+            self.logger.error(f"Ошибка действия {timing.id}: {e}")
+        timing.end = time.perf_counter() - origin
+        return timing
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
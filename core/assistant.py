@@ -1,10 +1,16 @@
 import logging
+import threading
 import time
 from pathlib import Path
 from typing import Dict, Optional, Any
 from core.voice_engine import VoiceEngine
 from core.audio_controller import AudioController
 from core.mode_manager import ModeManager
+from core.command_index import CommandIndex, CommandMatch
+from core.file_watcher import FileWatcher
+from core.speculation import Speculator
+from core.startup import StartupTasks
+from core.tracing import tracer
 import json
 import config as cfg
 import subprocess
@@ -13,9 +19,13 @@ import subprocess
 class Assistant:
     def __init__(self, config: Dict[str, Any]):
         self.config = config
+        # Голос и управляющий сокет выполняют команды по одной
+        self._dispatch_lock = threading.RLock()
         self._setup_logging()
         self._init_components()
-        self.commands = self._load_commands()
+        self._setup_action_handlers()
+        self._init_speculation()
+        self._init_hot_reload()
         self.logger.info("Ассистент инициализирован (без озвучки)")
         
     def run_voice_loop(self):
@@ -37,40 +47,220 @@ class Assistant:
         
         
     def _setup_logging(self):
-        """Настройка системы логирования"""
+        """Логгер ассистента (вывод настраивает core.log_setup при запуске)"""
         self.logger = logging.getLogger(self.__class__.__name__)
-        handler = logging.FileHandler(self.config["paths"]["logs"])
-        handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-        self.logger.addHandler(handler)
-        self.logger.setLevel(logging.INFO)
 
     def _init_components(self):
-        """Инициализация компонентов с обработкой ошибок"""
+        """
+        Инициализация компонентов с обработкой ошибок.
+
+        Компоненты не зависят друг от друга, поэтому создаются параллельно:
+        запуск занимает время самого медленного из них, а не сумму.
+        """
+        self.startup = StartupTasks("assistant")
+        self.startup.submit("voice_engine", VoiceEngine, self.config)  # Только для предзаписанных звуков
+        self.startup.submit("audio", AudioController, self.config)
+        # Режимам нужен регулятор громкости, поэтому они ждут только его
+        self.startup.submit("modes", lambda: ModeManager(
+            self.config["paths"]["modes_config"], audio=self.startup.result("audio")
+        ))
+        self.startup.submit("commands", self._build_command_index)
         try:
-            self.voice_engine = VoiceEngine(self.config)  # Только для предзаписанных звуков
-            self.audio = AudioController(
-                max_volume=self.config["audio"].get("max_volume", 100),
-                min_volume=self.config["audio"].get("min_volume", 0)
-            )
-            self.modes = ModeManager(self.config["paths"]["modes_config"])
-            self.logger.info("Компоненты загружены")
+            components = self.startup.results()
         except Exception as e:
             self.logger.critical(f"Ошибка инициализации: {e}")
             raise
+        self.voice_engine = components["voice_engine"]
+        self.audio = components["audio"]
+        self.modes = components["modes"]
+        self.commands, self.command_index = components["commands"]
+        self.logger.info(f"Компоненты загружены за {self.startup.summary()}")
+
+    def _build_command_index(self):
+        commands = self._load_commands()
+        index = CommandIndex(
+            commands,
+            fuzzy_threshold=self.config.get("commands", {}).get("fuzzy_threshold")
+        )
+        return commands, index
+
+    def _read_commands(self) -> Dict[str, Any]:
+        """Чтение раздела voice_commands. Исключение, если файл испорчен"""
+        with open(self.config["paths"]["commands_config"], "r", encoding="utf-8") as f:
+            commands = json.load(f)
+        if not isinstance(commands.get("voice_commands"), dict):
+            raise ValueError("Отсутствует раздел voice_commands")
+        return commands["voice_commands"]
 
     def _load_commands(self) -> Dict[str, Any]:
         """Загрузка команд из JSON с проверкой ошибок"""
         try:
-            with open(self.config["paths"]["commands_config"], "r", encoding="utf-8") as f:
-                commands = json.load(f)
-                if "voice_commands" not in commands:
-                    raise ValueError("Отсутствует раздел voice_commands")
-                return commands["voice_commands"]
+            return self._read_commands()
         except Exception as e:
             self.logger.error(f"Ошибка загрузки команд: {e}")
             return {}
 
+    def _init_speculation(self):
+        """Подготовка команды по промежуточным гипотезам, пока пользователь ещё говорит"""
+        speculation_cfg = self.config.get("speculation", {})
+        self.speculation: Optional[Speculator] = None
+        if not speculation_cfg.get("enabled", True):
+            return
+        self.speculation = Speculator(
+            # Через лямбду: после горячей перезагрузки используется новый индекс
+            lambda text: self.command_index.match(text),
+            [self._warm_sound, self._warm_mode],
+            min_score=speculation_cfg.get("min_score", 0.9)
+        )
+
+    def _init_hot_reload(self):
+        """Перезагрузка commands.json и modes.json при изменении без перезапуска"""
+        commands_cfg = self.config.get("commands", {})
+        self._watcher: Optional[FileWatcher] = None
+        if not commands_cfg.get("hot_reload", True):
+            return
+        self._watcher = FileWatcher(poll_interval=commands_cfg.get("reload_poll_interval", 1.0))
+        self._watcher.watch(self.config["paths"]["commands_config"], self.reload_commands)
+        self._watcher.watch(self.config["paths"]["modes_config"], self.modes.reload)
+        self._watcher.start()
+
+    def reload_commands(self) -> bool:
+        """
+        Перечитывание commands.json.
+
+        Компилируются только изменённые категории, новый индекс подменяет
+        старый одним присваиванием. Если файл не читается или в нём есть
+        ошибки, продолжает работать прежняя версия.
+        """
+        try:
+            commands = self._read_commands()
+        except Exception as e:
+            self.logger.error(f"commands.json не применён, работает прежняя версия: {e}")
+            return False
+
+        index = CommandIndex(
+            commands,
+            fuzzy_threshold=self.config.get("commands", {}).get("fuzzy_threshold"),
+            previous=self.command_index
+        )
+        if index.errors:
+            self.logger.error(f"commands.json не применён, ошибок: {len(index.errors)}; работает прежняя версия")
+            return False
+        if not index.changed:
+            return True
+
+        self.command_index = index
+        self.commands = commands
+        self.logger.info(f"Команды обновлены ({len(index)}), изменены категории: {', '.join(index.changed)}")
+        return True
+
+    def _setup_action_handlers(self):
+        """Действия команд, которые сейчас поддерживаются"""
+        self._action_handlers = {
+            'activate_mode': self._activate_mode,
+            'set_volume': self._set_volume,
+            'change_volume': self._change_volume,
+            'set_mute': self._set_mute,
+            'show_help': self._show_help
+        }
+
+    def process_command(self, text: str) -> bool:
+        """
+        Поиск и выполнение команды по распознанной фразе
+
+        :param text: Фраза без триггерного слова
+        :return: Успешность выполнения
+        """
+        with tracer.span("matching"):
+            match = self.command_index.match(text)
+        if self.speculation:
+            self.speculation.resolve(match)
+        if not match:
+            self.logger.warning(f"Команда не распознана: '{text}'")
+            self.voice_engine.play("errors/unknown_command")
+            return False
+
+        if match.score < 1.0:
+            self.logger.info(f"Нечёткое совпадение '{text}' -> '{match.entry.phrase}' ({match.score:.2f})")
+        return self.execute(match)
+
+    def speculate(self, text: str):
+        """Промежуточная гипотеза фразы (без триггерного слова): команда готовится заранее"""
+        if self.speculation:
+            self.speculation.offer(text)
+
+    def _warm_sound(self, match: CommandMatch):
+        sound = match.entry.spec.get("sound")
+        if sound:
+            self.voice_engine.prefetch(sound)
+
+    def _warm_mode(self, match: CommandMatch):
+        if match.action == "activate_mode" and "mode" in match.params:
+            self.modes.prepare(match.params["mode"])
+
+    def run_action(self, action: str, params: Dict[str, Any]) -> bool:
+        """
+        Выполнение действия по имени (set_volume, activate_mode, ...).
+        Исключения обработчика пробрасываются.
+        """
+        handler = self._action_handlers.get(action)
+        if not handler:
+            self.logger.warning(f"Действие не поддерживается: {action}")
+            return False
+        with self._dispatch_lock:
+            return bool(handler(params))
+
+    def execute(self, match: CommandMatch) -> bool:
+        """Выполнение найденной команды"""
+        try:
+            success = self.run_action(match.action, match.params)
+        except Exception as e:
+            self.logger.error(f"Ошибка выполнения команды '{match.entry.phrase}': {e}")
+            success = False
+
+        if success:
+            if match.response:
+                self.print(match.response)
+            if match.entry.spec.get("sound"):
+                self.voice_engine.play(match.entry.spec["sound"])
+        return success
+
+    def _activate_mode(self, params: Dict[str, Any]) -> bool:
+        return self.modes.activate(params["mode"])
+
+    def _set_volume(self, params: Dict[str, Any]) -> bool:
+        return self.audio.set_volume(int(params["level"]))
+
+    def _change_volume(self, params: Dict[str, Any]) -> bool:
+        # Несколько команд подряд склеиваются в AudioController в одну запись
+        step = int(params.get("step", self.audio.volume_step))
+        if step >= 0:
+            self.audio.volume_up(step)
+        else:
+            self.audio.volume_down(-step)
+        return self.audio.backend is not None
+
+    def _set_mute(self, params: Dict[str, Any]) -> bool:
+        if params.get("state", True):
+            return self.audio.mute()[0]
+        return self.audio.unmute()
+
+    def _show_help(self, params: Dict[str, Any]) -> bool:
+        for category, phrases in self.get_available_commands().items():
+            self.print(f"{category}: {', '.join(phrases)}")
+        return True
 
+    def shutdown(self):
+        """Остановка компонентов перед выходом"""
+        if self._watcher:
+            self._watcher.stop()
+        if self.speculation:
+            self.speculation.close()
+            self.logger.info(f"Упреждающая подготовка команд: {self.speculation.stats()}")
+        self.voice_engine.close()
+        self.modes.shutdown()
+        self.audio.close()
+        self.logger.info("Ассистент остановлен")
 
     def print(self, text: str):
         """Вывод текста в консоль (вместо озвучки)"""
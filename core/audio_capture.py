@@ -0,0 +1,345 @@
+import logging
+import threading
+from typing import Callable, Optional
+
+import numpy as np
+
+from core.tracing import tracer
+
+
+class RingBuffer:
+    def __init__(self, capacity: int, dtype=np.int16, backpressure: bool = False):
+        """
+        Кольцевой буфер отсчётов фиксированного размера.
+
+        Память выделяется один раз. Позиции адресуются абсолютным номером
+        отсчёта с момента открытия потока, поэтому читатель может отставать
+        от записи на любую величину в пределах ёмкости.
+
+        :param capacity: Ёмкость в отсчётах
+        :param dtype: Тип отсчётов
+        :param backpressure: Запись ждёт, пока читатель не освободит место
+                             (release), вместо затирания старых данных.
+                             Для воспроизведения записей, не для микрофона.
+        """
+        self.capacity = capacity
+        self.backpressure = backpressure
+        self._data = np.zeros(capacity, dtype=dtype)
+        self._written = 0
+        self._released = 0
+        self._closed = False
+        self._readers = 0  # Читатели, ждущие новых данных
+        self._cond = threading.Condition()
+
+    @property
+    def written(self) -> int:
+        """Сколько отсчётов записано всего"""
+        return self._written
+
+    @property
+    def oldest(self) -> int:
+        """Самая ранняя позиция, которая ещё хранится в буфере"""
+        return max(0, self._written - self.capacity)
+
+    @property
+    def released(self) -> int:
+        """Позиция, до которой читателю данные больше не нужны"""
+        return self._released
+
+    @property
+    def closed(self) -> bool:
+        """Источник закончился, новых данных не будет"""
+        return self._closed
+
+    def write(self, samples: np.ndarray, timeout: Optional[float] = None) -> bool:
+        """
+        Запись блока (вызывается из потока захвата).
+
+        Если читатель уже ждёт данных, но ничего не освободил (фраза длиннее
+        буфера), старые данные затираются, как у микрофона, - иначе оба
+        ждали бы друг друга.
+
+        :return: False, если при backpressure место не освободилось за timeout
+        """
+        total = len(samples)
+        if self.backpressure:
+            with self._cond:
+                if not self._cond.wait_for(
+                    lambda: (self._closed or self._readers
+                             or self._written + total - self._released <= self.capacity),
+                    timeout
+                ):
+                    return False
+
+        if total >= self.capacity:
+            samples = samples[-self.capacity:]
+        n = len(samples)
+        start = (self._written + total - n) % self.capacity
+        first = min(n, self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        self._data[:n - first] = samples[first:]
+
+        with self._cond:
+            self._written += total
+            self._cond.notify_all()
+        return True
+
+    def release(self, position: int):
+        """Отметка читателя: данные до position можно перезаписывать"""
+        if not self.backpressure or position <= self._released:
+            return
+        with self._cond:
+            self._released = max(self._released, position)
+            self._cond.notify_all()
+
+    def close(self):
+        """Конец данных: ожидающие читатели и писатели просыпаются"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def read(self, start: int, end: int) -> np.ndarray:
+        """Копия отсчётов [start, end). Затёртое начало обрезается"""
+        start = max(start, self.oldest)
+        end = min(end, self._written)
+        if end <= start:
+            return self._data[:0].copy()
+
+        i, j = start % self.capacity, end % self.capacity
+        if i < j:
+            return self._data[i:j].copy()
+        return np.concatenate((self._data[i:], self._data[:j]))
+
+    def wait(self, position: int, timeout: Optional[float] = None) -> bool:
+        """Ожидание, пока в буфер будет записано position отсчётов (False - таймаут или конец данных)"""
+        with self._cond:
+            if self._written >= position:
+                return True
+            self._readers += 1
+            self._cond.notify_all()
+            try:
+                self._cond.wait_for(lambda: self._written >= position or self._closed, timeout)
+            finally:
+                self._readers -= 1
+            return self._written >= position
+
+
+class MicrophoneStream:
+    def __init__(self, sample_rate: int, device: Optional[int] = None,
+                 block_ms: int = 30, buffer_seconds: float = 10.0):
+        """
+        Постоянно открытый входной поток микрофона.
+
+        Устройство открывается один раз, отсчёты пишутся в RingBuffer
+        из потока обратного вызова PortAudio.
+
+        :param sample_rate: Частота дискретизации
+        :param device: Индекс устройства (None - по умолчанию)
+        :param block_ms: Размер блока захвата в миллисекундах
+        :param buffer_seconds: Сколько секунд звука хранить
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.sample_rate = sample_rate
+        self.device = device
+        self.block_size = max(1, int(sample_rate * block_ms / 1000))
+        self.buffer = RingBuffer(int(sample_rate * buffer_seconds))
+        self.overflows = 0
+        self._stream = None
+
+    def open(self):
+        """Открытие устройства и запуск захвата"""
+        if self._stream is not None:
+            return
+        # Импорт здесь: PortAudio нужен только при реальном захвате
+        import sounddevice as sd
+
+        self._stream = sd.InputStream(
+            samplerate=self.sample_rate,
+            device=self.device,
+            channels=1,
+            dtype="int16",
+            blocksize=self.block_size,
+            callback=self._on_audio
+        )
+        self._stream.start()
+        self.logger.info(f"Поток микрофона открыт ({self.sample_rate} Гц, блок {self.block_size})")
+
+    def _on_audio(self, indata, frames, time_info, status):
+        if status and status.input_overflow:
+            self.overflows += 1
+        self.buffer.write(indata[:, 0])
+
+    def close(self):
+        """Остановка захвата и закрытие устройства"""
+        if self._stream is None:
+            return
+        try:
+            self._stream.stop()
+            self._stream.close()
+        finally:
+            self._stream = None
+            self.logger.info("Поток микрофона закрыт")
+
+    @property
+    def is_open(self) -> bool:
+        return self._stream is not None
+
+
+class NoiseFloorTracker:
+    def __init__(self, sample_rate: int, window: float = 4.0, percentile: float = 20.0,
+                 frame_ms: int = 10, onset_db: float = 9.0, release_db: float = 5.0,
+                 min_energy: float = 50.0):
+        """
+        Уровень фонового шума по живому потоку.
+
+        RMS считается по кадрам frame_ms (весь блок - одной операцией NumPy)
+        и пишется в кольцо за последние window секунд. Уровень шума -
+        percentile-й процентиль кольца: речь с паузами его почти не
+        поднимает, а постоянный шум (вентилятор, музыка) поднимает за
+        доли window. Речь начинается выше onset_db над шумом и
+        продолжается, пока уровень выше release_db (гистерезис).
+
+        :param min_energy: Нижняя граница порогов (цифровая тишина записи)
+        """
+        self.frame = max(1, int(sample_rate * frame_ms / 1000))
+        self.percentile = percentile
+        self.onset_ratio = 10 ** (onset_db / 20)
+        self.release_ratio = 10 ** (release_db / 20)
+        self.min_energy = min_energy
+        self._history = np.zeros(max(1, int(window * 1000 / frame_ms)), dtype=np.float32)
+        self._pos = 0
+        self._count = 0
+        self.floor = min_energy / self.onset_ratio
+
+    def update(self, block: np.ndarray) -> float:
+        """Учёт очередного блока. Возвращает его RMS"""
+        usable = len(block) // self.frame * self.frame
+        if usable == 0:
+            return UtteranceSegmenter.rms(block)
+        frames = block[:usable].astype(np.float32).reshape(-1, self.frame)
+        power = np.einsum("ij,ij->i", frames, frames) / self.frame
+        energy = np.sqrt(power)
+
+        size = len(self._history)
+        index = (self._pos + np.arange(len(energy))) % size
+        self._history[index[-size:]] = energy[-size:]
+        self._pos = (self._pos + len(energy)) % size
+        self._count = min(self._count + len(energy), size)
+        self.floor = float(np.percentile(self._history[:self._count], self.percentile))
+        return float(np.sqrt(power.mean()))
+
+    @property
+    def onset_threshold(self) -> float:
+        return max(self.floor * self.onset_ratio, self.min_energy)
+
+    @property
+    def release_threshold(self) -> float:
+        return max(self.floor * self.release_ratio, self.min_energy)
+
+
+class UtteranceSegmenter:
+    def __init__(self, buffer: RingBuffer, sample_rate: int, block_size: int,
+                 energy_threshold: float = 300.0, pause_threshold: float = 0.8,
+                 pre_roll: float = 0.3, phrase_limit: float = 5.0,
+                 noise: Optional[NoiseFloorTracker] = None, min_speech: float = 0.1):
+        """
+        Выделение фраз из кольцевого буфера по энергии сигнала.
+
+        Читатель продолжает с того места, где закончилась прошлая фраза,
+        поэтому речь между вызовами не теряется, а начало фразы
+        дополняется pre_roll секундами звука до порога.
+
+        :param energy_threshold: Порог RMS, выше которого блок считается речью (без noise)
+        :param pause_threshold: Длительность тишины, завершающая фразу (сек)
+        :param pre_roll: Сколько звука до начала речи отдавать вместе с фразой (сек)
+        :param phrase_limit: Максимальная длительность фразы (сек)
+        :param noise: Пороги по текущему уровню шума вместо energy_threshold
+        :param min_speech: Сколько секунд звук должен держаться выше порога,
+            чтобы считаться речью; более короткие всплески (стук, щелчок)
+            отбрасываются и считаются в false_triggers
+        """
+        self.buffer = buffer
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.energy_threshold = energy_threshold
+        self.noise = noise
+        self.pause_samples = int(pause_threshold * sample_rate)
+        self.pre_roll_samples = int(pre_roll * sample_rate)
+        self.limit_samples = int(phrase_limit * sample_rate)
+        self.min_speech_samples = int(min_speech * sample_rate)
+        self.false_triggers = 0
+        # Запись (backpressure) читается с начала, живой микрофон - с текущего момента
+        self.cursor = buffer.released if buffer.backpressure else buffer.written
+
+    @staticmethod
+    def rms(block: np.ndarray) -> float:
+        """Среднеквадратичная энергия блока"""
+        if not len(block):
+            return 0.0
+        samples = block.astype(np.float32)
+        return float(np.sqrt(np.dot(samples, samples) / len(samples)))
+
+    def next_utterance(self, timeout: Optional[float] = None,
+                       consumer: Optional[Callable[[np.ndarray], None]] = None) -> Optional[np.ndarray]:
+        """
+        Следующая фраза из буфера.
+
+        :param timeout: Сколько секунд звука ждать начала речи (None - бесконечно)
+        :param consumer: Получает блоки фразы по мере захвата (первый - вместе с pre_roll)
+        :return: Отсчёты фразы или None по таймауту
+        """
+        block = self.block_size
+        # Если читатель отстал больше чем на ёмкость буфера - догоняем
+        self.cursor = max(self.cursor, self.buffer.oldest)
+        begin = self.cursor
+        wait_limit = None if timeout is None else self.cursor + int(timeout * self.sample_rate)
+        wall_timeout = None if timeout is None else timeout + 1.0
+        speech_start = None
+        candidate = None  # Начало звука выше порога, ещё не подтверждённое как речь
+        silence = 0
+
+        while True:
+            if not self.buffer.wait(self.cursor + block, wall_timeout):
+                return None
+            chunk = self.buffer.read(self.cursor, self.cursor + block)
+            self.cursor += block
+            if self.noise:
+                level = self.noise.update(chunk)
+                onset, release = self.noise.onset_threshold, self.noise.release_threshold
+            else:
+                level = self.rms(chunk)
+                onset = release = self.energy_threshold
+            # Начало фразы с pre_roll ещё понадобится, остальное можно затирать
+            keep = speech_start if speech_start is not None else candidate
+            self.buffer.release((self.cursor - block if keep is None else keep) - self.pre_roll_samples)
+
+            if speech_start is None:
+                if candidate is None:
+                    if level > onset:
+                        candidate = self.cursor - block
+                    elif wait_limit is not None and self.cursor >= wait_limit:
+                        return None
+                elif level <= release:
+                    # Всплеск короче min_speech - не речь
+                    self.false_triggers += 1
+                    candidate = None
+                if candidate is not None and self.cursor - candidate >= max(self.min_speech_samples, 1):
+                    speech_start = candidate
+                    silence = 0
+                    if consumer:
+                        start = max(speech_start - self.pre_roll_samples, begin, self.buffer.oldest)
+                        consumer(self.buffer.read(start, self.cursor))
+                continue
+
+            if consumer:
+                consumer(chunk)
+            silence = 0 if level > release else silence + block
+            if silence >= self.pause_samples:
+                # Сколько тишины понадобилось, чтобы понять, что фраза закончилась
+                tracer.record("end_of_speech", silence / self.sample_rate)
+                break
+            if self.cursor - speech_start >= self.limit_samples:
+                break
+
+        start = max(speech_start - self.pre_roll_samples, begin, self.buffer.oldest)
+        return self.buffer.read(start, self.cursor)
@@ -1,21 +1,62 @@
 import logging
-import pythoncom
+import math
+import sys
+import threading
 import time
-from typing import Optional, Tuple
-from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
-from comtypes import CLSCTX_ALL
-from ctypes import cast, POINTER
-import platform
-import psutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
 from threading import Thread
 
+# Добавляем корень проекта в пути поиска модулей
+sys.path.append(str(Path(__file__).parent.parent))
+from core.volume_backends import VolumeBackend, create_volume_backend
+
+# Кривые плавного изменения: доля пройденного времени -> доля пути (0..1)
+EASINGS: Dict[str, Callable[[float], float]] = {
+    "linear": lambda x: x,
+    "ease_in": lambda x: x * x,
+    "ease_out": lambda x: 1 - (1 - x) * (1 - x),
+    "ease_in_out": lambda x: 0.5 - math.cos(math.pi * x) / 2,
+}
+
+
+@dataclass
+class VolumeRamp:
+    """Плавное изменение громкости от start к target"""
+    start: float
+    target: int
+    started: float
+    duration: float
+    easing: Callable[[float], float]
+
+    def progress(self, now: float) -> float:
+        return min(1.0, max(0.0, (now - self.started) / self.duration))
+
+    def value(self, now: float) -> float:
+        return self.start + (self.target - self.start) * self.easing(self.progress(now))
+
+    def finished(self, now: float) -> bool:
+        return now >= self.started + self.duration
+
+
 class AudioController:
-    def __init__(self, config: dict, max_retries: int = 3):
+    def __init__(self, config: dict, max_retries: int = 3, backend: Optional[VolumeBackend] = None):
         """
         Улучшенный контроллер громкости с плавным изменением.
-        
+
+        Громкость кэшируется: повторные чтения не обращаются к системе,
+        пока бэкенд не сообщит об изменении извне (или не истечёт
+        volume_cache_ttl, если бэкенд о таких изменениях не сообщает).
+        Громкостью владеет один фоновый поток. Команды, пришедшие, пока
+        выполняется предыдущая запись, склеиваются в одну запись последнего
+        значения. Плавное изменение тоже выполняет этот поток: новая цель
+        подхватывает идущее изменение с текущей точки, записи идут не чаще
+        volume_write_interval_ms и только при смене целого процента.
+
         :param config: Конфигурация из config.py (раздел 'audio')
         :param max_retries: Максимальное количество попыток инициализации
+        :param backend: Бэкенд громкости (по умолчанию - по audio.volume_backend)
         """
         self.logger = logging.getLogger(self.__class__.__name__)
         self.config = config.get("audio", {})
@@ -24,105 +65,224 @@ class AudioController:
         self.max_volume = self.config.get("max_volume", 100)
         self.default_volume = self.config.get("default_volume", 50)
         self.volume_step = self.config.get("volume_step", 10)
-        self.volume_interface = None
-        self._current_volume = self.default_volume
+        self.cache_ttl = self.config.get("volume_cache_ttl", 5.0)
+        self.min_write_interval = self.config.get("volume_write_interval_ms", 30) / 1000
+        self.default_easing = self.config.get("volume_easing", "ease_in_out")
+
+        self._state = threading.Condition()
+        self._cached: Optional[int] = None
+        self._cached_at = 0.0
+        self._pending: Optional[int] = None
+        self._ramp: Optional[VolumeRamp] = None
+        self._written: Optional[int] = None  # Последнее записанное в систему значение
+        self._writing = False
+        self._in_flight: Optional[int] = None  # Значение, которое пишется прямо сейчас
+        self._last_write_ok = True
+        self._last_write_at = 0.0
+        self._writer: Optional[Thread] = None
+        self._closed = False
         self._prev_unmuted_volume = self.default_volume
-        self._smooth_thread = None
-        self._initialize()
-        self.logger.info(f"AudioController готов. Текущая громкость: {self._current_volume}%")
-
-    def _initialize(self) -> bool:
-        """Инициализация интерфейса громкости с повторными попытками"""
-        # Проверка ОС: только Windows
-        if platform.system() != "Windows":
-            self.logger.error("AudioController поддерживает только Windows")
-            return False
+        self.writes = 0
+        self.skipped_writes = 0
 
-        for attempt in range(1, self.max_retries + 1):
-            try:
-                pythoncom.CoInitialize()
-                devices = AudioUtilities.GetSpeakers()
-                interface = devices.Activate(
-                    IAudioEndpointVolume._iid_,
-                    CLSCTX_ALL,
-                    None
-                )
-                self.volume_interface = cast(interface, POINTER(IAudioEndpointVolume))
-                self._current_volume = self._get_volume()
-                self._prev_unmuted_volume = self._current_volume
-                self.logger.info(f"Аудиоинтерфейс инициализирован (попытка {attempt})")
-                return True
-            except Exception as e:
-                self.logger.warning(f"Попытка {attempt}/{self.max_retries} не удалась: {str(e)}")
-                time.sleep(1)
-                
-        self.logger.error("Не удалось инициализировать аудиоинтерфейс!")
-        return False
+        self.backend = backend if backend is not None else create_volume_backend(config, self.max_retries)
+        if self.backend:
+            self.backend.watch(self.invalidate)
+        self._prev_unmuted_volume = self._get_volume()
+        name = self.backend.name if self.backend else "нет"
+        self.logger.info(f"AudioController готов ({name}). Текущая громкость: {self._get_volume()}%")
+
+    def _clamp(self, percent: int) -> int:
+        return max(self.min_volume, min(self.max_volume, int(percent)))
+
+    def invalidate(self):
+        """
+        Событие об изменении громкости (из потока бэкенда). Громкость
+        перечитывается: если она равна записанной нами, это эхо собственной
+        записи и кэш остаётся. Иначе громкость изменена извне - последняя
+        запись забывается (шаги, совпавшие с ней, больше не пропускаются).
+        """
+        backend = self.backend
+        if backend is None:
+            return
+        try:
+            volume = self._clamp(backend.get_volume())
+        except Exception as e:
+            self.logger.debug(f"Не удалось перечитать громкость после события: {e}")
+            volume = None
+        with self._state:
+            if volume is not None and volume in (self._written, self._in_flight):
+                return
+            self._written = None
+            if self._pending is None and self._ramp is None and not self._writing:
+                if volume is None:
+                    self._cached = None
+                else:
+                    self._remember(volume)
+
+    def _cache_valid(self) -> bool:
+        if self._cached is None:
+            return False
+        return self.backend.notifies or time.monotonic() - self._cached_at < self.cache_ttl
 
     def _get_volume(self) -> int:
-        """Получение текущей громкости с обработкой ошибок"""
-        if not self.volume_interface:
-            return self._current_volume
+        """Получение текущей громкости (ещё не записанная громкость считается текущей)"""
+        if not self.backend:
+            return self.default_volume
 
+        with self._state:
+            if self._pending is not None:
+                return self._pending
+            if self._ramp is not None:
+                return self._ramp.target
+            if self._cache_valid():
+                return self._cached
         try:
-            vol = self.volume_interface.GetMasterVolumeLevelScalar()
-            return max(self.min_volume, min(self.max_volume, int(vol * 100)))
+            volume = self._clamp(self.backend.get_volume())
         except Exception as e:
             self.logger.error(f"Ошибка получения громкости: {e}")
-            return self._current_volume
+            return self._cached if self._cached is not None else self.default_volume
+        with self._state:
+            if self._pending is None and self._ramp is None and not self._writing:
+                self._remember(volume)
+        return volume
+
+    def _position(self, now: float) -> float:
+        """Громкость в данный момент (с учётом идущего плавного изменения)"""
+        if self._ramp is not None:
+            return self._ramp.value(now)
+        if self._pending is not None:
+            return self._pending
+        if self._written is not None:
+            return self._written
+        return self._cached if self._cached is not None else self.default_volume
 
-    def set_volume(self, percent: int, smooth: bool = False, duration: float = 1.0) -> bool:
+    def _remember(self, volume: int):
+        self._cached = volume
+        self._cached_at = time.monotonic()
+
+    def set_volume(self, percent: int, smooth: bool = False, duration: float = 1.0,
+                   easing: Optional[str] = None) -> bool:
         """
         Установка громкости с возможностью плавного изменения
-        
+
         :param percent: Уровень громкости (0-100)
         :param smooth: Плавное изменение
         :param duration: Длительность изменения в секундах
-        :return: Успешность операции
+        :param easing: Кривая изменения (см. EASINGS), по умолчанию audio.volume_easing
+        :return: Успешность операции (запись принята; дождаться её можно через flush)
         """
-        percent = max(self.min_volume, min(self.max_volume, percent))
-        
-        if not self.volume_interface:
+        percent = self._clamp(percent)
+
+        if not self.backend:
             self.logger.warning("Интерфейс громкости не инициализирован!")
             return False
 
-        # Остановка предыдущего плавного изменения
-        if self._smooth_thread and self._smooth_thread.is_alive():
-            self._smooth_thread.join(timeout=0.1)
-            
         if smooth and duration > 0:
-            # Запуск в отдельном потоке для неблокирующего выполнения
-            self._smooth_thread = Thread(
-                target=self._set_volume_smoothly,
-                args=(percent, duration),
-                daemon=True
-            )
-            self._smooth_thread.start()
-            return True
+            curve = EASINGS.get(easing or self.default_easing)
+            if curve is None:
+                self.logger.warning(f"Неизвестная кривая '{easing}', используется linear")
+                curve = EASINGS["linear"]
+            self._get_volume()  # Освежает кэш, если громкость ещё не известна
+            with self._state:
+                now = time.monotonic()
+                # Новая цель продолжает идущее изменение с текущей точки, без скачка
+                ramp = VolumeRamp(self._position(now), percent, now, duration, curve)
+                self._submit(ramp=ramp)
         else:
-            return self._set_volume_internal(percent)
-
-    def _set_volume_smoothly(self, target_volume: int, duration: float):
-        """Плавное изменение громкости"""
-        current_vol = self._get_volume()
-        steps = int(duration / 0.05)  # Шаги по 50мс
-        if steps < 1:
-            steps = 1
-            
-        step_value = (target_volume - current_vol) / steps
-        for i in range(steps):
-            new_vol = int(current_vol + step_value * (i + 1))
-            self._set_volume_internal(new_vol)
-            time.sleep(0.05)
-            
-        # Финализация точного значения
-        self._set_volume_internal(target_volume)
+            self._submit(percent=percent)
+        return True
+
+    def stop_ramp(self):
+        """Остановка плавного изменения на текущей громкости"""
+        with self._state:
+            if self._ramp is not None:
+                self._pending = self._clamp(round(self._ramp.value(time.monotonic())))
+                self._ramp = None
+                self._state.notify_all()
+
+    def _submit(self, percent: Optional[int] = None, ramp: Optional[VolumeRamp] = None):
+        """Новая цель для потока громкости: заменяет и ожидающее значение, и идущее изменение"""
+        with self._state:
+            if self._closed:
+                return
+            self._pending = percent
+            self._ramp = ramp
+            if self._writer is None:
+                self._writer = Thread(target=self._write_loop, name="volume-writer", daemon=True)
+                self._writer.start()
+            self._state.notify_all()
+
+    def _write_loop(self):
+        """Единственный поток, который пишет громкость в систему"""
+        while True:
+            with self._state:
+                while self._pending is None and self._ramp is None and not self._closed:
+                    self._state.wait()
+                if self._pending is None and self._ramp is None:
+                    return
+                # Не чаще min_write_interval: всё, что придёт за это время, уйдёт одной записью
+                delay = self._last_write_at + self.min_write_interval - time.monotonic()
+                if delay > 0 and not self._closed:
+                    self._state.wait(delay)
+                    continue  # Цель могла смениться, пока ждали
+                target = self._next_value(time.monotonic())
+                if target is None:
+                    continue
+                self._writing = True
+                self._in_flight = target
+
+            ok = self._set_volume_internal(target)
+
+            with self._state:
+                self._writing = False
+                self._in_flight = None
+                self._last_write_ok = ok
+                self._last_write_at = time.monotonic()
+                if ok:
+                    self._written = target
+                    self.writes += 1
+                elif self._pending is None and self._ramp is None:
+                    self._cached = None
+                self._state.notify_all()
+
+    def _next_value(self, now: float) -> Optional[int]:
+        """Следующее значение для записи (None - записывать нечего)"""
+        if self._ramp is not None:
+            target = self._clamp(round(self._ramp.value(now)))
+            if self._ramp.finished(now):
+                self._ramp = None
+        else:
+            target, self._pending = self._pending, None
+        # До первой записи сравниваем с прочитанной громкостью
+        known = self._written if self._written is not None else (self._cached if self._cache_valid() else None)
+        if target == known:
+            # Целый процент не изменился - запись ничего не даст
+            self.skipped_writes += 1
+            if self._ramp is not None:
+                self._last_write_at = now  # Следующий шаг изменения - через интервал
+            else:
+                self._state.notify_all()
+            return None
+        return target
+
+    def flush(self, timeout: Optional[float] = 2.0) -> bool:
+        """Ожидание записи всех изменений (и конца плавного); True, если последняя запись удалась"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._state:
+            while self._pending is not None or self._ramp is not None or self._writing:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._state.wait(remaining)
+            return self._last_write_ok
 
     def _set_volume_internal(self, percent: int) -> bool:
         """Внутренняя установка громкости без проверок"""
         try:
-            self.volume_interface.SetMasterVolumeLevelScalar(percent / 100.0, None)
-            self._current_volume = percent
+            self.backend.set_volume(percent)
+            with self._state:
+                self._remember(percent)
             self.logger.debug(f"Громкость установлена на {percent}%")
             return True
         except Exception as e:
@@ -145,12 +305,12 @@ class AudioController:
 
     def mute(self) -> Tuple[bool, Optional[int]]:
         """Отключить звук"""
-        if not self.volume_interface:
+        if not self.backend:
             return (False, None)
 
         try:
             self._prev_unmuted_volume = self._get_volume()
-            self.volume_interface.SetMute(1, None)
+            self.backend.set_mute(True)
             self.logger.info("Звук отключен")
             return (True, self._prev_unmuted_volume)
         except Exception as e:
@@ -159,11 +319,11 @@ class AudioController:
 
     def unmute(self, restore_volume: Optional[int] = None) -> bool:
         """Включить звук"""
-        if not self.volume_interface:
+        if not self.backend:
             return False
 
         try:
-            self.volume_interface.SetMute(0, None)
+            self.backend.set_mute(False)
             if restore_volume is not None:
                 self.set_volume(restore_volume)
             self.logger.info("Звук включен")
@@ -174,12 +334,11 @@ class AudioController:
 
     def toggle_mute(self) -> Tuple[bool, Optional[int]]:
         """Переключить режим 'Mute'"""
-        if not self.volume_interface:
+        if not self.backend:
             return (False, None)
 
         try:
-            is_muted = self.volume_interface.GetMute()
-            if is_muted:
+            if self.backend.get_mute():
                 success = self.unmute(self._prev_unmuted_volume)
                 return (success, None)
             else:
@@ -190,27 +349,44 @@ class AudioController:
 
     def get_current_volume(self) -> int:
         """Получить текущий уровень громкости"""
-        return self._current_volume
+        return self._get_volume()
+
+    def close(self):
+        """Запись оставшихся изменений и освобождение бэкенда"""
+        self.stop_ramp()
+        self.flush()
+        with self._state:
+            self._closed = True
+            self._state.notify_all()
+        if self._writer is not None:
+            self._writer.join(1.0)
+            self._writer = None
+        if self.backend:
+            try:
+                self.backend.close()
+            except Exception as e:
+                self.logger.error(f"Ошибка при завершении: {e}")
+            self.backend = None
 
     def __del__(self):
         """Корректное освобождение ресурсов"""
         try:
-            if self.volume_interface:
-                self.volume_interface.Release()
-            pythoncom.CoUninitialize()
-        except Exception as e:
-            self.logger.error(f"Ошибка при завершении: {e}")
+            if getattr(self, "backend", None):
+                self.backend.close()
+        except Exception:
+            pass
 
 if __name__ == "__main__":
     # Расширенное тестирование
     import logging
+    from core.volume_backends import FakeVolumeBackend
     logging.basicConfig(
         level=logging.DEBUG,
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
-    
+
     print("=== Расширенное тестирование AudioController ===")
-    
+
     # Тестовый конфиг
     test_config = {
         "audio": {
@@ -220,37 +396,48 @@ if __name__ == "__main__":
             "volume_step": 5
         }
     }
-    
-    controller = AudioController(test_config)
+
+    # --fake - без системной громкости, с подсчётом обращений
+    fake = FakeVolumeBackend(volume=50, latency=0.02) if "--fake" in sys.argv else None
+    controller = AudioController(test_config, backend=fake)
     print(f"\nТекущая громкость: {controller.get_current_volume()}%")
-    
+
     print("\nТест плавного увеличения громкости (2 секунды):")
     controller.set_volume(80, smooth=True, duration=2.0)
     time.sleep(2.5)
     print(f"Результат: {controller.get_current_volume()}%")
-    
+
     print("\nТест плавного уменьшения громкости (1.5 секунды):")
     controller.set_volume(30, smooth=True, duration=1.5)
     time.sleep(2)
     print(f"Результат: {controller.get_current_volume()}%")
-    
+
     print("\nТест увеличения громкости с шагом по умолчанию:")
     controller.volume_up()
     print(f"Результат: {controller.get_current_volume()}%")
-    
+
     print("\nТест уменьшения громкости с шагом по умолчанию:")
     controller.volume_down()
     print(f"Результат: {controller.get_current_volume()}%")
-    
+
+    print("\nТест склейки: 10 шагов подряд")
+    for _ in range(10):
+        controller.volume_up(1)
+    controller.flush()
+    print(f"Результат: {controller.get_current_volume()}%")
+    if fake:
+        print(f"Чтений: {fake.reads}, записей после шагов: {fake.writes[-3:]}")
+
     print("\nТест Mute/Unmute:")
     print("Отключаем звук...")
     success, prev_vol = controller.mute()
     print(f"Результат: {'Успешно' if success else 'Ошибка'}, Предыдущая громкость: {prev_vol}%")
-    
+
     time.sleep(1)
     print("Включаем звук...")
     success = controller.unmute(prev_vol)
     print(f"Результат: {'Успешно' if success else 'Ошибка'}")
     print(f"Текущая громкость: {controller.get_current_volume()}%")
-    
-    print("\nТест завершен!")
\ No newline at end of file
+    controller.close()
+
+    print("\nТест завершен!")
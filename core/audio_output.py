@@ -0,0 +1,230 @@
+import logging
+import threading
+import time
+import wave
+from typing import List, Optional
+
+import numpy as np
+
+from core.sound_cache import SoundClip
+
+def clip_to_float(clip: SoundClip, sample_rate: int, channels: int) -> np.ndarray:
+    """
+    Преобразование звука в float32 (кадры x каналы) нужного формата.
+    Частота меняется линейной интерполяцией, если отличается.
+    """
+    if clip.bytes_per_sample != 2:
+        raise ValueError(f"Поддерживается только 16-битный PCM ({clip.sound_id})")
+
+    samples = np.frombuffer(clip.data, dtype=np.int16).reshape(-1, clip.num_channels)
+    samples = samples.astype(np.float32) / 32768.0
+
+    if clip.sample_rate != sample_rate and len(samples):
+        frames = int(round(len(samples) * sample_rate / clip.sample_rate))
+        src = np.arange(len(samples), dtype=np.float64)
+        dst = np.linspace(0, len(samples) - 1, frames)
+        samples = np.stack([np.interp(dst, src, samples[:, c]) for c in range(clip.num_channels)], axis=1)
+        samples = samples.astype(np.float32)
+
+    if clip.num_channels != channels:
+        mono = samples.mean(axis=1, keepdims=True)
+        samples = np.repeat(mono, channels, axis=1)
+    return np.ascontiguousarray(samples)
+
+
+class Voice:
+    """Один звук, играющий в микшере"""
+    __slots__ = ("sound_id", "samples", "gain", "duck", "position", "done")
+
+    def __init__(self, sound_id: str, samples: np.ndarray, gain: float = 1.0, duck: bool = False):
+        self.sound_id = sound_id
+        self.samples = samples
+        self.gain = gain
+        self.duck = duck
+        self.position = 0
+        self.done = threading.Event()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Ожидание окончания звука без опроса"""
+        return self.done.wait(timeout)
+
+
+class Mixer:
+    def __init__(self, sample_rate: int = 44100, channels: int = 2, duck_level: float = 0.3):
+        """
+        Микшер для одного постоянно открытого выходного потока.
+
+        Звуки накладываются друг на друга, у каждого своя громкость.
+        Пока играет звук с duck=True, остальные приглушаются до duck_level.
+
+        :param sample_rate: Частота выходного потока
+        :param channels: Число каналов выходного потока
+        :param duck_level: Множитель громкости приглушаемых звуков
+        """
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.duck_level = duck_level
+        self._voices: List[Voice] = []
+        self._lock = threading.Lock()
+        self._active = threading.Condition(self._lock)
+
+    def play(self, sound_id: str, samples: np.ndarray, gain: float = 1.0, duck: bool = False) -> Voice:
+        """Добавление звука (samples уже в формате микшера)"""
+        voice = Voice(sound_id, samples, gain, duck)
+        with self._lock:
+            self._voices.append(voice)
+            self._active.notify_all()
+        return voice
+
+    def stop_all(self):
+        """Остановка всех звуков"""
+        with self._lock:
+            voices, self._voices = self._voices, []
+        for voice in voices:
+            voice.done.set()
+
+    def active(self) -> int:
+        """Сколько звуков сейчас играет"""
+        return len(self._voices)
+
+    def wait_active(self, timeout: float) -> bool:
+        """Ожидание появления звуков (для синтетических выходов)"""
+        with self._lock:
+            return self._active.wait_for(lambda: bool(self._voices), timeout)
+
+    def render(self, frames: int) -> np.ndarray:
+        """Смешивание следующего блока (вызывается из потока вывода)"""
+        out = np.zeros((frames, self.channels), dtype=np.float32)
+        with self._lock:
+            voices = list(self._voices)
+        if not voices:
+            return out
+
+        ducking = any(v.duck for v in voices)
+        finished = []
+        for voice in voices:
+            chunk = voice.samples[voice.position:voice.position + frames]
+            gain = voice.gain * (self.duck_level if ducking and not voice.duck else 1.0)
+            out[:len(chunk)] += chunk * gain
+            voice.position += len(chunk)
+            if voice.position >= len(voice.samples):
+                finished.append(voice)
+
+        if finished:
+            with self._lock:
+                self._voices = [v for v in self._voices if v not in finished]
+            for voice in finished:
+                voice.done.set()
+
+        np.clip(out, -1.0, 1.0, out=out)
+        return out
+
+
+class SoundDeviceSink:
+    """Реальный вывод: один выходной поток sounddevice на всё время работы"""
+
+    def __init__(self, device: Optional[int] = None, block_size: int = 512):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.device = device
+        self.block_size = block_size
+        self._stream = None
+
+    def start(self, mixer: Mixer):
+        # Импорт здесь: PortAudio нужен только при реальном выводе
+        import sounddevice as sd
+
+        def callback(outdata, frames, time_info, status):
+            outdata[:] = mixer.render(frames)
+
+        self._stream = sd.OutputStream(
+            samplerate=mixer.sample_rate,
+            channels=mixer.channels,
+            dtype="float32",
+            device=self.device,
+            blocksize=self.block_size,
+            callback=callback
+        )
+        self._stream.start()
+        self.logger.info(f"Выходной поток открыт ({mixer.sample_rate} Гц)")
+
+    def stop(self):
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+
+class NullSink:
+    """
+    Вывод «в никуда» для тестов без звуковой карты.
+    В режиме realtime блоки забираются с реальной скоростью воспроизведения.
+    """
+
+    def __init__(self, block_size: int = 512, realtime: bool = True):
+        self.block_size = block_size
+        self.realtime = realtime
+        self.frames_rendered = 0
+        self._running = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, mixer: Mixer):
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, args=(mixer,), name="audio-sink", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running.clear()
+        if self._thread:
+            self._thread.join(1.0)
+            self._thread = None
+
+    def _run(self, mixer: Mixer):
+        block_time = self.block_size / mixer.sample_rate
+        while self._running.is_set():
+            if not mixer.wait_active(0.1):
+                continue
+            self._consume(mixer.render(self.block_size))
+            self.frames_rendered += self.block_size
+            if self.realtime:
+                time.sleep(block_time)
+
+    def _consume(self, block: np.ndarray):
+        pass
+
+
+class FileSink(NullSink):
+    """Запись смешанного звука в WAV (только кадры, пока что-то играет)"""
+
+    def __init__(self, path: str, block_size: int = 512, realtime: bool = False):
+        super().__init__(block_size, realtime)
+        self.path = path
+        self._wav = None
+
+    def start(self, mixer: Mixer):
+        self._wav = wave.open(self.path, "wb")
+        self._wav.setnchannels(mixer.channels)
+        self._wav.setsampwidth(2)
+        self._wav.setframerate(mixer.sample_rate)
+        super().start(mixer)
+
+    def stop(self):
+        super().stop()
+        if self._wav:
+            self._wav.close()
+            self._wav = None
+
+    def _consume(self, block: np.ndarray):
+        self._wav.writeframes((block * 32767).astype(np.int16).tobytes())
+
+
+def create_sink(audio_cfg: dict):
+    """Выход микшера по config["audio"]["mixer_sink"]: sounddevice, null или file"""
+    name = audio_cfg.get("mixer_sink", "sounddevice")
+    block_size = audio_cfg.get("mixer_block", 512)
+    if name == "null":
+        return NullSink(block_size)
+    if name == "file":
+        return FileSink(audio_cfg.get("mixer_file", "mixer_output.wav"), block_size)
+    if name == "sounddevice":
+        return SoundDeviceSink(audio_cfg.get("output_device"), block_size)
+    raise ValueError(f"Неизвестный выход микшера: {name}")
@@ -0,0 +1,177 @@
+import logging
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import BinaryIO, Iterator, List, Optional
+
+import numpy as np
+
+from core.audio_capture import MicrophoneStream, RingBuffer
+from core.audio_output import clip_to_float
+from core.sound_cache import load_wav
+
+
+class ReplaySource:
+    def __init__(self, sample_rate: int, block_ms: int = 30, buffer_seconds: float = 10.0,
+                 realtime: bool = True, gap: float = 1.0, lead_in: float = 1.0):
+        """
+        Записанный звук вместо микрофона (тот же интерфейс, что у MicrophoneStream).
+
+        Отсчёты пишутся в RingBuffer из отдельного потока: в реальном
+        времени или так быстро, как их успевает разбирать читатель
+        (буфер с backpressure, поэтому ничего не теряется).
+
+        :param realtime: Темп реального времени (False - максимально быстро)
+        :param gap: Тишина между файлами и в конце записи (сек), завершает фразу
+        :param lead_in: Тишина в начале (сек), как перед первой фразой у микрофона
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.sample_rate = sample_rate
+        self.block_size = max(1, int(sample_rate * block_ms / 1000))
+        self.buffer = RingBuffer(int(sample_rate * buffer_seconds), backpressure=True)
+        self.realtime = realtime
+        self.gap = gap
+        self.lead_in = lead_in
+        self.overflows = 0
+        self.samples_fed = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def chunks(self) -> Iterator[np.ndarray]:
+        """Фрагменты звука: моно int16 с частотой self.sample_rate"""
+        raise NotImplementedError
+
+    def open(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="audio-replay", daemon=True)
+        self._thread.start()
+        pacing = "реальное время" if self.realtime else "максимальная скорость"
+        self.logger.info(f"Воспроизведение записи вместо микрофона ({self.sample_rate} Гц, {pacing})")
+
+    def _silence(self, seconds: float) -> np.ndarray:
+        return np.zeros(int(seconds * self.sample_rate), dtype=np.int16)
+
+    def _feed(self, samples: np.ndarray, started: float) -> bool:
+        for i in range(0, len(samples), self.block_size):
+            block = samples[i:i + self.block_size]
+            while not self.buffer.write(block, timeout=0.5):
+                if self._stop.is_set():
+                    return False
+            if self._stop.is_set():
+                return False
+            self.samples_fed += len(block)
+            if self.realtime:
+                delay = started + self.samples_fed / self.sample_rate - time.monotonic()
+                if delay > 0 and self._stop.wait(delay):
+                    return False
+        return True
+
+    def _run(self):
+        started = time.monotonic()
+        try:
+            if not self._feed(self._silence(self.lead_in), started):
+                return
+            for chunk in self.chunks():
+                if not self._feed(chunk, started):
+                    return
+            self._feed(self._silence(self.gap), started)
+        except Exception as e:
+            self.logger.error(f"Ошибка чтения записи: {e}")
+        finally:
+            self.buffer.close()
+            self.logger.info(f"Запись закончилась ({self.samples_fed / self.sample_rate:.1f} с звука)")
+
+    def close(self):
+        self._stop.set()
+        self.buffer.close()
+        if self._thread is not None:
+            self._thread.join(2.0)
+            self._thread = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._thread is not None
+
+
+class WavFileSource(ReplaySource):
+    def __init__(self, path: str, sample_rate: int, **kwargs):
+        """
+        WAV-файл или папка с WAV (по алфавиту, с подпапками).
+        Каждый файл - одна фраза; между файлами вставляется тишина gap.
+        """
+        super().__init__(sample_rate, **kwargs)
+        root = Path(path)
+        self.files: List[Path] = sorted(root.rglob("*.wav")) if root.is_dir() else [root]
+        if not self.files:
+            raise FileNotFoundError(f"Нет WAV-файлов: {root}")
+        self.current: Optional[Path] = None
+
+    def chunks(self) -> Iterator[np.ndarray]:
+        for i, file in enumerate(self.files):
+            if i:
+                yield self._silence(self.gap)
+            self.current = file
+            self.logger.debug(f"Файл: {file}")
+            samples = clip_to_float(load_wav(file.stem, file), self.sample_rate, 1)[:, 0]
+            yield (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+
+
+class PcmStreamSource(ReplaySource):
+    def __init__(self, stream: Optional[BinaryIO], sample_rate: int,
+                 input_rate: Optional[int] = None, **kwargs):
+        """
+        Сырой PCM (s16le, моно) из потока, по умолчанию stdin:
+        arecord -f S16_LE -r 16000 -c 1 | python main.py --stdin --rate 16000
+
+        :param input_rate: Частота входных данных (None - как sample_rate)
+        """
+        super().__init__(sample_rate, **kwargs)
+        self.stream = stream or sys.stdin.buffer
+        self.input_rate = input_rate or sample_rate
+
+    def chunks(self) -> Iterator[np.ndarray]:
+        chunk_bytes = self.input_rate // 10 * 2  # По 100 мс
+        tail = b""
+        while True:
+            data = self.stream.read(chunk_bytes)
+            if not data:
+                break
+            data = tail + data
+            usable = len(data) - len(data) % 2
+            data, tail = data[:usable], data[usable:]
+            samples = np.frombuffer(data, dtype="<i2")
+            if self.input_rate != self.sample_rate and len(samples):
+                count = int(round(len(samples) * self.sample_rate / self.input_rate))
+                positions = np.linspace(0, len(samples) - 1, count)
+                samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.int16)
+            yield samples.astype(np.int16, copy=False)
+
+
+def create_source(config: dict):
+    """
+    Источник звука по config["microphone"]["source"]:
+    microphone (по умолчанию), file (source_path - WAV или папка) или stdin.
+    """
+    mic_cfg = config["microphone"]
+    sample_rate = config["audio"].get("sample_rate", 44100)
+    common = dict(
+        block_ms=mic_cfg.get("block_ms", 30),
+        buffer_seconds=mic_cfg.get("buffer_seconds", 10.0)
+    )
+    kind = mic_cfg.get("source", "microphone")
+    if kind == "microphone":
+        return MicrophoneStream(sample_rate=sample_rate, device=mic_cfg.get("device_index"), **common)
+
+    replay = dict(
+        common,
+        realtime=mic_cfg.get("source_realtime", True),
+        gap=mic_cfg.get("source_gap", 1.0),
+        lead_in=mic_cfg.get("source_lead_in", 1.0)
+    )
+    if kind == "file":
+        return WavFileSource(mic_cfg["source_path"], sample_rate, **replay)
+    if kind == "stdin":
+        return PcmStreamSource(None, sample_rate, input_rate=mic_cfg.get("source_rate"), **replay)
+    raise ValueError(f"Неизвестный источник звука: {kind}")
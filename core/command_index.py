@@ -0,0 +1,246 @@
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.fuzzy_matcher import FuzzyMatcher
+
+_NORMALIZE_RE = re.compile(r"[^\w\s]+")
+_PLACEHOLDER_RE = re.compile(r"\$(\d+)")
+# Экранированный обратный слеш пропускается, остальное - ссылки на группы
+_BACKREF_RE = re.compile(r"\\\\|\\[1-9]|\(\?P=|\(\?\(")
+# Совпадение только целыми словами: "громкость на 5000" не даёт уровень 500
+_WORD_START = r"(?<!\S)"
+_WORD_END = r"(?!\S)"
+
+
+def normalize_text(text: str) -> str:
+    """Приведение фразы к виду, в котором хранятся команды"""
+    text = _NORMALIZE_RE.sub(" ", text.lower().replace("ё", "е"))
+    return " ".join(text.split())
+
+
+@dataclass
+class CommandEntry:
+    """Скомпилированная запись одной команды из commands.json"""
+    category: str
+    phrase: str
+    spec: Dict[str, Any]
+    pattern: Optional[re.Pattern] = None  # Только для regex-команд
+
+    @property
+    def is_regex(self) -> bool:
+        return self.pattern is not None
+
+
+@dataclass
+class CommandMatch:
+    """Результат сопоставления фразы с командой"""
+    entry: CommandEntry
+    groups: Tuple[str, ...] = ()
+    score: float = 1.0
+    params: Dict[str, Any] = field(default_factory=dict)
+    response: Optional[str] = None
+
+    @property
+    def action(self) -> Optional[str]:
+        return self.entry.spec.get("action")
+
+
+class _TrieNode:
+    __slots__ = ("children", "entry")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.entry: Optional[CommandEntry] = None
+
+
+def substitute(value: Any, groups: Tuple[str, ...]) -> Any:
+    """Подстановка $1, $2... из групп совпадения (рекурсивно для dict/list)"""
+    if isinstance(value, str):
+        if not groups or "$" not in value:
+            return value
+
+        def _group(m: re.Match) -> str:
+            idx = int(m.group(1)) - 1
+            return groups[idx] if 0 <= idx < len(groups) and groups[idx] is not None else m.group(0)
+
+        return _PLACEHOLDER_RE.sub(_group, value)
+    if isinstance(value, dict):
+        return {k: substitute(v, groups) for k, v in value.items()}
+    if isinstance(value, list):
+        return [substitute(v, groups) for v in value]
+    return value
+
+
+class CommandIndex:
+    def __init__(self, voice_commands: Dict[str, Dict[str, Any]], fuzzy_threshold: Optional[float] = None,
+                 previous: Optional["CommandIndex"] = None):
+        """
+        Индекс команд, собираемый один раз при загрузке.
+
+        Обычные фразы хранятся в префиксном дереве по словам, все regex-команды
+        объединены в одно скомпилированное выражение с именованными группами,
+        поэтому стоимость поиска не зависит от количества команд.
+
+        :param voice_commands: Раздел voice_commands из commands.json
+        :param fuzzy_threshold: Порог нечёткого поиска (None - отключён)
+        :param previous: Прежний индекс: его неизменённые категории не компилируются заново
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.fuzzy_threshold = fuzzy_threshold
+        self.errors: List[str] = []
+        self.changed: List[str] = []  # Категории, отличающиеся от previous
+        self._sources: Dict[str, Any] = {}
+        self._categories: Dict[str, List[CommandEntry]] = {}
+        for category, commands in voice_commands.items():
+            self._sources[category] = commands
+            if previous is not None and previous._sources.get(category) == commands:
+                self._categories[category] = previous._categories[category]
+                continue
+            self._categories[category] = self._compile_category(category, commands)
+            self.changed.append(category)
+        if previous is not None:
+            self.changed.extend(c for c in previous._sources if c not in self._sources)
+        self._build()
+
+    def _error(self, message: str):
+        self.logger.error(message)
+        self.errors.append(message)
+
+    def _compile_category(self, category: str, commands: Dict[str, Any]) -> List[CommandEntry]:
+        """Проверка и компиляция команд одной категории"""
+        entries = []
+        if not isinstance(commands, dict):
+            self._error(f"Категория '{category}' должна быть объектом")
+            return entries
+
+        for phrase, spec in commands.items():
+            if not isinstance(spec, dict) or "action" not in spec:
+                self._error(f"Команда '{phrase}': отсутствует action")
+                continue
+
+            if spec.get("regex"):
+                try:
+                    pattern = re.compile(phrase.lower().replace("ё", "е"))
+                except re.error as e:
+                    self._error(f"Команда '{phrase}': некорректное выражение ({e})")
+                    continue
+                if pattern.groupindex:
+                    self._error(f"Команда '{phrase}': именованные группы не поддерживаются, используйте $1")
+                    continue
+                if any(m.group(0) != "\\\\" for m in _BACKREF_RE.finditer(pattern.pattern)):
+                    # В общем выражении номера групп сдвигаются
+                    self._error(f"Команда '{phrase}': ссылки на группы не поддерживаются")
+                    continue
+                entries.append(CommandEntry(category, phrase, spec, pattern))
+            else:
+                entries.append(CommandEntry(category, normalize_text(phrase), spec))
+
+        return entries
+
+    def _build(self):
+        """Сборка общего дерева фраз и объединённого регулярного выражения"""
+        self._root = _TrieNode()
+        self._regex_entries: Dict[str, Tuple[CommandEntry, int, int]] = {}
+        self._regex_fallback: List[Tuple[CommandEntry, re.Pattern]] = []
+        alternatives = []
+
+        for entries in self._categories.values():
+            for entry in entries:
+                if entry.is_regex:
+                    name = f"c{len(alternatives)}"
+                    alternative = f"(?P<{name}>{entry.pattern.pattern})"
+                    try:
+                        # Отдельно выражение компилируется, а внутри группы может нет (например, (?i) не в начале)
+                        re.compile(alternative)
+                    except re.error as e:
+                        self._error(f"Команда '{entry.phrase}': не объединяется с остальными ({e})")
+                        continue
+                    alternatives.append(alternative)
+                    self._regex_entries[name] = (entry, 0, entry.pattern.groups)
+                    continue
+
+                node = self._root
+                for token in entry.phrase.split():
+                    node = node.children.setdefault(token, _TrieNode())
+                if node.entry is not None:
+                    self.logger.warning(f"Дублирующаяся команда '{entry.phrase}' в категории '{entry.category}'")
+                node.entry = entry
+
+        self._regex = None
+        if alternatives:
+            try:
+                self._regex = re.compile(f"{_WORD_START}(?:{'|'.join(alternatives)}){_WORD_END}")
+            except re.error as e:
+                # Запасной путь: выражения проверяются по одному, в порядке объявления
+                self.logger.warning(f"Не удалось объединить regex-команды ({e}), проверка по одной")
+                self._regex_fallback = [
+                    (entry, re.compile(f"{_WORD_START}(?:{entry.pattern.pattern}){_WORD_END}"))
+                    for entry, _, _ in self._regex_entries.values()
+                ]
+        if self._regex:
+            # Номер группы-обёртки: группы самой команды идут сразу за ней
+            for name, (entry, _, count) in self._regex_entries.items():
+                self._regex_entries[name] = (entry, self._regex.groupindex[name], count)
+
+        self._fuzzy = None
+        if self.fuzzy_threshold is not None:
+            self._fuzzy = FuzzyMatcher(self.entries(), threshold=self.fuzzy_threshold)
+
+    def match(self, text: str) -> Optional[CommandMatch]:
+        """Поиск команды в фразе. Возвращает None, если ничего не подошло"""
+        normalized = normalize_text(text)
+        if not normalized:
+            return None
+
+        entry = self._match_literal(normalized.split())
+        if entry:
+            return self._make_match(entry)
+
+        if self._regex:
+            m = self._regex.search(normalized)
+            if m:
+                entry, index, count = self._regex_entries[m.lastgroup]
+                groups = tuple(m.group(index + i) for i in range(1, count + 1))
+                return self._make_match(entry, groups)
+        for entry, pattern in self._regex_fallback:
+            m = pattern.search(normalized)
+            if m:
+                return self._make_match(entry, m.groups())
+
+        if self._fuzzy:
+            found = self._fuzzy.match(normalized)
+            if found:
+                return self._make_match(*found)
+
+        return None
+
+    def _match_literal(self, tokens: List[str]) -> Optional[CommandEntry]:
+        """Самая длинная фраза из дерева, встречающаяся в словах запроса"""
+        best, best_len = None, 0
+        for start in range(len(tokens)):
+            node = self._root
+            for pos in range(start, len(tokens)):
+                node = node.children.get(tokens[pos])
+                if node is None:
+                    break
+                if node.entry is not None and pos - start + 1 > best_len:
+                    best, best_len = node.entry, pos - start + 1
+        return best
+
+    def _make_match(self, entry: CommandEntry, groups: Tuple[str, ...] = (), score: float = 1.0) -> CommandMatch:
+        return CommandMatch(
+            entry=entry,
+            groups=groups,
+            score=score,
+            params=substitute(entry.spec.get("params", {}), groups),
+            response=substitute(entry.spec.get("response"), groups)
+        )
+
+    def entries(self) -> List[CommandEntry]:
+        """Все скомпилированные команды"""
+        return [entry for entries in self._categories.values() for entry in entries]
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._categories.values())
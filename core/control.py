@@ -0,0 +1,251 @@
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# Максимальный размер одного запроса (строка JSON)
+_MAX_REQUEST = 64 * 1024
+
+
+class ControlError(Exception):
+    """Ошибка управляющего запроса (возвращается клиенту как error)"""
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Соединение клиента: запросы и ответы - по одной строке JSON"""
+
+    def handle(self):
+        server: "_UnixServer" = self.server
+        while True:
+            line = self.rfile.readline(_MAX_REQUEST + 1)
+            if not line:
+                return
+            if len(line) > _MAX_REQUEST:
+                self._send({"ok": False, "error": "Слишком длинный запрос"})
+                return
+            if not line.strip():
+                continue
+            self._send(server.control.handle(line))
+
+    def _send(self, response: Dict[str, Any]):
+        self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+        self.wfile.flush()
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    control: "ControlServer"
+
+
+class ControlServer:
+    def __init__(self, assistant, socket_path: str):
+        """
+        Управление запущенным ассистентом через Unix-сокет.
+
+        Запрос - строка JSON {"op": ..., "id": ...}, ответ - строка JSON
+        {"id": ..., "ok": true/false, "result"/"error": ...}. Клиенты
+        обслуживаются параллельно, команды выполняются тем же
+        Assistant.run_action, что и голосовые.
+
+        Операции:
+            ping                         - проверка связи
+            status                       - режим, громкость, число команд
+            modes                        - список режимов
+            action {action, params}      - действие из commands.json (set_volume, ...)
+            say {text}                   - фраза как после триггерного слова
+
+        :param assistant: Готовый Assistant
+        :param socket_path: Путь к сокету (права 0600 - только текущий пользователь)
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.assistant = assistant
+        self.socket_path = socket_path
+        self.requests = 0
+        self._server: Optional[_UnixServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ops = {
+            "ping": self._ping,
+            "status": self._status,
+            "modes": self._modes,
+            "action": self._action,
+            "say": self._say
+        }
+
+    def start(self):
+        if self._server is not None:
+            return
+        self._remove_stale_socket()
+        os.makedirs(os.path.dirname(self.socket_path) or ".", exist_ok=True)
+        old_umask = os.umask(0o177)
+        try:
+            self._server = _UnixServer(self.socket_path, _Handler)
+        finally:
+            os.umask(old_umask)
+        self._server.control = self
+        self._thread = threading.Thread(target=self._server.serve_forever, name="control-server", daemon=True)
+        self._thread.start()
+        self.logger.info(f"Управляющий сокет: {self.socket_path}")
+
+    def _remove_stale_socket(self):
+        """Сокет от упавшего процесса удаляется, от работающего - ошибка"""
+        if not os.path.exists(self.socket_path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except OSError:
+            os.unlink(self.socket_path)
+            return
+        finally:
+            probe.close()
+        raise RuntimeError(f"Ассистент уже запущен (сокет {self.socket_path})")
+
+    def stop(self):
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        if self._thread is not None:
+            self._thread.join(2.0)
+            self._thread = None
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+    def handle(self, line: bytes) -> Dict[str, Any]:
+        """Разбор и выполнение одного запроса"""
+        request_id = None
+        started = time.perf_counter()
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ControlError("Запрос должен быть объектом JSON")
+            request_id = request.get("id")
+            op = self._ops.get(request.get("op"))
+            if op is None:
+                raise ControlError(f"Неизвестная операция: {request.get('op')}")
+            self.requests += 1
+            response = {"ok": True, "result": op(request)}
+        except (ControlError, ValueError, KeyError, TypeError) as e:
+            response = {"ok": False, "error": str(e)}
+        except Exception as e:
+            self.logger.error(f"Ошибка управляющего запроса: {e}")
+            response = {"ok": False, "error": str(e)}
+        response["id"] = request_id
+        response["ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return response
+
+    def _ping(self, request: Dict) -> str:
+        return "pong"
+
+    def _status(self, request: Dict) -> Dict[str, Any]:
+        assistant = self.assistant
+        return {
+            "mode": assistant.modes.current_mode,
+            "volume": assistant.audio.get_current_volume(),
+            "commands": len(assistant.command_index),
+            "requests": self.requests,
+            "speculation": assistant.speculation.stats() if assistant.speculation else None
+        }
+
+    def _modes(self, request: Dict) -> List[str]:
+        return self.assistant.modes.get_available_modes()
+
+    def _action(self, request: Dict) -> bool:
+        params = request.get("params") or {}
+        if not isinstance(params, dict):
+            raise ControlError("params должен быть объектом")
+        return self.assistant.run_action(request["action"], params)
+
+    def _say(self, request: Dict) -> bool:
+        return self.assistant.process_command(str(request["text"]))
+
+
+def send_request(socket_path: str, request: Dict[str, Any], timeout: float = 30.0) -> Dict[str, Any]:
+    """Один запрос к запущенному ассистенту (ConnectionError, если он не запущен)"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        try:
+            sock.connect(socket_path)
+        except (FileNotFoundError, ConnectionRefusedError) as e:
+            raise ConnectionError(f"Ассистент не запущен ({socket_path})") from e
+        sock.sendall(json.dumps(request, ensure_ascii=False).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as reader:
+            line = reader.readline()
+    if not line:
+        raise ConnectionError("Ассистент закрыл соединение без ответа")
+    return json.loads(line)
+
+
+def resolve_cli_command(cli_commands: Dict[str, Any], args: List[str]) -> Dict[str, Any]:
+    """
+    Запрос action по разделу cli_commands из commands.json:
+    ["volume", "set", "50"] -> {"op": "action", "action": "set_volume", "params": {"level": "50"}}.
+    Аргументы после имени действия подставляются вместо $1, $2, ...
+    """
+    if len(args) < 2:
+        raise ControlError("Нужны группа и действие, например: volume set 50")
+    group, name, values = args[0], args[1], args[2:]
+    actions = cli_commands.get(group, {}).get("actions", {})
+    if name not in actions:
+        known = ", ".join(f"{g} {a}" for g, spec in cli_commands.items() for a in spec.get("actions", {}))
+        raise ControlError(f"Неизвестная команда '{group} {name}'. Доступны: {known}")
+
+    spec = actions[name]
+    params = {}
+    for key, value in spec.get("args", {}).items():
+        if isinstance(value, str) and value.startswith("$") and value[1:].isdigit():
+            index = int(value[1:]) - 1
+            if index >= len(values):
+                raise ControlError(f"'{group} {name}': не хватает аргумента {value}")
+            value = values[index]
+        params[key] = value
+    return {"op": "action", "action": spec["call"], "params": params}
+
+
+# Тест
+if __name__ == "__main__":
+    import tempfile
+
+    class _FakeAssistant:
+        """Достаточно для проверки протокола без звука и микрофона"""
+        class modes:
+            current_mode = None
+
+            @staticmethod
+            def get_available_modes():
+                return ["игровой", "рабочий"]
+
+        def run_action(self, action, params):
+            time.sleep(0.05)
+            return action == "set_volume"
+
+    logging.basicConfig(level=logging.INFO)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sayori.sock")
+        server = ControlServer(_FakeAssistant(), path)
+        server.start()
+
+        print(send_request(path, {"op": "ping", "id": 1}))
+        cli = {"volume": {"actions": {"set": {"call": "set_volume", "args": {"level": "$1"}}}}}
+        print(send_request(path, resolve_cli_command(cli, ["volume", "set", "40"])))
+        print(send_request(path, {"op": "nope"}))
+
+        # Параллельные клиенты: 8 запросов по 50 мс должны уложиться примерно в 50 мс
+        started = time.perf_counter()
+        threads = [
+            threading.Thread(target=send_request, args=(path, {"op": "action", "action": "set_volume"}))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        print(f"8 клиентов: {(time.perf_counter() - started) * 1000:.0f} мс")
+        server.stop()
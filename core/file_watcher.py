@@ -0,0 +1,184 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+# Константы inotify из <sys/inotify.h>
+_IN_MODIFY = 0x002
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT = struct.Struct("iIII")
+
+
+class _Inotify:
+    """Минимальная обёртка над inotify через ctypes (только Linux)"""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        self._dirs: Dict[int, Path] = {}
+
+    def add_directory(self, path: Path):
+        wd = self._add_watch(self.fd, os.fsencode(str(path)), _WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch {path}")
+        self._dirs[wd] = path
+
+    def read(self, timeout: float) -> List[Path]:
+        """Пути изменённых файлов (пустой список по таймауту)"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        paths, offset = [], 0
+        while offset + _EVENT.size <= len(data):
+            wd, _, _, length = _EVENT.unpack_from(data, offset)
+            name = data[offset + _EVENT.size:offset + _EVENT.size + length].split(b"\0", 1)[0]
+            offset += _EVENT.size + length
+            if wd in self._dirs and name:
+                paths.append(self._dirs[wd] / os.fsdecode(name))
+        return paths
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FileWatcher:
+    def __init__(self, poll_interval: float = 1.0, debounce: float = 0.2, use_inotify: bool = True):
+        """
+        Слежение за изменением файлов.
+
+        На Linux используется inotify (наблюдаются папки, поэтому замена
+        файла через переименование тоже замечается), иначе - опрос времени
+        изменения и размера раз в poll_interval секунд. Серия событий от
+        одного сохранения склеивается за debounce секунд.
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.use_inotify = use_inotify and sys.platform.startswith("linux")
+        self._callbacks: Dict[Path, List[Callable[[], None]]] = {}
+        self._stamps: Dict[Path, Optional[Tuple[int, int]]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._inotify: Optional[_Inotify] = None
+
+    def watch(self, path: str, callback: Callable[[], None]):
+        """Вызов callback (в потоке наблюдателя) после изменения файла"""
+        resolved = Path(path).resolve()
+        self._callbacks.setdefault(resolved, []).append(callback)
+        self._stamps[resolved] = self._stamp(resolved)
+
+    @staticmethod
+    def _stamp(path: Path) -> Optional[Tuple[int, int]]:
+        try:
+            stat = path.stat()
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def start(self):
+        if self._thread is not None or not self._callbacks:
+            return
+        if self.use_inotify:
+            try:
+                self._inotify = _Inotify()
+                for directory in {path.parent for path in self._callbacks}:
+                    self._inotify.add_directory(directory)
+            except (OSError, AttributeError) as e:
+                self.logger.warning(f"inotify недоступен, используется опрос файлов: {e}")
+                if self._inotify:
+                    self._inotify.close()
+                self._inotify = None
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="file-watcher", daemon=True)
+        self._thread.start()
+        self.logger.info(f"Слежение за файлами: {len(self._callbacks)} ({'inotify' if self._inotify else 'опрос'})")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(max(self.poll_interval, 1.0) + 1.0)
+            self._thread = None
+        if self._inotify:
+            self._inotify.close()
+            self._inotify = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                touched = self._wait_changes()
+                if touched and self.debounce > 0 and not self._stop.wait(self.debounce):
+                    # Дочитываем события, пришедшие за время склейки
+                    touched |= self._drain()
+                self._notify(touched)
+            except Exception as e:
+                self.logger.error(f"Ошибка слежения за файлами: {e}")
+                self._stop.wait(self.poll_interval)
+
+    def _wait_changes(self) -> Set[Path]:
+        if self._inotify:
+            return {p for p in self._inotify.read(self.poll_interval) if p in self._callbacks}
+        self._stop.wait(self.poll_interval)
+        return set(self._callbacks)
+
+    def _drain(self) -> Set[Path]:
+        if not self._inotify:
+            return set()
+        return {p for p in self._inotify.read(0) if p in self._callbacks}
+
+    def _notify(self, candidates: Set[Path]):
+        # Сравнение отметок отсекает лишние события (touch без изменений и т.п.)
+        for path in candidates:
+            stamp = self._stamp(path)
+            if stamp is None or stamp == self._stamps.get(path):
+                continue
+            self._stamps[path] = stamp
+            self.logger.info(f"Файл изменён: {path.name}")
+            for callback in self._callbacks[path]:
+                try:
+                    callback()
+                except Exception as e:
+                    self.logger.error(f"Ошибка обработки изменения {path.name}: {e}")
+
+
+# Тест
+if __name__ == "__main__":
+    import tempfile
+
+    logging.basicConfig(level=logging.INFO)
+    with tempfile.TemporaryDirectory() as tmp:
+        target = Path(tmp) / "commands.json"
+        target.write_text("{}")
+        changed = threading.Event()
+
+        watcher = FileWatcher(poll_interval=0.5)
+        watcher.watch(str(target), changed.set)
+        watcher.start()
+
+        started = time.perf_counter()
+        replacement = Path(tmp) / "commands.json.tmp"
+        replacement.write_text('{"voice_commands": {}}')
+        os.replace(replacement, target)  # Как сохраняют многие редакторы
+        print("Изменение замечено:", changed.wait(3), f"за {(time.perf_counter() - started) * 1000:.0f} мс")
+        watcher.stop()
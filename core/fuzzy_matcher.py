@@ -0,0 +1,198 @@
+import heapq
+import re
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from itertools import chain
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from core.command_index import CommandEntry
+
+SLOT = "#"  # Токен-заполнитель вместо групп regex-команды
+_REGEX_SYNTAX_RE = re.compile(r"\{\d*,?\d*\}|\\[a-zA-Z]|[\\^$*+?{}\[\]|.()]")
+
+
+def _trigrams(text: str) -> List[str]:
+    padded = f"  {text} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def bounded_levenshtein(a: str, b: str, max_dist: int) -> int:
+    """
+    Расстояние Левенштейна с отсечкой: возвращает max_dist + 1,
+    если строки отличаются сильнее.
+
+    Считается бит-параллельным алгоритмом Майерса (по одной итерации
+    на символ b), поэтому стоимость почти не зависит от max_dist.
+    """
+    if abs(len(a) - len(b)) > max_dist:
+        return max_dist + 1
+    if not a or not b:
+        return min(max(len(a), len(b)), max_dist + 1)
+
+    peq: Dict[str, int] = {}
+    for i, ch in enumerate(a):
+        peq[ch] = peq.get(ch, 0) | (1 << i)
+
+    full = (1 << len(a)) - 1
+    last = 1 << (len(a) - 1)
+    pv, mv, score = full, 0, len(a)
+    remaining = len(b)
+    for ch in b:
+        eq = peq.get(ch, 0)
+        xv = eq | mv
+        xh = ((((eq & pv) + pv) & full) ^ pv) | eq
+        ph = (mv | ~(xh | pv)) & full
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        remaining -= 1
+        # Каждый оставшийся символ уменьшает расстояние не больше чем на 1
+        if score - remaining > max_dist:
+            return max_dist + 1
+        ph = ((ph << 1) | 1) & full
+        mh = (mh << 1) & full
+        pv = (mh | ~(xv | ph)) & full
+        mv = ph & xv
+    return min(score, max_dist + 1)
+
+
+def split_pattern(pattern: str) -> Tuple[str, List[re.Pattern]]:
+    """
+    Разбор regex-команды на текстовый «скелет» и шаблоны её групп.
+    "громкость на (\\d{1,3})" -> ("громкость на #", [re.compile("\\d{1,3}")])
+    """
+    skeleton, slots = [], []
+    literal, i, n = [], 0, len(pattern)
+    while i < n:
+        ch = pattern[i]
+        if ch == "\\" and i + 1 < n:
+            literal.append(pattern[i:i + 2])
+            i += 2
+            continue
+        if ch == "(" and not pattern.startswith("(?", i):
+            depth, j = 1, i + 1
+            while j < n and depth:
+                if pattern[j] == "\\":
+                    j += 1
+                elif pattern[j] == "(":
+                    depth += 1
+                elif pattern[j] == ")":
+                    depth -= 1
+                j += 1
+            skeleton.append(_REGEX_SYNTAX_RE.sub(" ", "".join(literal)))
+            skeleton.append(f" {SLOT} ")
+            slots.append(re.compile(pattern[i + 1:j - 1]))
+            literal, i = [], j
+            continue
+        literal.append(ch)
+        i += 1
+    skeleton.append(_REGEX_SYNTAX_RE.sub(" ", "".join(literal)))
+    return " ".join("".join(skeleton).split()), slots
+
+
+@dataclass
+class _FuzzyPhrase:
+    entry: "CommandEntry"
+    text: str
+    slots: List[re.Pattern]
+
+
+class FuzzyMatcher:
+    def __init__(self, entries: Sequence["CommandEntry"], threshold: float = 0.75, candidates: int = 4):
+        """
+        Нечёткий поиск команд для фраз, которые распознаватель услышал с ошибкой.
+
+        Кандидаты отбираются по инвертированному индексу символьных триграмм,
+        затем несколько лучших переранжируются расстоянием Левенштейна с отсечкой.
+
+        :param entries: Скомпилированные команды из CommandIndex
+        :param threshold: Минимальная уверенность (0..1) для принятия совпадения
+        :param candidates: Сколько кандидатов проверять расстоянием Левенштейна
+        """
+        self.threshold = threshold
+        self.candidates = max(1, candidates)
+        self._phrases: List[_FuzzyPhrase] = []
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        self._gram_counts: List[int] = []
+
+        for entry in entries:
+            if entry.is_regex:
+                text, slots = split_pattern(entry.pattern.pattern)
+            else:
+                text, slots = entry.phrase, []
+            if not text:
+                continue
+            grams = set(_trigrams(text))
+            idx = len(self._phrases)
+            self._phrases.append(_FuzzyPhrase(entry, text, slots))
+            self._gram_counts.append(len(grams))
+            for gram in grams:
+                self._postings[gram].append(idx)
+
+        self._common_limit = max(64, len(self._phrases) // 8)
+
+    def match(self, normalized: str) -> Optional[Tuple["CommandEntry", Tuple[str, ...], float]]:
+        """
+        Лучшая команда для фразы.
+
+        :param normalized: Фраза после normalize_text
+        :return: (команда, значения групп, уверенность) или None
+        """
+        if not normalized or not self._phrases:
+            return None
+
+        # Числа и прочие значения параметров сравниваются как заполнитель
+        tokens = normalized.split()
+        generic = " ".join(SLOT if any(c.isdigit() for c in t) else t for t in tokens)
+
+        query_grams = set(_trigrams(generic))
+        postings = self._postings
+        lists = [postings[g] for g in query_grams if g in postings]
+        # Слишком частые триграммы почти не различают команды, но дороже всего
+        rare = [p for p in lists if len(p) <= self._common_limit]
+        counts = Counter(chain.from_iterable(rare or lists))
+        if not counts:
+            return None
+
+        # Грубый отбор по числу общих триграмм, затем коэффициент Дайса
+        q_len, gram_counts = len(query_grams), self._gram_counts
+        ranked = heapq.nlargest(
+            self.candidates,
+            counts.most_common(self.candidates * 4),
+            key=lambda item: item[1] / (q_len + gram_counts[item[0]])
+        )
+
+        best = None
+        for idx, _ in ranked:
+            phrase = self._phrases[idx]
+            groups = self._fill_slots(phrase, tokens)
+            if groups is None:
+                continue
+            query = generic if phrase.slots else normalized
+            longest = max(len(query), len(phrase.text))
+            max_dist = int((1.0 - self.threshold) * longest)
+            dist = bounded_levenshtein(query, phrase.text, max_dist)
+            if dist > max_dist:
+                continue
+            score = 1.0 - dist / longest
+            if best is None or score > best[2]:
+                best = (phrase.entry, groups, score)
+        return best
+
+    @staticmethod
+    def _fill_slots(phrase: _FuzzyPhrase, tokens: List[str]) -> Optional[Tuple[str, ...]]:
+        """Значения групп regex-команды из слов фразы (по порядку)"""
+        if not phrase.slots:
+            return ()
+        groups, pos = [], 0
+        for slot in phrase.slots:
+            while pos < len(tokens) and not slot.fullmatch(tokens[pos]):
+                pos += 1
+            if pos == len(tokens):
+                return None
+            groups.append(tokens[pos])
+            pos += 1
+        return tuple(groups)
@@ -0,0 +1,229 @@
+import atexit
+import copy
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import time
+from pathlib import Path
+from typing import Optional
+
+from core.tracing import tracer
+
+_TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+
+class UtteranceFilter(logging.Filter):
+    """
+    Номер фразы (из Tracer.bind) в каждой записи лога. Выполняется в потоке,
+    который пишет в лог, до передачи записи в очередь.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.utterance = tracer.current_utterance()
+        return True
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Одна запись - одна строка JSON (для разбора логов программами)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "msg": record.getMessage()
+        }
+        utterance = getattr(record, "utterance", None)
+        if utterance is not None:
+            entry["utterance"] = utterance
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class RotatingLogHandler(logging.handlers.TimedRotatingFileHandler):
+    def __init__(self, path: str, max_bytes: int = 5 * 1024 * 1024, when: str = "midnight",
+                 backup_count: int = 7, compress: bool = True):
+        """
+        Файл лога с ротацией по размеру и по времени (что наступит раньше).
+
+        :param max_bytes: Размер, после которого файл ротируется (0 - без ограничения)
+        :param when: Период ротации, как у TimedRotatingFileHandler
+        :param backup_count: Сколько старых файлов хранить
+        :param compress: Сжимать старые файлы в .gz
+        """
+        super().__init__(path, when=when, backupCount=backup_count, encoding="utf-8", delay=True)
+        self.max_bytes = max_bytes
+        if compress:
+            self.namer = lambda name: name + ".gz"
+            self.rotator = self._compress
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.max_bytes > 0:
+            if self.stream is None:
+                self.stream = self._open()
+            if self.stream.tell() + len(self.format(record)) + 1 >= self.max_bytes:
+                return True
+        return bool(super().shouldRollover(record))
+
+    def getFilesToDelete(self):
+        # Стандартная реализация не узнаёт имена с .gz и номером при ротации по размеру
+        directory, base = os.path.split(self.baseFilename)
+        old = [
+            os.path.join(directory, name) for name in os.listdir(directory or ".")
+            if name.startswith(base + ".")
+        ]
+        if len(old) <= self.backupCount:
+            return []
+        old.sort(key=lambda path: (os.stat(path).st_mtime_ns, path))
+        return old[:len(old) - self.backupCount]
+
+    def rotation_filename(self, default_name: str) -> str:
+        # Несколько ротаций по размеру за один период получают номера .1, .2, ...
+        name = super().rotation_filename(default_name)
+        index = 1
+        while os.path.exists(name):
+            name = super().rotation_filename(f"{default_name}.{index}")
+            index += 1
+        return name
+
+    @staticmethod
+    def _compress(source: str, dest: str):
+        with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(source)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler без форматирования в вызывающем потоке.
+
+    Стандартный prepare() вызывает self.format(record): время, уровень,
+    JSON и трассировка исключения собирались бы в потоке, который пишет
+    в лог. Здесь в очередь уходит копия записи, в которой подставлены
+    только аргументы сообщения (они могут измениться после вызова),
+    а exc_info сохраняется - трассировку оформит обработчик в фоновом потоке.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+class LogPipeline:
+    def __init__(self, config: dict):
+        """
+        Общая настройка логов процесса.
+
+        Все логгеры пишут в корневой DeferredQueueHandler: в вызывающем потоке
+        запись только копируется в очередь, а форматирование, вывод в консоль
+        и запись в файл (с ротацией и сжатием) выполняет один фоновый поток.
+        Поэтому лог не задерживает распознавание и выполнение команд.
+
+        :param config: Конфиг из config.py (разделы 'logging' и 'paths')
+        """
+        log_cfg = config.get("logging", {})
+        self.queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        self.handlers = []
+
+        if log_cfg.get("console", True):
+            console = logging.StreamHandler()
+            console.setFormatter(logging.Formatter(_TEXT_FORMAT))
+            self.handlers.append(console)
+
+        path = config.get("paths", {}).get("logs")
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            file_handler = RotatingLogHandler(
+                path,
+                max_bytes=int(log_cfg.get("max_mb", 5) * 1024 * 1024),
+                when=log_cfg.get("rotate_when", "midnight"),
+                backup_count=log_cfg.get("backup_count", 7),
+                compress=log_cfg.get("compress", True)
+            )
+            if log_cfg.get("format", "text") == "json":
+                file_handler.setFormatter(JsonLinesFormatter())
+            else:
+                file_handler.setFormatter(logging.Formatter(_TEXT_FORMAT))
+            self.handlers.append(file_handler)
+
+        self.queue_handler = DeferredQueueHandler(self.queue)
+        self.queue_handler.addFilter(UtteranceFilter())
+        self.listener = logging.handlers.QueueListener(
+            self.queue, *self.handlers, respect_handler_level=True
+        )
+        self.level = getattr(logging, str(log_cfg.get("level", "INFO")).upper(), logging.INFO)
+        self._running = False
+
+    def start(self):
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(self.queue_handler)
+        root.setLevel(self.level)
+        self.listener.start()
+        self._running = True
+
+    def stop(self):
+        """Запись оставшихся сообщений и закрытие файлов"""
+        root = logging.getLogger()
+        if self.queue_handler in root.handlers:
+            root.removeHandler(self.queue_handler)
+        if self._running:
+            self.listener.stop()
+            self._running = False
+        for handler in self.handlers:
+            handler.close()
+
+
+_pipeline: Optional[LogPipeline] = None
+
+
+def setup_logging(config: dict) -> LogPipeline:
+    """Включение общей очереди логов (повторный вызов возвращает уже настроенную)"""
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = LogPipeline(config)
+        _pipeline.start()
+        # Поток записи - фоновый: без этого сообщения перед аварийным выходом теряются
+        atexit.register(shutdown_logging)
+    return _pipeline
+
+
+def shutdown_logging():
+    global _pipeline
+    if _pipeline is not None:
+        _pipeline.stop()
+        _pipeline = None
+
+
+# Тест
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log_path = Path(tmp) / "assistant.log"
+        setup_logging({
+            "paths": {"logs": str(log_path)},
+            "logging": {"format": "json", "max_mb": 0.01, "backup_count": 3, "console": False}
+        })
+        logger = logging.getLogger("Test")
+
+        started = time.perf_counter()
+        for i in range(2000):
+            tracer.bind(i // 100)
+            logger.info(f"Сообщение {i}")
+        per_call = (time.perf_counter() - started) / 2000 * 1e6
+        shutdown_logging()
+
+        print(f"Вызов logger.info: {per_call:.1f} мкс")
+        print("Файлы:", sorted(p.name for p in Path(tmp).iterdir()))
+        print("Последняя строка:", log_path.read_text(encoding="utf-8").splitlines()[-1])
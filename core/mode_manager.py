@@ -1,12 +1,19 @@
 import json
 import logging
-import subprocess
+import sys
 import time
 from pathlib import Path
 from typing import Dict, List, Optional
-import psutil
 from dataclasses import dataclass
 
+# Добавляем корень проекта в пути поиска модулей
+sys.path.append(str(Path(__file__).parent.parent))
+from core.action_scheduler import ActionScheduler, ActionTiming, ActivationResult
+from core.mode_planner import ModePlanner, SystemProbes
+from core.process_index import ProcessIndex
+from core.process_supervisor import ProcessRecord, ProcessSupervisor, script_command, split_args
+from core.tracing import tracer
+
 @dataclass
 class ModeAction:
     type: str  # launch/kill/volume/script
@@ -15,11 +22,24 @@ class ModeAction:
     delay: float = 0.0
 
 class ModeManager:
-    def __init__(self, config_path: str):
+    def __init__(self, config_path: str, max_workers: int = 4,
+                 process_source=None, process_ttl: float = 1.0,
+                 supervisor: Optional[ProcessSupervisor] = None, audio=None):
         self.logger = logging.getLogger(self.__class__.__name__)
+        self.audio = audio  # AudioController для действий volume
+        self.config_path = config_path
         self.modes = self._load_modes(config_path)
         self.current_mode = None
+        self.last_result: Optional[ActivationResult] = None
+        # Общая таблица процессов вместо полного обхода psutil на каждое действие
+        self.processes = ProcessIndex(process_source, ttl=process_ttl)
+        self.processes.start()
+        # Запуск приложений и скриптов с таймаутами и сбором завершившихся процессов
+        self.supervisor = supervisor or ProcessSupervisor(max_concurrent=max_workers)
+        # Переход между режимами выполняет только недостающие действия
+        self.planner = ModePlanner(SystemProbes(self.processes, audio=audio))
         self._setup_action_handlers()
+        self._scheduler = ActionScheduler(self._execute_action, max_workers=max_workers)
 
     def _load_modes(self, path: str) -> Dict:
         """Загрузка режимов из JSON с проверкой ошибок"""
@@ -28,7 +48,7 @@ class ModeManager:
                 modes = json.load(f)
                 
             # Базовая валидация
-            for mode_name, config in modes.items():
+            for mode_name, config in list(modes.items()):
                 if not isinstance(config.get("actions"), list):
                     self.logger.error(f"Режим '{mode_name}': отсутствуют actions")
                     modes.pop(mode_name)  # Пропускаем битый режим
@@ -39,110 +59,239 @@ class ModeManager:
             self.logger.error(f"Ошибка загрузки режимов: {e}")
             return {}  # Возвращаем пустой словарь вместо падения
 
+    def _validate_mode(self, config: Dict) -> List[str]:
+        """Ошибки описания режима (пустой список - режим корректен)"""
+        actions = config.get("actions") if isinstance(config, dict) else None
+        if not isinstance(actions, list):
+            return ["отсутствуют actions"]
+        errors = []
+        for i, action in enumerate(actions):
+            if not isinstance(action, dict) or "type" not in action:
+                errors.append(f"действие {i}: нет type")
+            elif action["type"] not in self._action_handlers:
+                # Неизвестный тип не ломает режим: при запуске действие просто не выполнится
+                self.logger.warning(f"Действие {i}: неизвестный тип '{action['type']}'")
+        if not errors:
+            errors.extend(self._scheduler.validate(actions))
+        return errors
+
+    def reload(self, path: Optional[str] = None) -> bool:
+        """
+        Перечитывание modes.json.
+
+        Проверяются только изменённые режимы; если хоть один из них
+        некорректен, остаётся прежняя версия целиком. Новый словарь
+        подменяет старый одним присваиванием, поэтому активация,
+        начатая до перезагрузки, дорабатывает со старым режимом.
+        """
+        path = path or self.config_path
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                modes = json.load(f)
+            if not isinstance(modes, dict):
+                raise ValueError("ожидался объект с режимами")
+        except Exception as e:
+            self.logger.error(f"modes.json не применён, работает прежняя версия: {e}")
+            return False
+
+        current = self.modes
+        changed = [name for name, config in modes.items() if current.get(name) != config]
+        removed = [name for name in current if name not in modes]
+        errors = []
+        for name in changed:
+            errors.extend(f"Режим '{name}': {error}" for error in self._validate_mode(modes[name]))
+        if errors:
+            for error in errors:
+                self.logger.error(error)
+            self.logger.error("modes.json не применён, работает прежняя версия")
+            return False
+        if not changed and not removed:
+            return True
+
+        self.modes = modes
+        if self.current_mode in removed:
+            self.current_mode = None
+        self.logger.info(f"Режимы обновлены: {', '.join(changed + removed)}")
+        return True
+
     def _setup_action_handlers(self):
         """Действия, которые сейчас поддерживаются"""
         self._action_handlers = {
             'launch': self._launch_app,
             'kill': self._kill_process,
+            'kill_process': self._kill_process,
             'volume': self._set_volume,
             'script': self._run_script
         }
 
-    def activate(self, mode_name: str) -> bool:
-        """Активация режима с обработкой ошибок"""
+    def activate(self, mode_name: str, full: bool = False) -> ActivationResult:
+        """
+        Активация режима с обработкой ошибок.
+
+        Выполняются только действия, нужные для перехода из текущего
+        состояния (см. ModePlanner); full=True повторяет все действия.
+        Независимые действия выполняются параллельно, поэтому режим
+        включается за время самой длинной цепочки зависимостей.
+        Результат истинен при успехе и содержит время каждого действия.
+        """
         if mode_name not in self.modes:
             self.logger.error(f"Режим '{mode_name}' не найден")
-            return False
+            return ActivationResult(mode_name, False)
 
+        started = time.perf_counter()
+        mode = self.modes[mode_name]
         try:
-            self.current_mode = mode_name
-            actions = self.modes[mode_name].get("actions", [])
-            
-            for action_config in actions:
-                self._execute_action(action_config)
-                time.sleep(action_config.get("delay", 0.1))  # Задержка между действиями
-
-            self.logger.info(f"Активирован режим: {mode_name}")
-            return True
-
+            plan = self.planner.plan(mode_name, mode, full=full)
+            if plan.unmet:
+                self.logger.warning(f"Режим '{mode_name}': {'; '.join(plan.unmet)}")
+            if plan.blocked:
+                return ActivationResult(mode_name, False, time.perf_counter() - started, unmet=plan.unmet)
+            executed = self._scheduler.run(plan.actions)
         except Exception as e:
             self.logger.error(f"Ошибка активации режима: {e}")
-            return False
+            return ActivationResult(mode_name, False, time.perf_counter() - started)
 
-    def _execute_action(self, action: Dict):
-        """Выполнение одного действия"""
+        # Отчёт в исходном порядке действий режима, включая пропущенные; закрытие прежних приложений - в конце
+        actions = mode.get("actions", []) + plan.closing
+        timings = [None] * len(actions)
+        for index, timing in zip(plan.indices, executed):
+            timing.index = index
+            timings[index] = timing
+        for index, reason in plan.skipped.items():
+            timings[index] = ActionTiming(
+                index, str(actions[index].get("id", index)), actions[index].get("type"),
+                success=True, skipped=True, details={"reason": reason}
+            )
+        self.planner.commit(actions[t.index] for t in timings if t.success and not t.skipped)
+        for timing in executed:
+            tracer.record(f"mode_action.{timing.type}", timing.duration)
+
+        self.current_mode = mode_name
+        result = ActivationResult(mode_name, True, time.perf_counter() - started, timings, plan.unmet)
+        self.last_result = result
+        tracer.record("mode_activation", result.total_time)
+        if result.failed:
+            self.logger.warning(f"Режим '{mode_name}': не выполнено действий - {len(result.failed)}")
+        self.logger.info(f"Активирован режим: {mode_name} за {result.summary()}")
+        return result
+
+    def prepare(self, mode_name: str) -> int:
+        """
+        Подготовка к активации без изменений в системе: процессы из действий
+        режима ищутся в индексе (он обновляется, если устарел), проверки
+        requirements попадают в кэш. Возвращает число найденных процессов.
+        """
+        mode = self.modes.get(mode_name)
+        if mode is None:
+            return 0
+        found = 0
+        for action in mode.get("actions", []):
+            if action.get("type") in ("launch", "kill", "kill_process") and action.get("target"):
+                found += len(self.processes.find(action["target"]))
+        self.planner.check_requirements(mode.get("requirements", {}))
+        return found
+
+    def _execute_action(self, action: Dict, details: Optional[Dict] = None) -> bool:
+        """Выполнение одного действия. Сведения о процессе пишутся в details"""
         action_type = action.get("type")
         handler = self._action_handlers.get(action_type)
         
         if not handler:
             self.logger.warning(f"Неизвестный тип действия: {action_type}")
-            return
+            return False
 
         try:
-            handler(action)
+            result = handler(action)
         except Exception as e:
             self.logger.error(f"Ошибка выполнения действия {action_type}: {e}")
+            if details is not None:
+                details["error"] = str(e)
+            return False
+
+        if isinstance(result, ProcessRecord):
+            if details is not None:
+                details.update(result.as_dict())
+            return result.ok
+        return True
 
-    def _launch_app(self, action: Dict):
-        """Запуск приложения"""
+    def _launch_app(self, action: Dict) -> Optional[ProcessRecord]:
+        """Запуск приложения (без ожидания, без shell)"""
         app = action["target"]
-        args = action.get("args", "").split()
         
         if action.get("check_running") and self._is_process_running(app):
             self.logger.debug(f"Приложение уже запущено: {app}")
-            return
+            return None
 
-        try:
-            subprocess.Popen([app] + args, shell=True)
-            self.logger.info(f"Запущено: {app} {' '.join(args)}")
-        except Exception as e:
-            self.logger.error(f"Ошибка запуска {app}: {e}")
-            raise
+        command = [app] + split_args(action.get("args"))
+        record = self.supervisor.launch(command)
+        if record.error:
+            self.logger.error(f"Ошибка запуска {app}: {record.error}")
+            return record
+
+        self.processes.add(record.pid, Path(app).name)
+        self.logger.info(f"Запущено: {' '.join(command)} (PID {record.pid})")
+        return record
 
     def _kill_process(self, action: Dict):
-        """Завершение процесса"""
+        """Завершение всех процессов с данным именем (одним проходом)"""
         target = action["target"]
-        for proc in psutil.process_iter(['name']):
-            if proc.info['name'] and target.lower() in proc.info['name'].lower():
-                try:
-                    proc.kill() if action.get("force") else proc.terminate()
-                    self.logger.info(f"Завершён процесс: {target}")
-                    return
-                except Exception as e:
-                    self.logger.error(f"Ошибка завершения {target}: {e}")
-                    raise
-
-        self.logger.warning(f"Процесс не найден: {target}")
+        gone, alive = self.processes.kill(
+            target,
+            force=action.get("force", False),
+            timeout=action.get("timeout", 3.0)
+        )
+        if not gone and not alive:
+            self.logger.warning(f"Процесс не найден: {target}")
+            return
+        if gone:
+            self.logger.info(f"Завершён процесс: {target} (PID: {', '.join(map(str, gone))})")
+        if alive:
+            raise RuntimeError(f"Процесс {target} не завершился (PID: {', '.join(map(str, alive))})")
 
     def _set_volume(self, action: Dict):
-        """Заглушка для установки громкости (реализуется через AudioController позже)"""
-        level = action.get("level", 50)
-        self.logger.info(f"[ЗАГЛУШКА] Установка громкости на {level}%")
+        """Установка системной громкости через AudioController"""
+        if self.audio is None:
+            raise RuntimeError("Управление громкостью недоступно")
+        level = int(action.get("level", 50))
+        smooth = action.get("smooth", False)
+        if not self.audio.set_volume(level, smooth=smooth, duration=action.get("duration", 1.0),
+                                     easing=action.get("easing")):
+            raise RuntimeError(f"Не удалось установить громкость {level}%")
+        # Мгновенная установка ждёт записи, чтобы ошибка провалила действие
+        if not smooth and not self.audio.flush():
+            raise RuntimeError(f"Не удалось установить громкость {level}%")
 
-    def _run_script(self, action: Dict):
-        """Запуск BAT/CMD скрипта"""
+    def _run_script(self, action: Dict) -> ProcessRecord:
+        """Запуск скрипта с таймаутом (зависший скрипт проваливает только своё действие)"""
         script_path = Path(action["path"])
         if not script_path.exists():
             raise FileNotFoundError(f"Скрипт {script_path} не найден")
         
-        try:
-            subprocess.run(str(script_path), shell=True, check=True)
-            self.logger.info(f"Выполнен скрипт: {script_path}")
-        except subprocess.CalledProcessError as e:
-            self.logger.error(f"Скрипт завершился с ошибкой: {e}")
-            raise
+        record = self.supervisor.run(
+            script_command(script_path, action.get("args")),
+            timeout=action.get("timeout"),
+            name=script_path.name
+        )
+        if record.ok:
+            self.logger.info(f"Выполнен скрипт: {script_path} за {record.duration * 1000:.0f} мс")
+        else:
+            self.logger.error(f"Скрипт {script_path} завершился с ошибкой (код {record.returncode}): {record.error}")
+        return record
 
     def _is_process_running(self, name: str) -> bool:
         """Проверка, работает ли процесс"""
-        return any(
-            p.info['name'] and name.lower() in p.info['name'].lower()
-            for p in psutil.process_iter(['name'])
-        )
+        return self.processes.is_running(name)
 
     def get_available_modes(self) -> List[str]:
         """Список доступных режимов"""
         return list(self.modes.keys())
 
+    def shutdown(self):
+        """Остановка пула действий, скриптов и обновления таблицы процессов"""
+        self._scheduler.shutdown()
+        self.supervisor.shutdown()
+        self.processes.stop()
+
 # Тест
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
@@ -155,8 +304,9 @@ if __name__ == "__main__":
     if manager.get_available_modes():
         test_mode = manager.get_available_modes()[0]
         print(f"\nАктивируем режим: {test_mode}")
-        if manager.activate(test_mode):
-            print("✅ Режим активирован!")
+        result = manager.activate(test_mode)
+        if result:
+            print(f"✅ Режим активирован за {result.summary()}")
         else:
             print("❌ Ошибка активации")
     else:
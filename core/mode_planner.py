@@ -0,0 +1,225 @@
+import logging
+import shutil
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from core.process_index import ProcessIndex, normalize_process_name
+
+# Действия, задающие состояние системы: ключ состояния и значение.
+# Если проверка (SystemProbes.current) показывает, что значение уже
+# установлено, повторять действие незачем.
+_STATE_ACTIONS: Dict[str, Callable[[Dict], Tuple[tuple, Any]]] = {
+    "volume": lambda a: (("volume", a.get("target", "system")), a.get("level")),
+    "display": lambda a: (("display",), (a.get("action"), a.get("brightness"))),
+    "power": lambda a: (("power",), a.get("plan")),
+}
+
+
+class SystemProbes:
+    def __init__(self, processes: Optional[ProcessIndex] = None, ttl: float = 30.0, audio=None):
+        """
+        Кэшируемые сведения о системе для проверки requirements режимов.
+
+        Объём памяти читается один раз, питание и наличие программ
+        перепроверяются не чаще раза в ttl секунд.
+
+        :param processes: Индекс процессов (запущенные приложения)
+        :param audio: AudioController (текущая громкость из его кэша)
+        """
+        self.processes = processes
+        self.audio = audio
+        self.ttl = ttl
+        self._cache: Dict[Any, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _cached(self, key, ttl: Optional[float], probe: Callable[[], Any]):
+        now = time.monotonic()
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit and (ttl is None or now - hit[0] < ttl):
+                return hit[1]
+        value = probe()
+        with self._lock:
+            self._cache[key] = (now, value)
+        return value
+
+    def total_ram_gb(self) -> float:
+        def probe():
+            import psutil
+            return psutil.virtual_memory().total / 1024 ** 3
+        return self._cached("ram", None, probe)
+
+    def on_battery(self) -> Optional[bool]:
+        """True - питание от батареи, None - батареи нет или неизвестно"""
+        def probe():
+            import psutil
+            battery = psutil.sensors_battery()
+            return None if battery is None else not battery.power_plugged
+        return self._cached("battery", self.ttl, probe)
+
+    def is_running(self, app: str) -> bool:
+        return bool(self.processes and self.processes.is_running(app))
+
+    def app_available(self, app: str) -> bool:
+        """Приложение запущено или находится в PATH"""
+        if self.is_running(app):
+            return True
+        return self._cached(("app", normalize_process_name(app)), self.ttl, lambda: shutil.which(app) is not None)
+
+    def current(self, key: tuple) -> Optional[Any]:
+        """
+        Текущее значение состояния из _STATE_ACTIONS (None - проверить нельзя).
+
+        Громкость берётся из кэша AudioController, который сбрасывается
+        событиями бэкенда, поэтому изменение извне видно сразу. Яркость и
+        план питания проверить нечем.
+        """
+        if key == ("volume", "system") and self.audio is not None and self.audio.backend is not None:
+            return self.audio.get_current_volume()
+        return None
+
+
+@dataclass
+class TransitionPlan:
+    """Действия, которые нужно выполнить для перехода в режим"""
+    mode: str
+    actions: List[Dict] = field(default_factory=list)
+    indices: List[int] = field(default_factory=list)  # Исходный номер каждого действия
+    skipped: Dict[int, str] = field(default_factory=dict)  # Номер -> причина пропуска
+    # Завершение приложений прежних режимов, которых нет в новом (номера - после действий режима)
+    closing: List[Dict] = field(default_factory=list)
+    unmet: List[str] = field(default_factory=list)  # Невыполненные требования
+    blocked: bool = False
+
+
+class ModePlanner:
+    def __init__(self, probes: SystemProbes):
+        """
+        Планировщик перехода между режимами.
+
+        Сравнивает действия режима с текущим состоянием системы: запуск уже
+        работающих приложений (у действий с "check_running": true, как и
+        раньше), завершение не запущенных и установка громкости, которая
+        уже выставлена, пропускаются. Яркость, план питания, скрипты и
+        действия с "always": true выполняются всегда - их значение
+        проверить нечем, а запомненному нельзя верить: его могли изменить
+        вручную.
+
+        Приложения, запущенные прежними режимами, завершаются, если новый
+        режим их не запускает и не перечисляет в "keep". Запущенное
+        пользователем самостоятельно не трогается.
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.probes = probes
+        self.launched: Dict[str, str] = {}  # Приложения, запущенные режимами: ключ имени -> target
+
+    @staticmethod
+    def state_of(action: Dict) -> Optional[Tuple[tuple, Any]]:
+        """Ключ и значение состояния, которые задаёт действие"""
+        getter = _STATE_ACTIONS.get(action.get("type"))
+        return getter(action) if getter else None
+
+    def check_requirements(self, requirements: Dict) -> List[str]:
+        unmet = []
+        min_ram = requirements.get("min_ram_gb")
+        if min_ram is not None:
+            ram = self.probes.total_ram_gb()
+            if ram < min_ram:
+                unmet.append(f"нужно {min_ram} ГБ памяти, доступно {ram:.1f}")
+        for app in requirements.get("required_apps", []):
+            if not self.probes.app_available(app):
+                unmet.append(f"не найдено приложение {app}")
+        if "on_battery" in requirements:
+            battery = self.probes.on_battery()
+            if battery is not None and battery != requirements["on_battery"]:
+                unmet.append("режим рассчитан на работу от батареи" if requirements["on_battery"]
+                             else "режим рассчитан на работу от сети")
+        return unmet
+
+    def _reason_to_skip(self, action: Dict) -> Optional[str]:
+        if action.get("always"):
+            return None
+        action_type = action.get("type")
+        if action_type == "launch" and action.get("check_running"):
+            if self.probes.is_running(action["target"]):
+                return "уже запущено"
+        elif action_type in ("kill", "kill_process"):
+            if not self.probes.is_running(action["target"]):
+                return "не запущено"
+        else:
+            state = self.state_of(action)
+            if state and state[1] is not None and self.probes.current(state[0]) == state[1]:
+                return "уже установлено"
+        return None
+
+    def plan(self, mode_name: str, mode: Dict, full: bool = False) -> TransitionPlan:
+        """
+        План перехода в режим.
+
+        :param full: Выполнить все действия без сравнения с состоянием
+        """
+        plan = TransitionPlan(mode_name)
+        requirements = mode.get("requirements") or {}
+        plan.unmet = self.check_requirements(requirements)
+        plan.blocked = bool(plan.unmet and requirements.get("strict"))
+
+        actions = mode.get("actions", [])
+        ids = {}
+        for i, action in enumerate(actions):
+            ids.setdefault(str(action.get("id", i)), i)
+            ids.setdefault(str(i), i)
+
+        for i, action in enumerate(actions):
+            reason = None if full else self._reason_to_skip(action)
+            if reason:
+                plan.skipped[i] = reason
+                continue
+            plan.indices.append(i)
+
+        # Зависимости переписываются на явные id; пропущенное действие считается выполненным
+        for i in plan.indices:
+            action = dict(actions[i])
+            action["id"] = str(actions[i].get("id", i))
+            refs = action.pop("after", action.pop("depends_on", []))
+            if not isinstance(refs, list):
+                refs = [refs]
+            # Неизвестные ссылки оставляем как есть - их отклонит планировщик действий
+            kept = [ref if str(ref) not in ids else str(actions[ids[str(ref)]].get("id", ids[str(ref)]))
+                    for ref in refs if ids.get(str(ref)) not in plan.skipped]
+            if kept:
+                action["after"] = kept
+            plan.actions.append(action)
+
+        plan.closing = self._closing_actions(mode)
+        plan.indices.extend(range(len(actions), len(actions) + len(plan.closing)))
+        plan.actions.extend(plan.closing)
+        return plan
+
+    def _closing_actions(self, mode: Dict) -> List[Dict]:
+        """Завершение приложений прежних режимов, которые новый режим не оставляет"""
+        keep = {normalize_process_name(app) for app in mode.get("keep", [])}
+        for action in mode.get("actions", []):
+            if action.get("type") in ("launch", "kill", "kill_process") and action.get("target"):
+                # Свои kill режим выполняет сам
+                keep.add(normalize_process_name(action["target"]))
+
+        closing = []
+        for key, target in list(self.launched.items()):
+            if key in keep:
+                continue
+            if not self.probes.is_running(target):
+                del self.launched[key]  # Уже закрыто
+                continue
+            closing.append({"id": f"close:{key}", "type": "kill", "target": target})
+        return closing
+
+    def commit(self, actions: Iterable[Dict]):
+        """Учёт приложений после успешно выполненных (не пропущенных) действий"""
+        for action in actions:
+            action_type = action.get("type")
+            if action_type == "launch":
+                self.launched[normalize_process_name(action["target"])] = action["target"]
+            elif action_type in ("kill", "kill_process"):
+                self.launched.pop(normalize_process_name(action["target"]), None)
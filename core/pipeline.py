@@ -0,0 +1,274 @@
+import itertools
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterator, Optional
+
+from core.tracing import tracer
+
+_STOP = object()
+
+
+class Utterance:
+    """Фраза, звук которой поступает блоками из потока захвата"""
+    _ids = itertools.count(1)
+
+    def __init__(self, speech_start: Optional[float] = None, awake: bool = False):
+        self.id = next(self._ids)
+        self.speech_start = speech_start or time.perf_counter()
+        self.speech_end: Optional[float] = None
+        # Триггерное слово уже услышано (или фраза сразу после него) - в тексте его может не быть
+        self.awake = awake
+        self._blocks: "queue.Queue[Optional[bytes]]" = queue.Queue()
+
+    def put(self, pcm: bytes):
+        self._blocks.put(pcm)
+
+    def close(self):
+        """Конец речи: больше блоков не будет"""
+        if self.speech_end is None:
+            self.speech_end = time.perf_counter()
+            self._blocks.put(None)
+
+    def __iter__(self) -> Iterator[bytes]:
+        while True:
+            pcm = self._blocks.get()
+            if pcm is None:
+                return
+            yield pcm
+
+
+class StageStats:
+    """Счётчики одной стадии конвейера"""
+    __slots__ = ("processed", "errors", "total_time", "max_time", "last_time")
+
+    def __init__(self):
+        self.processed = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.last_time = 0.0
+
+    def record(self, seconds: float):
+        self.processed += 1
+        self.total_time += seconds
+        self.last_time = seconds
+        self.max_time = max(self.max_time, seconds)
+
+    def as_dict(self) -> Dict[str, float]:
+        avg = self.total_time / self.processed if self.processed else 0.0
+        return {
+            "processed": self.processed,
+            "errors": self.errors,
+            "avg_ms": round(avg * 1000, 1),
+            "max_ms": round(self.max_time * 1000, 1),
+            "last_ms": round(self.last_time * 1000, 1)
+        }
+
+
+class VoicePipeline:
+    def __init__(self, recognizer, handler: Callable[[str, bool], None], queue_size: int = 4,
+                 spotter=None, follow_up: float = 4.0,
+                 partial_handler: Optional[Callable[[str, bool], None]] = None):
+        """
+        Конвейер захват -> распознавание -> выполнение.
+
+        Каждая стадия работает в своём потоке, между ними ограниченные очереди.
+        Пока выполняется команда, микрофон продолжает слушать, а следующая
+        фраза уже распознаётся.
+
+        Со spotter фраза попадает в распознавание, только если в её звуке
+        найдено триггерное слово (блоки до него придерживаются и уходят
+        вместе с ним), или если она началась в течение follow_up секунд
+        после такой фразы. Остальная речь отбрасывается ещё при захвате.
+
+        :param recognizer: VoiceRecognizer (capture/recognize_stream)
+        :param handler: Обработчик распознанного текста: handler(text, awake),
+            awake - триггерное слово уже подтверждено, искать его в тексте не нужно
+        :param queue_size: Ёмкость каждой очереди между стадиями
+        :param spotter: WakeWordSpotter или None - распознаётся каждая фраза
+        :param follow_up: Сколько секунд после триггерного слова фразы идут без него
+        :param partial_handler: Промежуточные гипотезы распознавания: partial_handler(text, awake).
+            Вызывается в потоке распознавания и не должен его задерживать
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.recognizer = recognizer
+        self.handler = handler
+        self.partial_handler = partial_handler
+        self.spotter = spotter
+        self.follow_up = follow_up
+        self._awake_until = 0.0
+        self._utterances: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._phrases: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._running = threading.Event()
+        self._threads = []
+        self._stats = {
+            "capture": StageStats(),
+            "recognition": StageStats(),
+            "dispatch": StageStats()
+        }
+        if spotter is not None:
+            self._stats["wake_word"] = StageStats()
+        self._gate = {"heard": 0, "woken": 0, "follow_up": 0, "dropped": 0}
+
+    def start(self):
+        """Запуск всех стадий"""
+        if self._running.is_set():
+            return
+        self._running.set()
+        for name, target in (
+            ("capture", self._capture_loop),
+            ("recognition", self._recognition_loop),
+            ("dispatch", self._dispatch_loop)
+        ):
+            thread = threading.Thread(target=target, name=f"pipeline-{name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self.logger.info("Конвейер запущен")
+
+    def stop(self, timeout: float = 5.0):
+        """Остановка: захват завершается, уже принятые фразы дорабатываются"""
+        if not self._running.is_set():
+            return
+        self._running.clear()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self.logger.info(f"Конвейер остановлен: {self.stats()}")
+
+    def join(self):
+        """Ожидание завершения стадий"""
+        for thread in list(self._threads):
+            while thread.is_alive():
+                thread.join(0.5)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Глубина очередей и задержки стадий"""
+        result = {name: stats.as_dict() for name, stats in self._stats.items()}
+        result["recognition"]["queue_depth"] = self._utterances.qsize()
+        result["dispatch"]["queue_depth"] = self._phrases.qsize()
+        if self.spotter is not None:
+            result["wake_word"].update(self._gate)
+        noise_stats = getattr(self.recognizer, "noise_stats", None)
+        if callable(noise_stats):
+            result["noise"] = noise_stats()
+        return result
+
+    def _capture_loop(self):
+        stats = self._stats["capture"]
+        while self._running.is_set():
+            utterance = None
+            held = None  # Блоки до триггерного слова
+            speech_start = 0.0
+            spotting = 0.0
+
+            def open_utterance(awake: bool):
+                nonlocal utterance
+                utterance = Utterance(speech_start, awake)
+                tracer.bind(utterance.id)
+                self._utterances.put(utterance)
+
+            def consumer(pcm: bytes):
+                nonlocal held, speech_start, spotting
+                if utterance is None and held is None:
+                    speech_start = time.perf_counter()
+                    self._gate["heard"] += 1
+                    if self.spotter is None:
+                        # Распознавание начинается с первым блоком речи
+                        open_utterance(False)
+                    elif self._audio_clock() < self._awake_until:
+                        self._gate["follow_up"] += 1
+                        open_utterance(True)
+                    else:
+                        held = []
+                        self.spotter.begin(self.recognizer.sample_rate)
+                if utterance is not None:
+                    utterance.put(pcm)
+                    return
+
+                held.append(pcm)
+                started = time.perf_counter()
+                found = self.spotter.feed(pcm)
+                spotting += time.perf_counter() - started
+                if found:
+                    self._gate["woken"] += 1
+                    open_utterance(True)
+                    for block in held:
+                        utterance.put(block)
+                    held = None
+                    self._awake_until = float("inf")  # До конца этой фразы
+
+            try:
+                self.recognizer.capture(consumer)
+            except Exception as e:
+                stats.errors += 1
+                self.logger.error(f"Ошибка захвата: {e}")
+                time.sleep(0.5)
+            finally:
+                if utterance is not None:
+                    utterance.close()
+                    stats.record(utterance.speech_end - utterance.speech_start)
+                    tracer.record("capture", utterance.speech_end - utterance.speech_start)
+                    if self._awake_until == float("inf"):
+                        self._awake_until = self._audio_clock() + self.follow_up
+                    tracer.bind(None)
+                elif held is not None:
+                    # Триггерного слова не было: фраза не распознаётся вовсе
+                    self._gate["dropped"] += 1
+                    self.logger.debug(f"Фраза без триггерного слова отброшена ({len(held)} блоков)")
+                if spotting:
+                    self._stats["wake_word"].record(spotting)
+                    tracer.record("wake_spotting", spotting)
+            if getattr(self.recognizer, "exhausted", False):
+                self.logger.info("Источник звука закончился")
+                break
+        self._utterances.put(_STOP)
+
+    def _audio_clock(self) -> float:
+        """Время по захваченному звуку: окно после триггерного слова верно и при быстрой подаче записи"""
+        position = getattr(self.recognizer, "stream_time", None)
+        return time.perf_counter() if position is None else position
+
+    def _recognition_loop(self):
+        stats = self._stats["recognition"]
+        while True:
+            utterance = self._utterances.get()
+            if utterance is _STOP:
+                break
+            tracer.bind(utterance.id)
+            on_partial = None
+            if self.partial_handler:
+                on_partial = lambda partial: self._partial(partial, utterance)
+            text = self.recognizer.recognize_stream(utterance, on_partial=on_partial)
+            # Задержка от конца речи до готового текста
+            stats.record(time.perf_counter() - utterance.speech_end)
+            tracer.record("recognition", time.perf_counter() - utterance.speech_end)
+            if text:
+                self._phrases.put((utterance, text))
+        self._phrases.put(_STOP)
+
+    def _partial(self, text: str, utterance: Utterance):
+        try:
+            self.partial_handler(text, utterance.awake)
+        except Exception as e:
+            # Ошибка упреждения не должна мешать распознаванию
+            self.logger.debug(f"Ошибка обработки гипотезы: {e}")
+
+    def _dispatch_loop(self):
+        stats = self._stats["dispatch"]
+        while True:
+            item = self._phrases.get()
+            if item is _STOP:
+                break
+            utterance, text = item
+            tracer.bind(utterance.id)
+            started = time.perf_counter()
+            try:
+                self.handler(text, utterance.awake)
+            except Exception as e:
+                stats.errors += 1
+                self.logger.error(f"Ошибка обработки команды: {e}")
+            stats.record(time.perf_counter() - started)
+            # Полная задержка: от конца речи до выполненной команды
+            tracer.record("end_to_end", time.perf_counter() - utterance.speech_end)
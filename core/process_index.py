@@ -0,0 +1,227 @@
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+
+def normalize_process_name(name: str) -> str:
+    """Ключ индекса: без регистра и без .exe (discord.exe == Discord)"""
+    name = name.strip().lower()
+    return name[:-4] if name.endswith(".exe") else name
+
+
+class PsutilProcessSource:
+    """Источник процессов системы через psutil"""
+
+    def __init__(self):
+        import psutil
+        self._psutil = psutil
+
+    def pids(self) -> Set[int]:
+        return set(self._psutil.pids())
+
+    def name(self, pid: int) -> Optional[str]:
+        try:
+            return self._psutil.Process(pid).name()
+        except (self._psutil.NoSuchProcess, self._psutil.AccessDenied, self._psutil.ZombieProcess):
+            return None
+
+    def terminate(self, pids: List[int], force: bool, timeout: float) -> Tuple[List[int], List[int]]:
+        """Завершение всех процессов за один проход и общее ожидание"""
+        procs = []
+        for pid in pids:
+            try:
+                proc = self._psutil.Process(pid)
+                proc.kill() if force else proc.terminate()
+                procs.append(proc)
+            except self._psutil.NoSuchProcess:
+                continue
+        gone, alive = self._psutil.wait_procs(procs, timeout=timeout)
+        return [p.pid for p in gone], [p.pid for p in alive]
+
+
+class FakeProcessSource:
+    """Таблица процессов в памяти для тестов и бенчмарков (имя None - нет доступа)"""
+
+    def __init__(self, processes: Optional[Dict[int, Optional[str]]] = None):
+        self.processes: Dict[int, Optional[str]] = dict(processes or {})
+        self.name_calls = 0
+        self.terminated: List[int] = []
+        self._next_pid = max(self.processes, default=1000) + 1
+
+    def spawn(self, name: Optional[str]) -> int:
+        pid = self._next_pid
+        self._next_pid += 1
+        self.processes[pid] = name
+        return pid
+
+    def pids(self) -> Set[int]:
+        return set(self.processes)
+
+    def name(self, pid: int) -> Optional[str]:
+        self.name_calls += 1
+        return self.processes.get(pid)
+
+    def terminate(self, pids: List[int], force: bool, timeout: float) -> Tuple[List[int], List[int]]:
+        gone = [pid for pid in pids if self.processes.pop(pid, False) is not False]
+        self.terminated.extend(gone)
+        return gone, []
+
+
+class ProcessIndex:
+    def __init__(self, source=None, ttl: float = 1.0, substring: bool = True):
+        """
+        Индекс запущенных процессов: имя -> PID.
+
+        Обновляется инкрементально: сравниваются множества PID, имена
+        запрашиваются только у новых процессов. PID без доступного имени
+        (нет прав, зомби) тоже запоминаются и больше не опрашиваются.
+        Данные старше ttl секунд обновляются перед поиском (или фоновым
+        потоком после start()).
+
+        Имя ищется точно (без регистра и .exe). Если таких процессов нет,
+        при substring=True подходят процессы, в имени которых оно содержится -
+        как в прежних списках kill из modes.json ("discord" -> DiscordPTB.exe).
+        Такой поиск обходит все имена только при первом промахе по ключу,
+        дальше его результат поддерживается при обновлениях индекса.
+
+        :param source: Источник процессов (по умолчанию psutil)
+        :param ttl: Допустимый возраст данных в секундах
+        :param substring: Поиск по вхождению, если точного совпадения нет
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.source = source or PsutilProcessSource()
+        self.ttl = ttl
+        self.substring = substring
+        self._by_name: Dict[str, Set[int]] = {}
+        self._names: Dict[int, str] = {}
+        self._unnamed: Set[int] = set()  # PID, имя которых недоступно
+        self._partial: Dict[str, Set[int]] = {}  # Ключ поиска по вхождению -> PID
+        self._terminated: Set[int] = set()  # Завершены kill() во время обновления
+        self._updated = 0.0
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self):
+        """Инкрементальное обновление по разнице множеств PID"""
+        current = self.source.pids()
+        with self._lock:
+            known = set(self._names) | self._unnamed
+            for pid in known - current:
+                self._forget(pid)
+            self._unnamed &= current
+            self._terminated.clear()
+            new = current - known
+
+        # Имена запрашиваются без блокировки: поиск в это время не ждёт
+        names = {pid: self.source.name(pid) for pid in new}
+
+        with self._lock:
+            for pid, name in names.items():
+                if pid in self._terminated:
+                    continue
+                if name:
+                    self._remember(pid, name)
+                else:
+                    self._unnamed.add(pid)
+            self._updated = time.monotonic()
+
+    def _remember(self, pid: int, name: str):
+        key = normalize_process_name(name)
+        self._names[pid] = key
+        self._by_name.setdefault(key, set()).add(pid)
+        for part, pids in self._partial.items():
+            if part in key:
+                pids.add(pid)
+
+    def _forget(self, pid: int):
+        key = self._names.pop(pid, None)
+        if key is None:
+            return
+        for part, pids in self._partial.items():
+            if part in key:
+                pids.discard(pid)
+        pids = self._by_name.get(key)
+        if pids:
+            pids.discard(pid)
+            if not pids:
+                del self._by_name[key]
+
+    def _ensure_fresh(self):
+        if time.monotonic() - self._updated > self.ttl:
+            self.refresh()
+
+    def find(self, name: str) -> Set[int]:
+        """PID процессов с данным именем (или содержащих его, см. substring)"""
+        self._ensure_fresh()
+        key = normalize_process_name(name)
+        with self._lock:
+            pids = self._by_name.get(key)
+            if pids or not self.substring or not key:
+                return set(pids or ())
+            if key not in self._partial:
+                self._partial[key] = {
+                    pid for other, found in self._by_name.items() if key in other for pid in found
+                }
+            return set(self._partial[key])
+
+    def is_running(self, name: str) -> bool:
+        return bool(self.find(name))
+
+    def add(self, pid: int, name: str):
+        """Регистрация только что запущенного процесса без ожидания обновления"""
+        with self._lock:
+            self._remember(pid, name)
+
+    def kill(self, name: str, force: bool = False, timeout: float = 3.0) -> Tuple[List[int], List[int]]:
+        """
+        Завершение всех процессов с данным именем.
+
+        :return: (завершившиеся PID, PID, не завершившиеся за timeout)
+        """
+        pids = sorted(self.find(name))
+        if not pids:
+            return [], []
+        gone, alive = self.source.terminate(pids, force, timeout)
+        with self._lock:
+            for pid in gone:
+                self._forget(pid)
+            self._terminated.update(gone)
+        return gone, alive
+
+    def start(self):
+        """Фоновое обновление индекса раз в ttl секунд"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="process-index", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(self.ttl + 1.0)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                self.logger.error(f"Ошибка обновления списка процессов: {e}")
+            self._stop.wait(self.ttl)
+
+
+# Тест
+if __name__ == "__main__":
+    source = FakeProcessSource({1: "Discord.exe", 2: "discord.exe", 3: "steam.exe", 4: "bash"})
+    index = ProcessIndex(source, ttl=60)
+
+    print("discord запущен:", index.is_running("discord.exe"), sorted(index.find("Discord")))
+    calls = source.name_calls
+    source.spawn("code.exe")
+    index.refresh()
+    print(f"Запрошено имён при обновлении: {source.name_calls - calls} (только новый процесс)")
+    print("Завершено:", index.kill("discord.exe"))
+    print("discord запущен после kill:", index.is_running("discord.exe"))
@@ -0,0 +1,248 @@
+import logging
+import os
+import shlex
+import signal
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+# Интерпретаторы для скриптов, чтобы не запускать их через shell=True
+_SCRIPT_RUNNERS = {
+    ".bat": ["cmd", "/c"],
+    ".cmd": ["cmd", "/c"],
+    ".ps1": ["powershell", "-NoProfile", "-ExecutionPolicy", "Bypass", "-File"],
+    ".py": [sys.executable],
+    ".sh": ["sh"],
+}
+
+
+def split_args(args: Union[str, List[str], None]) -> List[str]:
+    """Аргументы из строки modes.json (с учётом кавычек) или готового списка"""
+    if not args:
+        return []
+    if isinstance(args, list):
+        return [str(a) for a in args]
+    return shlex.split(args, posix=os.name != "nt")
+
+
+def script_command(path: Path, args: Union[str, List[str], None] = None) -> List[str]:
+    """Команда запуска скрипта через подходящий интерпретатор"""
+    runner = _SCRIPT_RUNNERS.get(path.suffix.lower(), [])
+    return runner + [str(path)] + split_args(args)
+
+
+@dataclass
+class ProcessRecord:
+    """Сведения о дочернем процессе для отчёта об активации режима"""
+    name: str
+    command: List[str]
+    pid: Optional[int] = None
+    started: float = 0.0
+    ended: Optional[float] = None
+    returncode: Optional[int] = None
+    timed_out: bool = False
+    detached: bool = False
+    error: Optional[str] = None
+
+    @property
+    def duration(self) -> Optional[float]:
+        return None if self.ended is None else self.ended - self.started
+
+    @property
+    def ok(self) -> bool:
+        if self.error or self.timed_out:
+            return False
+        return self.detached or self.returncode == 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["duration"] = self.duration
+        return data
+
+
+class ProcessSupervisor:
+    def __init__(self, max_concurrent: int = 4, default_timeout: float = 30.0,
+                 kill_grace: float = 2.0, reap_interval: float = 1.0,
+                 popen: Callable[..., subprocess.Popen] = subprocess.Popen):
+        """
+        Запуск дочерних процессов для действий режимов.
+
+        Приложения запускаются без ожидания и потом собираются фоновым
+        потоком (без зомби, с кодом выхода). Скрипты ждут завершения не
+        дольше своего таймаута; одновременно выполняется не больше
+        max_concurrent скриптов.
+
+        :param default_timeout: Таймаут скрипта, если в действии не указан
+        :param kill_grace: Сколько ждать после terminate() перед kill()
+        :param popen: Фабрика процессов (подменяется в тестах)
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.default_timeout = default_timeout
+        self.kill_grace = kill_grace
+        self.reap_interval = reap_interval
+        self._popen = popen
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._children: Dict[int, tuple] = {}
+        self._running: Dict[int, subprocess.Popen] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._reaper: Optional[threading.Thread] = None
+
+    def launch(self, command: List[str], name: Optional[str] = None) -> ProcessRecord:
+        """Запуск приложения без ожидания; процесс будет собран фоновым потоком"""
+        record = ProcessRecord(name or Path(command[0]).name, command, detached=True)
+        record.started = time.perf_counter()
+        try:
+            proc = self._popen(
+                command,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True  # Приложение переживёт остановку ассистента
+            )
+        except OSError as e:
+            record.error = str(e)
+            record.ended = time.perf_counter()
+            return record
+
+        record.pid = proc.pid
+        with self._lock:
+            self._children[proc.pid] = (proc, record)
+            # После shutdown() сбор возобновляется, иначе новые процессы стали бы зомби
+            self._stop.clear()
+            self._ensure_reaper()
+        return record
+
+    def run(self, command: List[str], timeout: Optional[float] = None,
+            name: Optional[str] = None, cwd: Optional[str] = None) -> ProcessRecord:
+        """Выполнение скрипта с ожиданием. По таймауту процесс завершается"""
+        record = ProcessRecord(name or Path(command[-1]).name, command)
+        timeout = self.default_timeout if timeout is None else timeout
+
+        with self._slots:
+            record.started = time.perf_counter()
+            try:
+                proc = self._popen(
+                    command,
+                    cwd=cwd,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                    start_new_session=True  # Своя группа, чтобы по таймауту завершить и потомков
+                )
+            except OSError as e:
+                record.error = str(e)
+                record.ended = time.perf_counter()
+                return record
+
+            record.pid = proc.pid
+            with self._lock:
+                self._running[proc.pid] = proc
+            try:
+                _, stderr = proc.communicate(timeout=timeout)
+                if proc.returncode and stderr:
+                    record.error = stderr.decode(errors="replace").strip()[-500:]
+            except subprocess.TimeoutExpired:
+                record.timed_out = True
+                record.error = f"превышен таймаут {timeout:g} с"
+                self._terminate(proc)
+            finally:
+                with self._lock:
+                    self._running.pop(proc.pid, None)
+            record.returncode = proc.returncode
+            record.ended = time.perf_counter()
+        return record
+
+    @staticmethod
+    def _signal(proc: subprocess.Popen, force: bool):
+        """Сигнал всей группе процесса (POSIX) или только самому процессу (Windows)"""
+        if os.name != "nt":
+            try:
+                os.killpg(proc.pid, signal.SIGKILL if force else signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+            return
+        proc.kill() if force else proc.terminate()
+
+    def _terminate(self, proc: subprocess.Popen):
+        self._signal(proc, force=False)
+        try:
+            proc.wait(timeout=self.kill_grace)
+        except subprocess.TimeoutExpired:
+            self._signal(proc, force=True)
+            proc.wait()
+        if proc.stderr:
+            proc.stderr.close()
+
+    def _ensure_reaper(self):
+        """Запуск фонового сбора процессов (вызывается под self._lock)"""
+        if self._reaper is not None:
+            return
+        self._reaper = threading.Thread(target=self._reap_loop, name="process-reaper", daemon=True)
+        self._reaper.start()
+
+    def _reap_loop(self):
+        while True:
+            if not self._stop.wait(self.reap_interval):
+                self.reap()
+            # Решение о выходе под блокировкой: launch() либо видит поток живым, либо запускает новый
+            with self._lock:
+                if self._stop.is_set() or not self._children:
+                    self._reaper = None
+                    return
+
+    def reap(self) -> List[ProcessRecord]:
+        """Сбор завершившихся приложений. Возвращает их записи"""
+        finished = []
+        with self._lock:
+            for pid, (proc, record) in list(self._children.items()):
+                if proc.poll() is None:
+                    continue
+                record.returncode = proc.returncode
+                record.ended = time.perf_counter()
+                del self._children[pid]
+                finished.append(record)
+        for record in finished:
+            self.logger.debug(f"Процесс {record.name} (PID {record.pid}) завершился с кодом {record.returncode}")
+        return finished
+
+    def active(self) -> Dict[str, int]:
+        """Число отслеживаемых процессов: запущенные приложения и выполняемые скрипты"""
+        with self._lock:
+            return {"launched": len(self._children), "scripts": len(self._running)}
+
+    def shutdown(self):
+        """
+        Остановка выполняемых скриптов; запущенные приложения продолжают работать.
+        Следующий launch() снова запускает фоновый сбор.
+        """
+        self._stop.set()
+        with self._lock:
+            running = list(self._running.values())
+        for proc in running:
+            try:
+                self._terminate(proc)
+            except Exception as e:
+                self.logger.error(f"Ошибка остановки процесса {proc.pid}: {e}")
+        self.reap()
+
+
+# Тест
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    supervisor = ProcessSupervisor(default_timeout=1.0)
+
+    ok = supervisor.run([sys.executable, "-c", "print('ok')"])
+    print(f"Скрипт: код {ok.returncode}, {ok.duration * 1000:.0f} мс, успех {ok.ok}")
+
+    hung = supervisor.run([sys.executable, "-c", "import time; time.sleep(10)"], timeout=0.5)
+    print(f"Зависший скрипт: таймаут {hung.timed_out}, {hung.duration:.2f} с")
+
+    app = supervisor.launch([sys.executable, "-c", "import sys; sys.exit(3)"])
+    time.sleep(1.5)
+    print(f"Приложение: PID {app.pid}, код выхода {app.returncode}")
+    supervisor.shutdown()
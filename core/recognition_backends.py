@@ -0,0 +1,189 @@
+import functools
+import json
+import logging
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Type
+
+
+class RecognizerBackend:
+    """
+    Базовый интерфейс движка распознавания.
+
+    Звук подаётся порциями по мере захвата: begin() в начале фразы,
+    feed() для каждого блока PCM (int16, моно), end() возвращает итоговый текст.
+    Движки без потокового режима просто копят звук до end().
+    """
+    name = "base"
+
+    def __init__(self, config: dict):
+        self.config = config
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.sample_rate = 16000
+
+    def begin(self, sample_rate: int):
+        """Начало новой фразы"""
+        self.sample_rate = sample_rate
+
+    def feed(self, pcm: bytes):
+        """Очередной блок звука"""
+        raise NotImplementedError
+
+    def partial(self) -> Optional[str]:
+        """Промежуточная гипотеза (если движок её поддерживает)"""
+        return None
+
+    def end(self) -> Optional[str]:
+        """Завершение фразы. Возвращает текст или None, если речь не распознана"""
+        raise NotImplementedError
+
+    def recognize(self, pcm: bytes, sample_rate: int) -> Optional[str]:
+        """Распознавание целой фразы"""
+        self.begin(sample_rate)
+        self.feed(pcm)
+        return self.end()
+
+
+class GoogleBackend(RecognizerBackend):
+    """Облачное распознавание Google через speech_recognition"""
+    name = "google"
+
+    def __init__(self, config: dict):
+        super().__init__(config)
+        # Импорт здесь: speech_recognition тянет за собой много модулей
+        import speech_recognition as sr
+
+        self._sr = sr
+        self.recognizer = sr.Recognizer()
+        self._chunks: List[bytes] = []
+
+    def begin(self, sample_rate: int):
+        super().begin(sample_rate)
+        self._chunks = []
+
+    def feed(self, pcm: bytes):
+        self._chunks.append(pcm)
+
+    def end(self) -> Optional[str]:
+        audio = self._sr.AudioData(b"".join(self._chunks), self.sample_rate, 2)
+        self._chunks = []
+        try:
+            return self.recognizer.recognize_google(
+                audio,
+                language=self.config.get("language", "ru-RU")
+            ).lower()
+        except self._sr.UnknownValueError:
+            return None
+
+
+@functools.lru_cache(maxsize=2)
+def load_vosk_model(path: str):
+    """Модель Vosk (одна на процесс: её используют и распознавание, и поиск триггерного слова)"""
+    from vosk import Model, SetLogLevel
+
+    SetLogLevel(-1)
+    model_path = Path(path)
+    if not model_path.is_dir():
+        raise FileNotFoundError(f"Модель Vosk не найдена: {model_path}")
+    return Model(str(model_path))
+
+
+class VoskBackend(RecognizerBackend):
+    """
+    Офлайн-распознавание Vosk.
+
+    Звук уходит в KaldiRecognizer сразу по мере захвата, поэтому к концу
+    речи декодирована почти вся фраза и end() только дочитывает хвост.
+    """
+    name = "vosk"
+
+    def __init__(self, config: dict):
+        super().__init__(config)
+        # Импорт здесь: vosk и модель нужны только этому движку
+        from vosk import KaldiRecognizer
+
+        model_path = config.get("recognition", {}).get("vosk_model_path", "")
+        self._model = load_vosk_model(model_path)
+        self._recognizer_cls = KaldiRecognizer
+        self._recognizer = None
+        self._segments: List[str] = []
+        self.logger.info(f"Модель Vosk загружена: {model_path}")
+
+    def begin(self, sample_rate: int):
+        if self._recognizer is None or sample_rate != self.sample_rate:
+            self._recognizer = self._recognizer_cls(self._model, sample_rate)
+        else:
+            self._recognizer.Reset()
+        super().begin(sample_rate)
+        self._segments = []
+
+    def feed(self, pcm: bytes):
+        # True - Kaldi сам нашёл конец сегмента, забираем его текст
+        if self._recognizer.AcceptWaveform(pcm):
+            self._append(self._recognizer.Result())
+
+    def partial(self) -> Optional[str]:
+        text = json.loads(self._recognizer.PartialResult()).get("partial", "")
+        return " ".join(self._segments + [text]).strip() or None
+
+    def end(self) -> Optional[str]:
+        self._append(self._recognizer.FinalResult())
+        text = " ".join(self._segments).strip()
+        self._segments = []
+        return text or None
+
+    def _append(self, result: str):
+        text = json.loads(result).get("text", "")
+        if text:
+            self._segments.append(text)
+
+
+class StubBackend(RecognizerBackend):
+    """
+    Заглушка для тестов: возвращает заранее заданные фразы по очереди,
+    не анализируя звук.
+    """
+    name = "stub"
+
+    def __init__(self, config: dict, transcripts: Optional[Iterable[str]] = None):
+        super().__init__(config)
+        recognition_cfg = config.get("recognition", {})
+        if transcripts is None:
+            transcripts = recognition_cfg.get("stub_transcripts", [])
+        self.transcripts = deque(transcripts)
+        # Промежуточные гипотезы: следующая фраза открывается по словам с этой скоростью
+        self.words_per_second = recognition_cfg.get("stub_words_per_second", 0)
+        self.fed_bytes = 0
+        self._phrase_bytes = 0
+
+    def begin(self, sample_rate: int):
+        super().begin(sample_rate)
+        self._phrase_bytes = 0
+
+    def feed(self, pcm: bytes):
+        self.fed_bytes += len(pcm)
+        self._phrase_bytes += len(pcm)
+
+    def partial(self) -> Optional[str]:
+        if not self.words_per_second or not self.transcripts:
+            return None
+        words = int(self._phrase_bytes / (2 * self.sample_rate) * self.words_per_second)
+        return " ".join(self.transcripts[0].split()[:words]) or None
+
+    def end(self) -> Optional[str]:
+        return self.transcripts.popleft() if self.transcripts else None
+
+
+BACKENDS: Dict[str, Type[RecognizerBackend]] = {
+    GoogleBackend.name: GoogleBackend,
+    VoskBackend.name: VoskBackend,
+    StubBackend.name: StubBackend
+}
+
+
+def create_backend(config: dict) -> RecognizerBackend:
+    """Создание движка, указанного в config["recognition"]["backend"]"""
+    name = config.get("recognition", {}).get("backend", GoogleBackend.name)
+    if name not in BACKENDS:
+        raise ValueError(f"Неизвестный движок распознавания: {name}")
+    return BACKENDS[name](config)
@@ -0,0 +1,281 @@
+import hashlib
+import json
+import logging
+import mmap
+import os
+import shutil
+import struct
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Добавляем корень проекта в пути поиска модулей
+sys.path.append(str(Path(__file__).parent.parent))
+from core.audio_output import clip_to_float
+from core.sound_cache import SoundClip, load_wav
+from core.sound_processing import process_clip
+
+MAGIC = b"SAYBANK1"
+_HEADER = struct.Struct("<8sI")
+_ALIGN = 16
+SOURCE_EXTENSIONS = (".wav", ".mp3")
+_PROCESSING_KEYS = ("lead_ms", "tail_ms", "rms_db", "peak_db", "gain")
+
+logger = logging.getLogger("SoundBank")
+
+
+def _file_hash(path: Path) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _decode_wav(path: Path, sample_rate: int, channels: int) -> bytes:
+    clip = load_wav(path.stem, path)
+    samples = clip_to_float(clip, sample_rate, channels)
+    return (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+
+def _decode_ffmpeg(path: Path, sample_rate: int, channels: int) -> bytes:
+    """MP3 и прочие форматы декодируются ffmpeg только при сборке банка"""
+    ffmpeg = shutil.which("ffmpeg")
+    if not ffmpeg:
+        raise RuntimeError("ffmpeg не найден, MP3 не может быть сконвертирован")
+    result = subprocess.run(
+        [ffmpeg, "-v", "error", "-i", str(path), "-f", "s16le",
+         "-ac", str(channels), "-ar", str(sample_rate), "-"],
+        capture_output=True,
+        check=True
+    )
+    return result.stdout
+
+
+class SoundBank:
+    def __init__(self, path: str):
+        """
+        Упакованный банк звуков, отображённый в память.
+
+        Все звуки лежат в одном файле в едином формате (int16, общая частота
+        и число каналов), заголовок содержит смещения. Звук выдаётся как срез
+        отображения без копирования и декодирования.
+
+        :param path: Путь к файлу банка
+        """
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, header_len = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"Файл не является банком звуков: {self.path}")
+        header = json.loads(self._mmap[_HEADER.size:_HEADER.size + header_len].decode("utf-8"))
+
+        self.sample_rate: int = header["sample_rate"]
+        self.channels: int = header["channels"]
+        self.data_offset: int = header["data_offset"]
+        self.entries: Dict[str, Dict] = header["entries"]
+        # Исходники, которые не удалось сконвертировать (source, mtime_ns, size)
+        self.failed: Dict[str, Dict] = header.get("failed", {})
+        self.processing: Dict[str, Any] = header.get("processing", {})
+        self._view = memoryview(self._mmap)
+
+    def clip(self, sound_id: str) -> SoundClip:
+        """Звук по ID (срез отображения, без копирования)"""
+        entry = self.entries[sound_id]
+        start = self.data_offset + entry["offset"]
+        return SoundClip(
+            sound_id,
+            self._view[start:start + entry["length"]],
+            self.channels,
+            2,
+            self.sample_rate,
+            gain=entry.get("gain", 1.0)
+        )
+
+    def trim_report(self) -> Dict[str, Dict[str, float]]:
+        """Срезанная тишина по звукам: lead_ms (убранная задержка) и tail_ms"""
+        return {
+            sound_id: {"lead_ms": entry.get("lead_ms") or 0.0, "tail_ms": entry.get("tail_ms") or 0.0}
+            for sound_id, entry in self.entries.items()
+        }
+
+    def sound_ids(self) -> List[str]:
+        return list(self.entries.keys())
+
+    def close(self):
+        try:
+            if getattr(self, "_view", None) is not None:
+                self._view.release()
+                self._view = None
+            self._mmap.close()
+        except BufferError:
+            # Срезы ещё используются: отображение закроет сборщик мусора
+            pass
+        self._file.close()
+
+
+def _scan_sources(sounds_root: Path) -> Dict[str, Path]:
+    """ID звука -> исходный файл (WAV предпочтительнее одноимённого MP3)"""
+    sources: Dict[str, Path] = {}
+    for file in sorted(sounds_root.rglob("*")):
+        if file.suffix.lower() not in SOURCE_EXTENSIONS or not file.is_file():
+            continue
+        sound_id = file.relative_to(sounds_root).with_suffix("").as_posix()
+        if sound_id in sources and sources[sound_id].suffix.lower() == ".wav":
+            continue
+        sources[sound_id] = file
+    return sources
+
+
+def _read_entries(bank_path: Path) -> Optional[SoundBank]:
+    if not bank_path.exists():
+        return None
+    try:
+        return SoundBank(str(bank_path))
+    except Exception as e:
+        logger.warning(f"Старый банк не читается и будет пересобран: {e}")
+        return None
+
+
+def build_bank(sounds_root: str, bank_path: str, sample_rate: int = 44100,
+               channels: int = 2, force: bool = False,
+               silence_threshold_db: Optional[float] = -45.0,
+               target_loudness_db: Optional[float] = -20.0) -> Dict[str, Any]:
+    """
+    Сборка банка из всех WAV/MP3 в sounds_root.
+
+    Звук перекодируется, только если у исходника изменились время изменения
+    и содержимое (SHA-1) или формат банка. Остальные копируются из старого банка.
+    Неудачные исходники (например, MP3 без ffmpeg) запоминаются в индексе:
+    повторная неудача с тем же файлом не считается изменением банка.
+    При перекодировании тишина по краям обрезается, а выравнивающее усиление
+    сохраняется в индексе (см. sound_processing.process_clip).
+
+    :return: Счётчики converted, reused, failed, total и trimmed (lead_ms/tail_ms по звукам)
+    """
+    root, target = Path(sounds_root), Path(bank_path)
+    sources = _scan_sources(root)
+    processing = {"silence_threshold_db": silence_threshold_db, "target_loudness_db": target_loudness_db}
+    old = None if force else _read_entries(target)
+    if old and ((old.sample_rate, old.channels) != (sample_rate, channels) or old.processing != processing):
+        old.close()
+        old = None
+
+    report = {"converted": 0, "reused": 0, "failed": 0, "total": len(sources), "trimmed": {}}
+    entries: Dict[str, Dict] = {}
+    failed: Dict[str, Dict] = {}
+    chunks: List[bytes] = []
+    offset = 0
+    changed = old is None or set(old.entries) | set(old.failed) != set(sources)
+
+    try:
+        for sound_id, file in sources.items():
+            stat = file.stat()
+            meta = {"source": file.relative_to(root).as_posix(), "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+            prev = old.entries.get(sound_id) if old else None
+
+            pcm = None
+            if prev and prev["source"] == meta["source"]:
+                same_stat = (prev["mtime_ns"], prev["size"]) == (meta["mtime_ns"], meta["size"])
+                meta["sha1"] = prev["sha1"] if same_stat else _file_hash(file)
+                if meta["sha1"] == prev["sha1"]:
+                    pcm = bytes(old.clip(sound_id).data)
+                    meta.update({key: prev.get(key) for key in _PROCESSING_KEYS})
+                    report["reused"] += 1
+                    changed = changed or not same_stat
+            else:
+                meta["sha1"] = _file_hash(file)
+
+            if pcm is None:
+                try:
+                    if file.suffix.lower() == ".wav":
+                        pcm = _decode_wav(file, sample_rate, channels)
+                    else:
+                        pcm = _decode_ffmpeg(file, sample_rate, channels)
+                    clip, info = process_clip(
+                        SoundClip(sound_id, pcm, channels, 2, sample_rate),
+                        threshold_db=silence_threshold_db,
+                        target_db=target_loudness_db
+                    )
+                    pcm = bytes(clip.data)
+                    meta.update(info)
+                except Exception as e:
+                    logger.error(f"Не удалось сконвертировать {file}: {e}")
+                    report["failed"] += 1
+                    failed[sound_id] = {key: meta[key] for key in ("source", "mtime_ns", "size")}
+                    changed = changed or not old or old.failed.get(sound_id) != failed[sound_id]
+                    continue
+                report["converted"] += 1
+                changed = True
+
+            meta.update(offset=offset, length=len(pcm))
+            entries[sound_id] = meta
+            report["trimmed"][sound_id] = {"lead_ms": meta.get("lead_ms") or 0.0, "tail_ms": meta.get("tail_ms") or 0.0}
+            pad = -len(pcm) % _ALIGN
+            chunks.append(pcm + b"\0" * pad)
+            offset += len(pcm) + pad
+    finally:
+        if old:
+            old.close()
+
+    if not changed:
+        logger.info("Банк звуков актуален")
+        return report
+
+    header = {
+        "sample_rate": sample_rate,
+        "channels": channels,
+        "processing": processing,
+        "data_offset": 0,
+        "entries": entries,
+        "failed": failed
+    }
+    # Смещение данных зависит от длины заголовка, поэтому считаем его до стабилизации
+    while True:
+        raw = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        data_offset = _HEADER.size + len(raw)
+        data_offset += -data_offset % _ALIGN
+        if header["data_offset"] == data_offset:
+            break
+        header["data_offset"] = data_offset
+
+    tmp = target.with_suffix(target.suffix + ".tmp")
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(raw)))
+        f.write(raw)
+        f.write(b"\0" * (data_offset - _HEADER.size - len(raw)))
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(tmp, target)
+    logger.info(f"Банк звуков собран: {target} ({len(entries)} звуков, {offset / 1024 / 1024:.1f} МБ)")
+    return report
+
+
+if __name__ == "__main__":
+    # Сборка банка по настройкам из config.py
+    import config
+
+    logging.basicConfig(level=logging.INFO)
+    audio_cfg = config.config["audio"]
+    result = build_bank(
+        config.config["paths"]["sounds"],
+        config.config["paths"]["sound_bank"],
+        sample_rate=audio_cfg.get("sample_rate", 44100),
+        channels=audio_cfg.get("mixer_channels", 2),
+        force="--force" in sys.argv,
+        silence_threshold_db=audio_cfg.get("silence_threshold_db", -45.0),
+        target_loudness_db=audio_cfg.get("target_loudness_db", -20.0)
+    )
+    trimmed = result.pop("trimmed")
+    print(f"Результат сборки: {result}")
+    print("Срезано тишины, мс (начало = убранная задержка ответа):")
+    for sound_id, info in sorted(trimmed.items(), key=lambda item: -item[1]["lead_ms"]):
+        print(f"  {sound_id}: начало {info['lead_ms']:.1f}, конец {info['tail_ms']:.1f}")
+    print(f"  Итого задержки убрано: {sum(info['lead_ms'] for info in trimmed.values()):.1f}")
@@ -0,0 +1,133 @@
+import logging
+import threading
+import wave
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
+
+
+class SoundClip:
+    """Декодированный звук в памяти"""
+    __slots__ = ("sound_id", "data", "num_channels", "bytes_per_sample", "sample_rate", "gain", "samples")
+
+    def __init__(self, sound_id: str, data: bytes, num_channels: int,
+                 bytes_per_sample: int, sample_rate: int, gain: float = 1.0):
+        self.sound_id = sound_id
+        self.data = data
+        self.num_channels = num_channels
+        self.bytes_per_sample = bytes_per_sample
+        self.sample_rate = sample_rate
+        self.gain = gain  # Заранее рассчитанное выравнивание громкости
+        self.samples: Optional[Any] = None  # Кадры в формате микшера (numpy float32), если он используется
+
+    @property
+    def num_frames(self) -> int:
+        return len(self.data) // (self.num_channels * self.bytes_per_sample)
+
+    @property
+    def duration(self) -> float:
+        return self.num_frames / self.sample_rate
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.data) + (self.samples.nbytes if self.samples is not None else 0)
+
+
+def load_wav(sound_id: str, path: Path) -> SoundClip:
+    """Чтение WAV целиком в память (PCM без заголовка)"""
+    with wave.open(str(path), "rb") as wav:
+        return SoundClip(
+            sound_id,
+            wav.readframes(wav.getnframes()),
+            wav.getnchannels(),
+            wav.getsampwidth(),
+            wav.getframerate()
+        )
+
+
+class SoundCache:
+    def __init__(self, loader: Callable[[str], SoundClip], budget_bytes: int):
+        """
+        LRU-кэш декодированных звуков с ограничением по объёму.
+
+        :param loader: Функция загрузки звука по ID (вызывается при промахе)
+        :param budget_bytes: Максимальный суммарный размер звуков в памяти
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.loader = loader
+        self.budget_bytes = budget_bytes
+        self._clips: "OrderedDict[str, SoundClip]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, sound_id: str) -> SoundClip:
+        """Звук из кэша; при промахе загружается и вытесняет самые старые"""
+        with self._lock:
+            clip = self._clips.get(sound_id)
+            if clip is not None:
+                self._clips.move_to_end(sound_id)
+                self.hits += 1
+                return clip
+            self.misses += 1
+
+        clip = self.loader(sound_id)
+        self._store(clip)
+        return clip
+
+    def preload(self, sound_ids: Iterable[str]) -> int:
+        """Загрузка звуков заранее, пока хватает бюджета. Возвращает число загруженных"""
+        loaded = 0
+        for sound_id in sound_ids:
+            if sound_id in self._clips:
+                continue
+            try:
+                clip = self.loader(sound_id)
+            except Exception as e:
+                self.logger.error(f"Ошибка загрузки звука {sound_id}: {e}")
+                continue
+            if self._size + clip.nbytes > self.budget_bytes:
+                self.logger.debug(f"Бюджет кэша исчерпан, {sound_id} будет загружен по требованию")
+                break
+            self._store(clip)
+            loaded += 1
+        return loaded
+
+    def _store(self, clip: SoundClip):
+        with self._lock:
+            old = self._clips.pop(clip.sound_id, None)
+            if old is not None:
+                self._size -= old.nbytes
+            self._clips[clip.sound_id] = clip
+            self._size += clip.nbytes
+
+            # Последний добавленный звук не вытесняем, даже если он больше бюджета
+            while self._size > self.budget_bytes and len(self._clips) > 1:
+                _, evicted = self._clips.popitem(last=False)
+                self._size -= evicted.nbytes
+                self.evictions += 1
+
+    def invalidate(self, sound_id: Optional[str] = None):
+        """Сброс одного звука или всего кэша"""
+        with self._lock:
+            if sound_id is None:
+                self._clips.clear()
+                self._size = 0
+            elif sound_id in self._clips:
+                self._size -= self._clips.pop(sound_id).nbytes
+
+    def __contains__(self, sound_id: str) -> bool:
+        return sound_id in self._clips
+
+    def stats(self) -> Dict[str, int]:
+        """Счётчики попаданий/промахов и занятый объём"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "cached": len(self._clips),
+            "size_bytes": self._size,
+            "budget_bytes": self.budget_bytes
+        }
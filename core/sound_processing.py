@@ -0,0 +1,113 @@
+import math
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from core.sound_cache import SoundClip
+
+_FULL_SCALE = 32768.0
+
+
+def _frames(clip: SoundClip) -> np.ndarray:
+    if clip.bytes_per_sample != 2:
+        raise ValueError(f"Поддерживается только 16-битный PCM ({clip.sound_id})")
+    return np.frombuffer(clip.data, dtype=np.int16).reshape(-1, clip.num_channels)
+
+
+def find_sound_bounds(clip: SoundClip, threshold_db: float = -45.0,
+                      window_ms: float = 10.0, pad_ms: float = 5.0) -> Tuple[int, int]:
+    """
+    Границы звучащей части клипа (в кадрах).
+
+    Огибающая считается как максимум модуля по окнам window_ms, тишина -
+    окна ниже threshold_db относительно полной шкалы. К границам добавляется
+    pad_ms, чтобы не срезать атаку звука.
+    """
+    frames = _frames(clip)
+    total = len(frames)
+    window = max(1, int(clip.sample_rate * window_ms / 1000))
+    count = total // window
+    if count == 0:
+        return 0, total
+
+    peak = np.abs(frames.astype(np.int32)).max(axis=1)
+    envelope = peak[:count * window].reshape(count, window).max(axis=1)
+    if total > count * window:
+        envelope = np.append(envelope, peak[count * window:].max())
+
+    loud = np.flatnonzero(envelope > _FULL_SCALE * 10 ** (threshold_db / 20))
+    if not len(loud):
+        return 0, total  # Клип целиком тихий - не трогаем
+
+    pad = int(clip.sample_rate * pad_ms / 1000)
+    start = max(0, loud[0] * window - pad)
+    end = min(total, (loud[-1] + 1) * window + pad)
+    return int(start), int(end)
+
+
+def measure_loudness(clip: SoundClip) -> Tuple[float, float]:
+    """RMS и пик клипа в дБ относительно полной шкалы"""
+    frames = _frames(clip).astype(np.float64)
+    if not frames.size:
+        return -math.inf, -math.inf
+    rms = math.sqrt(float(np.mean(frames * frames))) / _FULL_SCALE
+    peak = float(np.abs(frames).max()) / _FULL_SCALE
+    to_db = lambda v: 20 * math.log10(v) if v > 0 else -math.inf
+    return to_db(rms), to_db(peak)
+
+
+def normalization_gain(rms_db: float, peak_db: float, target_db: float,
+                       max_gain_db: float = 12.0, ceiling_db: float = -0.1) -> float:
+    """Множитель, приводящий RMS к target_db без клиппинга пиков"""
+    if not math.isfinite(rms_db):
+        return 1.0
+    gain_db = min(target_db - rms_db, max_gain_db, ceiling_db - peak_db)
+    return 10 ** (gain_db / 20)
+
+
+def process_clip(clip: SoundClip, threshold_db: Optional[float] = -45.0,
+                 target_db: Optional[float] = -20.0) -> Tuple[SoundClip, Dict[str, float]]:
+    """
+    Обрезка тишины по краям и расчёт выравнивающего усиления.
+
+    Усиление не применяется к отсчётам, а сохраняется в clip.gain,
+    чтобы воспроизведение просто умножало на готовое число.
+
+    :param threshold_db: Порог тишины (None - не обрезать)
+    :param target_db: Целевой RMS (None - не выравнивать громкость)
+    :return: (обработанный клип, сведения: lead_ms, tail_ms, rms_db, peak_db, gain)
+    """
+    frame_bytes = clip.num_channels * clip.bytes_per_sample
+    total = clip.num_frames
+    start, end = (0, total) if threshold_db is None else find_sound_bounds(clip, threshold_db)
+
+    trimmed = clip
+    if (start, end) != (0, total):
+        trimmed = SoundClip(
+            clip.sound_id,
+            clip.data[start * frame_bytes:end * frame_bytes],
+            clip.num_channels,
+            clip.bytes_per_sample,
+            clip.sample_rate
+        )
+
+    rms_db, peak_db = measure_loudness(trimmed)
+    trimmed.gain = 1.0 if target_db is None else normalization_gain(rms_db, peak_db, target_db)
+
+    info = {
+        "lead_ms": round(start * 1000 / clip.sample_rate, 1),
+        "tail_ms": round((total - end) * 1000 / clip.sample_rate, 1),
+        "rms_db": round(rms_db, 2) if math.isfinite(rms_db) else None,
+        "peak_db": round(peak_db, 2) if math.isfinite(peak_db) else None,
+        "gain": round(trimmed.gain, 4)
+    }
+    return trimmed, info
+
+
+def apply_gain(clip: SoundClip) -> SoundClip:
+    """Копия клипа с применённым clip.gain (для выходов без своей регулировки громкости)"""
+    if abs(clip.gain - 1.0) < 1e-3:
+        return clip
+    scaled = _frames(clip).astype(np.float32) * clip.gain
+    data = np.clip(scaled, -_FULL_SCALE, _FULL_SCALE - 1).astype(np.int16).tobytes()
+    return SoundClip(clip.sound_id, data, clip.num_channels, clip.bytes_per_sample, clip.sample_rate)
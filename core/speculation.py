@@ -0,0 +1,218 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.command_index import CommandEntry, CommandMatch
+from core.tracing import tracer
+
+# Подготовка команды: загрузка звука, поиск процессов режима и т.п.
+Warmer = Callable[[CommandMatch], None]
+
+
+@dataclass
+class Speculation:
+    """Команда, предсказанная по промежуточной гипотезе одной фразы"""
+    utterance: int
+    entry: CommandEntry
+    text: str
+    started: float
+    ready: Optional[float] = None  # Когда подготовка закончилась (None - прервана или ещё идёт)
+
+
+def _same_command(a: CommandEntry, b: CommandEntry) -> bool:
+    # После горячей перезагрузки та же команда - другой объект
+    return a is b or (a.category == b.category and a.phrase == b.phrase)
+
+
+class Speculator:
+    def __init__(self, match: Callable[[str], Optional[CommandMatch]], warmers: List[Warmer],
+                 min_score: float = 0.9, keep: int = 4):
+        """
+        Упреждающая подготовка команды по промежуточным гипотезам распознавания.
+
+        Гипотезы принимает offer() (из потока распознавания, без ожидания),
+        сопоставляет и готовит фоновый поток: обрабатывается только самая
+        свежая гипотеза. Как только гипотеза однозначно указывает на одну
+        команду, для неё по очереди вызываются warmers. Выполняется команда
+        как обычно, по итоговому тексту; resolve() сверяет её с предсказанием.
+
+        Неверное предсказание ничего не меняет в системе (подготовка только
+        заполняет кэши), поэтому отмена - просто пропуск оставшихся шагов,
+        когда приходит новая гипотеза.
+
+        :param match: Поиск команды по тексту (CommandIndex.match)
+        :param warmers: Шаги подготовки найденной команды
+        :param min_score: Минимальная оценка нечёткого совпадения для предсказания
+        :param keep: Сколько последних фраз помнить до итогового текста
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.match = match
+        self.warmers = warmers
+        self.min_score = min_score
+        self.keep = keep
+        self._pending: "OrderedDict[int, Speculation]" = OrderedDict()
+        self._latest: Optional[Tuple[int, str]] = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._running = True
+        self._counters = {
+            "partials": 0,
+            "speculated": 0,
+            "cancelled": 0,
+            "hits": 0,
+            "misses": 0,
+            "abandoned": 0,
+            "unpredicted": 0
+        }
+        self._thread = threading.Thread(target=self._run, name="speculation", daemon=True)
+        self._thread.start()
+
+    def offer(self, text: str):
+        """Новая промежуточная гипотеза текущей фразы (без триггерного слова)"""
+        utterance = tracer.current_utterance()
+        if utterance is None or not text:
+            return
+        with self._wake:
+            self._latest = (utterance, text)
+            self._generation += 1
+            self._counters["partials"] += 1
+            self._wake.notify()
+
+    def resolve(self, match: Optional[CommandMatch]) -> Optional[bool]:
+        """
+        Итоговая команда фразы. True - предсказание совпало, False - нет,
+        None - предсказания не было (или команда пришла не голосом).
+        """
+        utterance = tracer.current_utterance()
+        if utterance is None:
+            return None
+        with self._lock:
+            speculation = self._pending.pop(utterance, None)
+            # Подготовка этой фразы больше не нужна, в том числе уже начатая
+            if self._latest and self._latest[0] == utterance:
+                self._latest = None
+            self._generation += 1
+            if speculation is None:
+                self._counters["unpredicted"] += 1
+                return None
+            hit = match is not None and _same_command(speculation.entry, match.entry)
+            self._counters["hits" if hit else "misses"] += 1
+
+        if hit and speculation.ready is not None:
+            # Насколько раньше итогового текста команда была готова
+            tracer.record("speculation_lead", time.perf_counter() - speculation.ready, utterance)
+        if not hit:
+            self.logger.debug(f"Предсказание не подтвердилось: '{speculation.entry.phrase}'")
+        return hit
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            result = dict(self._counters)
+        decided = result["hits"] + result["misses"] + result["abandoned"]
+        result["hit_rate"] = round(result["hits"] / decided, 3) if decided else 0.0
+        return result
+
+    def close(self):
+        with self._wake:
+            self._running = False
+            self._wake.notify()
+        self._thread.join(2.0)
+
+    def _run(self):
+        while True:
+            with self._wake:
+                while self._running and self._latest is None:
+                    self._wake.wait()
+                if not self._running:
+                    return
+                utterance, text = self._latest
+                self._latest = None
+                generation = self._generation
+            try:
+                self._speculate(utterance, text, generation)
+            except Exception as e:
+                self.logger.error(f"Ошибка подготовки команды: {e}")
+
+    def _speculate(self, utterance: int, text: str, generation: int):
+        match = self.match(text)
+        if match is None or match.score < self.min_score:
+            return  # Неоднозначно: прежнее предсказание (если было) остаётся в силе
+
+        with self._lock:
+            if generation != self._generation:
+                return  # Уже есть гипотеза новее
+            current = self._pending.get(utterance)
+            if current is not None and _same_command(current.entry, match.entry):
+                return
+            if current is not None:
+                self._counters["cancelled"] += 1
+            speculation = Speculation(utterance, match.entry, text, time.perf_counter())
+            self._pending[utterance] = speculation
+            self._pending.move_to_end(utterance)
+            while len(self._pending) > self.keep:
+                # Фраза так и не дошла до выполнения (например, без триггерного слова)
+                self._pending.popitem(last=False)
+                self._counters["abandoned"] += 1
+            self._counters["speculated"] += 1
+
+        for warm in self.warmers:
+            # Замену предсказания считает _speculate новой гипотезы, здесь - только остановка
+            if not self._still_wanted(speculation, generation):
+                return
+            warm(match)
+        speculation.ready = time.perf_counter()
+        tracer.record("speculation", speculation.ready - speculation.started, utterance)
+        self.logger.debug(f"Подготовлена команда '{match.entry.phrase}' по гипотезе '{text}'")
+
+    def _still_wanted(self, speculation: Speculation, generation: int) -> Optional[bool]:
+        """
+        Продолжать ли подготовку: False - новая гипотеза указывает на другую
+        команду, None - фраза уже выполняется по итоговому тексту.
+        """
+        with self._lock:
+            if generation == self._generation:
+                return True
+            if self._pending.get(speculation.utterance) is not speculation:
+                return None
+            latest = self._latest
+        if latest is None or latest[0] != speculation.utterance:
+            return True
+        match = self.match(latest[1])
+        if match is None or match.score < self.min_score:
+            return True
+        return _same_command(match.entry, speculation.entry)
+
+
+# Тест
+if __name__ == "__main__":
+    from core.command_index import CommandIndex
+
+    logging.basicConfig(level=logging.DEBUG)
+    index = CommandIndex({
+        "громкость": {
+            "громкость (\\d+)": {"action": "set_volume", "regex": True, "params": {"level": "$1"}},
+            "выключи звук": {"action": "set_mute", "sound": "volume/mute"}
+        },
+        "режимы": {"включи игровой режим": {"action": "activate_mode", "params": {"mode": "игровой"}}}
+    })
+    warmed = []
+    speculator = Speculator(index.match, [lambda m: warmed.append(m.entry.phrase), lambda m: time.sleep(0.01)])
+
+    for utterance, partials, final in (
+        (1, ["включи", "включи игровой", "включи игровой режим"], "включи игровой режим"),
+        (2, ["громкость", "громкость 5", "громкость 50"], "громкость 50"),
+        (3, ["выключи звук"], "громкость 20"),
+    ):
+        tracer.bind(utterance)
+        for text in partials:
+            speculator.offer(text)
+            time.sleep(0.03)
+        print(utterance, final, "->", speculator.resolve(index.match(final)))
+    tracer.bind(None)
+    speculator.close()
+    print("Подготовлено:", warmed)
+    print(speculator.stats())
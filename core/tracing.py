@@ -0,0 +1,236 @@
+import contextvars
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+# Номер фразы, к которой относятся замеры в текущем потоке
+_utterance: contextvars.ContextVar = contextvars.ContextVar("utterance", default=None)
+
+
+class LatencyHistogram:
+    """
+    Гистограмма задержек в духе HdrHistogram.
+
+    Значения хранятся в микросекундах в логарифмически-линейных корзинах:
+    2**SUB_BITS корзин на каждую степень двойки, поэтому относительная
+    ошибка перцентилей меньше 1% при постоянной стоимости записи.
+    """
+    SUB_BITS = 8
+    MAX_US = 1 << 36  # ~19 часов
+
+    __slots__ = ("counts", "count", "total_us", "min_us", "max_us")
+
+    def __init__(self):
+        half = 1 << (self.SUB_BITS - 1)
+        size = (1 << self.SUB_BITS) + (self.MAX_US.bit_length() - self.SUB_BITS) * half
+        self.counts = [0] * size
+        self.count = 0
+        self.total_us = 0
+        self.min_us = 0
+        self.max_us = 0
+
+    @classmethod
+    def _index(cls, value: int) -> int:
+        if value < (1 << cls.SUB_BITS):
+            return value
+        shift = value.bit_length() - cls.SUB_BITS
+        half = 1 << (cls.SUB_BITS - 1)
+        return (1 << cls.SUB_BITS) + (shift - 1) * half + ((value >> shift) - half)
+
+    @classmethod
+    def _value(cls, index: int) -> int:
+        """Середина корзины в микросекундах"""
+        full = 1 << cls.SUB_BITS
+        if index < full:
+            return index
+        half = full >> 1
+        shift = (index - full) // half + 1
+        base = ((index - full) % half + half) << shift
+        return base + (1 << shift) // 2
+
+    def record(self, seconds: float):
+        value = min(max(int(seconds * 1_000_000), 0), self.MAX_US - 1)
+        self.counts[self._index(value)] += 1
+        if not self.count or value < self.min_us:
+            self.min_us = value
+        self.max_us = max(self.max_us, value)
+        self.count += 1
+        self.total_us += value
+
+    def percentile(self, p: float) -> float:
+        """Перцентиль в миллисекундах"""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * p / 100))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(self._value(index), self.max_us) / 1000
+        return self.max_us / 1000
+
+    def summary(self) -> Dict[str, float]:
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "p50_ms": round(self.percentile(50), 2),
+            "p95_ms": round(self.percentile(95), 2),
+            "p99_ms": round(self.percentile(99), 2),
+            "min_ms": round(self.min_us / 1000, 2),
+            "max_ms": round(self.max_us / 1000, 2),
+            "mean_ms": round(self.total_us / self.count / 1000, 2)
+        }
+
+
+class _NullSpan:
+    """Заглушка, когда трассировка выключена"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "start")
+
+    def __init__(self, tracer: "Tracer", name: str):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Tracer:
+    def __init__(self, enabled: bool = False, keep_traces: int = 32):
+        """
+        Замеры задержек по этапам обработки фразы.
+
+        Каждый этап пишется в свою гистограмму, а для последних
+        keep_traces фраз сохраняется список этапов. В выключенном
+        состоянии span() возвращает общую заглушку без замера времени.
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.enabled = enabled
+        self.keep_traces = keep_traces
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._traces: "OrderedDict[int, List[Tuple[str, float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def span(self, name: str):
+        """Контекстный менеджер замера этапа: with tracer.span("recognition"): ..."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def record(self, name: str, seconds: float, utterance: Optional[int] = None):
+        """Запись готового замера (секунды)"""
+        if not self.enabled:
+            return
+        if utterance is None:
+            utterance = _utterance.get()
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = LatencyHistogram()
+            histogram.record(seconds)
+            if utterance is not None:
+                trace = self._traces.get(utterance)
+                if trace is None:
+                    trace = self._traces[utterance] = []
+                    if len(self._traces) > self.keep_traces:
+                        self._traces.popitem(last=False)
+                trace.append((name, seconds))
+
+    @staticmethod
+    def bind(utterance: Optional[int]):
+        """Привязка последующих замеров текущего потока к фразе"""
+        _utterance.set(utterance)
+
+    @staticmethod
+    def current_utterance() -> Optional[int]:
+        """Фраза, к которой привязан текущий поток (None - не привязан)"""
+        return _utterance.get()
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """p50/p95/p99 по всем этапам"""
+        with self._lock:
+            return {name: h.summary() for name, h in sorted(self._histograms.items())}
+
+    def trace(self, utterance: int) -> List[Tuple[str, float]]:
+        """Этапы одной фразы: [(имя, секунды)]"""
+        with self._lock:
+            return list(self._traces.get(utterance, ()))
+
+    def last_traces(self) -> Dict[int, List[Tuple[str, float]]]:
+        with self._lock:
+            return {uid: list(spans) for uid, spans in self._traces.items()}
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._traces.clear()
+
+    def dump(self, logger: Optional[logging.Logger] = None):
+        """Вывод таблицы перцентилей в лог"""
+        logger = logger or self.logger
+        report = self.report()
+        if not report:
+            logger.info("Замеров задержек нет")
+            return
+        lines = [f"{'этап':<24}{'n':>7}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}  (мс)"]
+        for name, s in report.items():
+            lines.append(
+                f"{name:<24}{s['count']:>7}{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}"
+                f"{s['p99_ms']:>10.1f}{s['max_ms']:>10.1f}"
+            )
+        logger.info("Задержки по этапам:\n" + "\n".join(lines))
+
+
+# Общий трассировщик процесса; включается через configure()
+tracer = Tracer()
+
+
+def configure(config: dict) -> Tracer:
+    """Включение трассировки по разделу tracing конфига"""
+    tracing_cfg = config.get("tracing", {})
+    tracer.enabled = tracing_cfg.get("enabled", False)
+    tracer.keep_traces = tracing_cfg.get("keep_traces", tracer.keep_traces)
+    return tracer
+
+
+# Тест
+if __name__ == "__main__":
+    import random
+
+    logging.basicConfig(level=logging.INFO)
+    tracer.enabled = True
+    for uid in range(1, 1001):
+        tracer.bind(uid)
+        tracer.record("recognition", random.lognormvariate(-1.5, 0.5))
+        with tracer.span("matching"):
+            sum(range(1000))
+    tracer.dump()
+    print("Последняя фраза:", tracer.trace(1000))
+
+    tracer.enabled = False
+    started = time.perf_counter()
+    for _ in range(100_000):
+        with tracer.span("matching"):
+            pass
+    print(f"Выключенный span: {(time.perf_counter() - started) * 10:.3f} мкс")
@@ -1,14 +1,18 @@
 import logging
-import time
+from fnmatch import fnmatch
 from pathlib import Path
-from typing import Dict, Optional
-import simpleaudio as sa
+from typing import Any, Dict, Optional
 import sys
 from pathlib import Path
 
 # Добавляем корень проекта в пути поиска модулей
 sys.path.append(str(Path(__file__).parent.parent))
 import config
+from core.sound_cache import SoundCache, SoundClip, load_wav
+from core.audio_output import Mixer, clip_to_float, create_sink
+from core.sound_bank import SoundBank, build_bank
+from core.sound_processing import apply_gain, process_clip
+from core.tracing import tracer
 
 class VoiceEngine:
     def __init__(self, config: dict):
@@ -19,52 +23,118 @@ class VoiceEngine:
         """
         self._setup_logging()
         self.sounds_root = Path(config["paths"]["sounds"])
+        audio_cfg = config.get("audio", {})
+        self._audio_cfg = audio_cfg
+        self._preload_patterns = audio_cfg.get("preload_sounds", ["*"])
+        self._bank_path = config["paths"].get("sound_bank")
+        self._bank: Optional[SoundBank] = None
         self._loaded_sounds: Dict[str, Path] = {}
-        self._current_play_obj: Optional[sa.PlayObject] = None
+        self._trimmed: Dict[str, Dict[str, float]] = {}
+        self._cache = SoundCache(
+            self._load_clip,
+            budget_bytes=int(audio_cfg.get("cache_budget_mb", 32) * 1024 * 1024)
+        )
+        self._current_play_obj: Optional[Any] = None  # simpleaudio.PlayObject
+        self._mixer: Optional[Mixer] = None
+        if audio_cfg.get("output", "simpleaudio") == "mixer":
+            self._init_mixer(audio_cfg)
         self._preload_sounds()
         self.logger.info("Голосовой движок инициализирован")
 
     def _setup_logging(self):
-        """Настройка системы логирования"""
+        """Логгер движка (вывод настраивает core.log_setup при запуске)"""
         self.logger = logging.getLogger(self.__class__.__name__)
-        self.logger.setLevel(logging.INFO)
-        
-        # Вывод логов в консоль для удобства отладки
-        handler = logging.StreamHandler()
-        handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-        self.logger.addHandler(handler)
+
+    def _init_mixer(self, audio_cfg: dict):
+        """Один постоянно открытый выходной поток с микшированием звуков"""
+        self._mixer = Mixer(
+            sample_rate=audio_cfg.get("sample_rate", 44100),
+            channels=audio_cfg.get("mixer_channels", 2),
+            duck_level=audio_cfg.get("duck_level", 0.3)
+        )
+        self._sink = create_sink(audio_cfg)
+        self._sink.start(self._mixer)
 
     def _preload_sounds(self):
-        """Предварительная загрузка всех звуковых файлов"""
+        """
+        Поиск звуковых файлов и декодирование часто используемых в память.
+        Остальные загружаются при первом воспроизведении.
+        """
         try:
-            # Создаем папку sounds, если её нет
-            self.sounds_root.mkdir(exist_ok=True, parents=True)
-            
-            # Ищем только .wav файлы
-            sound_files = list(self.sounds_root.rglob("*.wav"))
-            
-            if not sound_files:
-                self.logger.warning(f"В папке {self.sounds_root} не найдено .wav файлов")
+            if not self._open_bank():
+                self._scan_sounds()
+            if not self._loaded_sounds:
                 return
 
-            for file in sound_files:
-                # Создаем ID звука (относительный путь без расширения)
-                sound_id = str(file.relative_to(self.sounds_root)).replace("\\", "/")[:-4]
-                self._loaded_sounds[sound_id] = file
-                self.logger.debug(f"Загружен звук: {sound_id}")
-
-            self.logger.info(f"Успешно загружено {len(self._loaded_sounds)} звуков")
+            preload = [
+                sound_id for sound_id in self._loaded_sounds
+                if any(fnmatch(sound_id, pattern) for pattern in self._preload_patterns)
+            ]
+            decoded = self._cache.preload(preload)
+            self.logger.info(f"Успешно загружено {len(self._loaded_sounds)} звуков (в памяти: {decoded})")
 
         except Exception as e:
             self.logger.error(f"Ошибка при загрузке звуков: {e}")
             raise
 
-    def play(self, sound_id: str, blocking: bool = False) -> bool:
+    def _open_bank(self) -> bool:
+        """Подключение упакованного банка звуков (без обхода папки sounds)"""
+        if not self._bank_path:
+            return False
+        try:
+            if self._audio_cfg.get("sound_bank_auto_build", False):
+                build_bank(
+                    str(self.sounds_root),
+                    self._bank_path,
+                    sample_rate=self._audio_cfg.get("sample_rate", 44100),
+                    channels=self._audio_cfg.get("mixer_channels", 2),
+                    silence_threshold_db=self._audio_cfg.get("silence_threshold_db", -45.0),
+                    target_loudness_db=self._audio_cfg.get("target_loudness_db", -20.0)
+                )
+            if not Path(self._bank_path).exists():
+                # MP3 декодируются только при сборке, не при запуске
+                self.logger.warning(
+                    f"Банк звуков {self._bank_path} не найден, используются .wav файлы "
+                    f"(собрать: python -m core.sound_bank)"
+                )
+                return False
+            self._bank = SoundBank(self._bank_path)
+        except Exception as e:
+            self.logger.error(f"Ошибка открытия банка звуков, используются файлы: {e}")
+            return False
+
+        for sound_id, entry in self._bank.entries.items():
+            self._loaded_sounds[sound_id] = self.sounds_root / entry["source"]
+        self._trimmed.update(self._bank.trim_report())
+        self.logger.info(f"Подключён банк звуков: {self._bank_path}")
+        return True
+
+    def _scan_sounds(self):
+        """Поиск .wav файлов в папке sounds"""
+        # Создаем папку sounds, если её нет
+        self.sounds_root.mkdir(exist_ok=True, parents=True)
+
+        # Ищем только .wav файлы
+        sound_files = list(self.sounds_root.rglob("*.wav"))
+
+        if not sound_files:
+            self.logger.warning(f"В папке {self.sounds_root} не найдено .wav файлов")
+            return
+
+        for file in sound_files:
+            # Создаем ID звука (относительный путь без расширения)
+            sound_id = str(file.relative_to(self.sounds_root)).replace("\\", "/")[:-4]
+            self._loaded_sounds[sound_id] = file
+            self.logger.debug(f"Загружен звук: {sound_id}")
+
+    def play(self, sound_id: str, blocking: bool = False, gain: float = 1.0, duck: bool = False) -> bool:
         """
         Воспроизведение звука
         
         :param sound_id: Идентификатор звука (например "system/start")
         :param blocking: Блокировать ли выполнение пока звук не закончится
+        :param gain: Громкость звука (только в режиме микшера)
+        :param duck: Приглушать остальные звуки, пока играет этот (только в режиме микшера)
         :return: Успешность воспроизведения
         """
         if sound_id not in self._loaded_sounds:
@@ -72,24 +142,44 @@ class VoiceEngine:
             return False
 
         try:
-            self.stop()  # Останавливаем текущее воспроизведение
-            
-            wave_obj = sa.WaveObject.from_wave_file(str(self._loaded_sounds[sound_id]))
-            self._current_play_obj = wave_obj.play()
+            # Замер до начала звучания, без ожидания окончания звука
+            with tracer.span("playback"):
+                clip = self._cache.get(sound_id)
+                if self._mixer:
+                    voice = self._mixer.play(sound_id, clip.samples, gain=gain * clip.gain, duck=duck)
+                else:
+                    # Импорт здесь: в режиме микшера simpleaudio не нужен
+                    import simpleaudio as sa
+
+                    self.stop()  # Останавливаем текущее воспроизведение
+                    self._current_play_obj = sa.play_buffer(
+                        clip.data,
+                        clip.num_channels,
+                        clip.bytes_per_sample,
+                        clip.sample_rate
+                    )
+
             self.logger.info(f"Воспроизводится звук: {sound_id}")
 
             if blocking:
-                while self.is_playing():
-                    time.sleep(0.1)
-            
+                voice.wait() if self._mixer else self._current_play_obj.wait_done()
+
             return True
             
         except Exception as e:
             self.logger.error(f"Ошибка воспроизведения звука {sound_id}: {e}")
             return False
 
+    def prefetch(self, sound_id: str) -> bool:
+        """Загрузка звука в кэш заранее, без воспроизведения"""
+        if sound_id not in self._loaded_sounds:
+            return False
+        return sound_id in self._cache or self._cache.preload([sound_id]) > 0
+
     def stop(self):
         """Остановка текущего воспроизведения"""
+        if self._mixer:
+            self._mixer.stop_all()
         if self._current_play_obj and self._current_play_obj.is_playing():
             self._current_play_obj.stop()
             self._current_play_obj = None
@@ -97,15 +187,57 @@ class VoiceEngine:
 
     def is_playing(self) -> bool:
         """Проверка, идет ли воспроизведение"""
+        if self._mixer:
+            return self._mixer.active() > 0
         return self._current_play_obj is not None and self._current_play_obj.is_playing()
 
+    def close(self):
+        """Остановка звуков и закрытие выходного потока"""
+        self.stop()
+        if self._mixer:
+            self._sink.stop()
+        if self._bank:
+            self._cache.invalidate()
+            self._bank.close()
+            self._bank = None
+
+    def _load_clip(self, sound_id: str) -> SoundClip:
+        """Звук из банка или декодирование с диска (вызывается кэшем при промахе)"""
+        if self._bank:
+            clip = self._bank.clip(sound_id)
+        else:
+            # Банк уже обработан при сборке, файлы обрабатываются один раз при загрузке
+            clip, info = process_clip(
+                load_wav(sound_id, self._loaded_sounds[sound_id]),
+                threshold_db=self._audio_cfg.get("silence_threshold_db", -45.0),
+                target_db=self._audio_cfg.get("target_loudness_db", -20.0)
+            )
+            self._trimmed[sound_id] = {"lead_ms": info["lead_ms"], "tail_ms": info["tail_ms"]}
+            self.logger.debug(f"Звук {sound_id}: срезано {info['lead_ms']} + {info['tail_ms']} мс, усиление {info['gain']}")
+
+        if self._mixer:
+            # Перевод в формат микшера (float, его частота и каналы) один раз на звук, а не на каждое воспроизведение
+            clip.samples = clip_to_float(clip, self._mixer.sample_rate, self._mixer.channels)
+            return clip
+        # У simpleaudio нет своей громкости, поэтому усиление применяется один раз здесь
+        return apply_gain(clip)
+
+    def get_trim_report(self) -> Dict[str, Dict[str, float]]:
+        """Срезанная тишина у загруженных звуков: lead_ms (убранная задержка) и tail_ms"""
+        return dict(self._trimmed)
+
     def get_loaded_sounds(self) -> list:
         """Получить список загруженных звуков"""
         return list(self._loaded_sounds.keys())
 
+    def get_cache_stats(self) -> Dict[str, int]:
+        """Статистика кэша звуков (попадания, промахи, объём)"""
+        return self._cache.stats()
+
 
 if __name__ == "__main__":
     # Тестовый запуск
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     print("\nТестирование VoiceEngine...")
     try:
         engine = VoiceEngine(config.config)
@@ -116,6 +248,7 @@ if __name__ == "__main__":
             test_sound = engine.get_loaded_sounds()[0]  # Берем первый доступный звук
             print(f"\nТестируем воспроизведение: {test_sound}")
             engine.play(test_sound, blocking=True)
+            print(f"Кэш: {engine.get_cache_stats()}")
             print("Тест завершен успешно!")
         else:
             print("Нет звуков для тестирования. Добавьте .wav файлы в папку sounds/")
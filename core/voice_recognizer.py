@@ -1,8 +1,7 @@
 import sys
 import logging
 from pathlib import Path
-import speech_recognition as sr
-from typing import Optional
+from typing import Any, Callable, Dict, Iterable, Optional, Union
 
 # Добавляем корень проекта в пути импорта
 sys.path.append(str(Path(__file__).parent.parent))
@@ -12,25 +11,86 @@ try:
 except ImportError:
     raise ImportError("Не найден config.py в корне проекта!")
 
+from core.audio_capture import MicrophoneStream, NoiseFloorTracker, UtteranceSegmenter
+from core.audio_sources import ReplaySource, create_source
+from core.recognition_backends import RecognizerBackend, create_backend
+from core.tracing import tracer
+
 class VoiceRecognizer:
     def __init__(self, config: dict):
         """
         Инициализация распознавателя голоса.
         
-        :param config: Конфиг из config.py (разделы 'microphone' и 'language')
+        :param config: Конфиг из config.py (разделы 'microphone', 'recognition' и 'language')
         """
         self.config = config
         self.logger = logging.getLogger(self.__class__.__name__)
-        self.recognizer = sr.Recognizer()
-        self.microphone = self._init_microphone()
-        self._calibrate()
+        self.recognizer = None
+        self.backend: RecognizerBackend = create_backend(config)
+        self.capture_mode = self.config["microphone"].get("capture_mode", "stream")
+        self.stream: Optional[Union[MicrophoneStream, ReplaySource]] = None
+        self.segmenter: Optional[UtteranceSegmenter] = None
+        self.empty_results = 0  # Фразы, в которых движок не нашёл речи
+
+        # Запись (файл, stdin) всегда читается через поток с кольцевым буфером
+        if self.capture_mode == "stream" or self.config["microphone"].get("source", "microphone") != "microphone":
+            self.microphone = None
+            self._init_stream()
+        else:
+            # Импорт здесь: speech_recognition нужен только для открытия микрофона на каждую фразу
+            import speech_recognition as sr
+
+            self._sr = sr
+            self.recognizer = sr.Recognizer()
+            # Порог подстраивается под шум сам speech_recognition, без калибровки при запуске
+            self.recognizer.energy_threshold = self.config["microphone"].get("energy_threshold", 300)
+            self.recognizer.dynamic_energy_threshold = self.config["microphone"].get("noise_tracking", True)
+            self.microphone = self._init_microphone()
+
+    def _init_stream(self):
+        """
+        Постоянно открытый поток микрофона (или записи) с кольцевым буфером.
+
+        Калибровки при запуске нет: уровень шума отслеживается по самому
+        потоку (NoiseFloorTracker), порог меняется вместе с обстановкой.
+        """
+        mic_cfg = self.config["microphone"]
+        try:
+            self.stream = create_source(self.config)
+            self.stream.open()
+            noise = None
+            if mic_cfg.get("noise_tracking", True):
+                noise = NoiseFloorTracker(
+                    self.stream.sample_rate,
+                    window=mic_cfg.get("noise_window", 4.0),
+                    percentile=mic_cfg.get("noise_percentile", 20.0),
+                    onset_db=mic_cfg.get("onset_db", 9.0),
+                    release_db=mic_cfg.get("release_db", 5.0),
+                    min_energy=mic_cfg.get("min_energy", 50.0)
+                )
+            self.segmenter = UtteranceSegmenter(
+                self.stream.buffer,
+                sample_rate=self.stream.sample_rate,
+                block_size=self.stream.block_size,
+                # По умолчанию - значения speech_recognition.Recognizer
+                energy_threshold=mic_cfg.get("energy_threshold", 300),
+                pause_threshold=mic_cfg.get("pause_threshold", 0.8),
+                pre_roll=mic_cfg.get("pre_roll", 0.3),
+                phrase_limit=mic_cfg.get("phrase_limit", 5),
+                noise=noise,
+                min_speech=mic_cfg.get("min_speech", 0.1)
+            )
+        except Exception as e:
+            self.logger.error(f"Ошибка открытия потока микрофона: {e}")
+            self.stream = None
+            self.segmenter = None
 
-    def _init_microphone(self) -> Optional[sr.Microphone]:
+    def _init_microphone(self) -> Optional["sr.Microphone"]:
         """Настройка микрофона с учетом конфига"""
         try:
             device_index = self.config["microphone"].get("device_index")
             sample_rate = self.config["audio"].get("sample_rate", 44100)
-            return sr.Microphone(
+            return self._sr.Microphone(
                 device_index=device_index,
                 sample_rate=sample_rate
             )
@@ -38,57 +98,133 @@ class VoiceRecognizer:
             self.logger.error(f"Ошибка инициализации микрофона: {e}")
             return None
 
-    def _calibrate(self):
-        """Калибровка уровня фонового шума"""
-        if not self.microphone:
-            return
-            
-        try:
-            with self.microphone as source:
-                self.recognizer.adjust_for_ambient_noise(
-                    source, 
-                    duration=self.config["microphone"].get("calibration_duration", 1.0)
+    @property
+    def sample_rate(self) -> int:
+        """Частота дискретизации захватываемого звука"""
+        if self.stream:
+            return self.stream.sample_rate
+        return self.microphone.SAMPLE_RATE
+
+    @property
+    def stream_time(self) -> Optional[float]:
+        """Позиция в захваченном звуке (сек) - для записи идёт быстрее реального времени"""
+        if not self.segmenter:
+            return None
+        return self.segmenter.cursor / self.stream.sample_rate
+
+    def noise_stats(self) -> Dict[str, Any]:
+        """Текущий уровень шума, пороги и ложные срабатывания"""
+        stats: Dict[str, Any] = {"empty_results": self.empty_results}
+        if self.segmenter:
+            stats["false_triggers"] = self.segmenter.false_triggers
+            noise = self.segmenter.noise
+            if noise:
+                stats.update(
+                    floor=round(noise.floor, 1),
+                    onset_threshold=round(noise.onset_threshold, 1),
+                    release_threshold=round(noise.release_threshold, 1)
                 )
-            self.logger.info("Микрофон откалиброван")
-        except Exception as e:
-            self.logger.error(f"Ошибка калибровки: {e}")
+            else:
+                stats["threshold"] = self.segmenter.energy_threshold
+        elif self.recognizer is not None:
+            stats["threshold"] = round(self.recognizer.energy_threshold, 1)
+        return stats
+
+    @property
+    def exhausted(self) -> bool:
+        """Запись закончилась и прочитана целиком (у микрофона - никогда)"""
+        if not self.segmenter or not self.stream.buffer.closed:
+            return False
+        return self.segmenter.cursor + self.segmenter.block_size > self.stream.buffer.written
 
     def listen(self) -> Optional[str]:
         """
         Слушает микрофон и возвращает распознанный текст.
         Возвращает None при таймауте или ошибке.
         """
-        if not self.microphone:
+        if not self.microphone and not self.segmenter:
             self.logger.warning("Микрофон не доступен")
             return None
 
+        try:
+            # Звук уходит в движок блоками, пока пользователь ещё говорит
+            self.backend.begin(self.sample_rate)
+            if not self.capture(self.backend.feed):
+                self.logger.debug("Таймаут ожидания голоса")
+                return None
+            with tracer.span("recognition"):
+                text = self.backend.end()
+            return self._finish(text)
+        except Exception as e:
+            self.logger.error(f"Ошибка распознавания: {e}")
+            return None
+
+    def capture(self, consumer: Callable[[bytes], None]) -> bool:
+        """
+        Запись одной фразы. Блоки PCM отдаются consumer по мере захвата.
+
+        :return: False, если речь не началась до таймаута
+        """
+        timeout = self.config["microphone"].get("timeout", 3)
+        self.logger.debug("Ожидание голосовой команды...")
+
+        if self.segmenter:
+            samples = self.segmenter.next_utterance(
+                timeout=timeout,
+                consumer=lambda block: consumer(block.tobytes())
+            )
+            return samples is not None
+
         try:
             with self.microphone as source:
-                self.logger.debug("Ожидание голосовой команды...")
                 audio = self.recognizer.listen(
                     source,
-                    timeout=self.config["microphone"].get("timeout", 3),
+                    timeout=timeout,
                     phrase_time_limit=self.config["microphone"].get("phrase_limit", 5)
                 )
+        except self._sr.WaitTimeoutError:
+            return False
+        consumer(audio.get_raw_data())
+        return True
 
-            text = self.recognizer.recognize_google(
-                audio, 
-                language=self.config.get("language", "ru-RU")
-            ).lower()
-            
-            self.logger.info(f"Распознано: {text}")
-            return text
+    def recognize_stream(self, blocks: Iterable[bytes],
+                         on_partial: Optional[Callable[[str], None]] = None) -> Optional[str]:
+        """
+        Распознавание фразы, блоки которой ещё могут поступать из другого потока.
+        Возвращает None, если речь не распознана или произошла ошибка.
 
-        except sr.WaitTimeoutError:
-            self.logger.debug("Таймаут ожидания голоса")
-            return None
-        except sr.UnknownValueError:
-            self.logger.debug("Речь не распознана")
-            return None
+        :param on_partial: Вызывается с промежуточной гипотезой при каждом её изменении
+        """
+        try:
+            self.backend.begin(self.sample_rate)
+            last = None
+            for pcm in blocks:
+                self.backend.feed(pcm)
+                if on_partial:
+                    partial = self.backend.partial()
+                    if partial and partial != last:
+                        last = partial
+                        on_partial(partial.lower())
+            return self._finish(self.backend.end())
         except Exception as e:
             self.logger.error(f"Ошибка распознавания: {e}")
             return None
 
+    def _finish(self, text: Optional[str]) -> Optional[str]:
+        if not text:
+            # Чаще всего - шум, принятый за речь
+            self.empty_results += 1
+            self.logger.debug("Речь не распознана")
+            return None
+        text = text.lower()
+        self.logger.info(f"Распознано: {text}")
+        return text
+
+    def close(self):
+        """Закрытие потока микрофона"""
+        if self.stream:
+            self.stream.close()
+
 if __name__ == "__main__":
     # Тестовый режим
     logging.basicConfig(level=logging.INFO)
@@ -0,0 +1,360 @@
+import logging
+import platform
+import queue
+import re
+import shutil
+import subprocess
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple, Type
+
+
+class VolumeBackend:
+    """
+    Базовый интерфейс системной громкости.
+
+    Громкость - целые проценты 0-100. Если система умеет сообщать об
+    изменениях громкости другими программами, watch() подписывает на них
+    callback (вызывается из фонового потока), иначе watch() ничего не делает.
+
+    Система сообщает и о собственных записях бэкенда. Такие события (в
+    пределах echo_window секунд после записи) callback не получает.
+    """
+    name = "base"
+    # Сообщает ли бэкенд о внешних изменениях (иначе кэш живёт ограниченное время)
+    notifies = False
+    echo_window = 0.0
+
+    def __init__(self, config: dict):
+        self.config = config
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._last_write = 0.0
+        self.echoes = 0  # Отброшенные события о собственных записях
+
+    def _wrote(self):
+        """Отметка собственной записи (вызывается до и после неё)"""
+        self._last_write = time.monotonic()
+
+    def _is_echo(self) -> bool:
+        """Событие пришло сразу после собственной записи - это её эхо"""
+        if time.monotonic() - self._last_write < self.echo_window:
+            self.echoes += 1
+            return True
+        return False
+
+    @classmethod
+    def available(cls) -> bool:
+        """Можно ли использовать бэкенд на этой машине"""
+        return True
+
+    def get_volume(self) -> int:
+        raise NotImplementedError
+
+    def set_volume(self, percent: int):
+        raise NotImplementedError
+
+    def get_mute(self) -> bool:
+        raise NotImplementedError
+
+    def set_mute(self, muted: bool):
+        raise NotImplementedError
+
+    def watch(self, callback: Callable[[], None]):
+        """Подписка на изменения громкости извне"""
+
+    def close(self):
+        pass
+
+
+class PycawBackend(VolumeBackend):
+    """Windows Core Audio через pycaw/COM"""
+    name = "pycaw"
+
+    def __init__(self, config: dict, max_retries: int = 3):
+        super().__init__(config)
+        # Импорт здесь: pycaw и COM нужны только на Windows и грузятся долго
+        import pythoncom
+        from comtypes import CLSCTX_ALL
+        from ctypes import POINTER, cast
+        from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
+
+        self._pythoncom = pythoncom
+        self.interface = None
+        for attempt in range(1, max(1, max_retries) + 1):
+            try:
+                pythoncom.CoInitialize()
+                devices = AudioUtilities.GetSpeakers()
+                interface = devices.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
+                self.interface = cast(interface, POINTER(IAudioEndpointVolume))
+                self.logger.info(f"Аудиоинтерфейс инициализирован (попытка {attempt})")
+                break
+            except Exception as e:
+                self.logger.warning(f"Попытка {attempt}/{max_retries} не удалась: {e}")
+                if attempt < max_retries:
+                    time.sleep(1)
+        if self.interface is None:
+            raise RuntimeError("Не удалось инициализировать аудиоинтерфейс")
+
+    @classmethod
+    def available(cls) -> bool:
+        return platform.system() == "Windows"
+
+    def get_volume(self) -> int:
+        return int(round(self.interface.GetMasterVolumeLevelScalar() * 100))
+
+    def set_volume(self, percent: int):
+        self.interface.SetMasterVolumeLevelScalar(percent / 100.0, None)
+
+    def get_mute(self) -> bool:
+        return bool(self.interface.GetMute())
+
+    def set_mute(self, muted: bool):
+        self.interface.SetMute(1 if muted else 0, None)
+
+    def close(self):
+        if self.interface is not None:
+            self.interface.Release()
+            self.interface = None
+            self._pythoncom.CoUninitialize()
+
+
+class _CommandBackend(VolumeBackend):
+    """Общая часть бэкендов, управляющих громкостью через консольные утилиты"""
+    tool = ""
+
+    @classmethod
+    def available(cls) -> bool:
+        return shutil.which(cls.tool) is not None
+
+    def _run(self, *args: str) -> str:
+        result = subprocess.run(
+            [self.tool, *args], capture_output=True, text=True, timeout=5
+        )
+        if result.returncode:
+            raise RuntimeError(f"{self.tool} {' '.join(args)}: {result.stderr.strip() or result.returncode}")
+        return result.stdout
+
+
+class PactlBackend(_CommandBackend):
+    """
+    PulseAudio и PipeWire (через pipewire-pulse): громкость устройства
+    вывода по умолчанию. Об изменениях извне сообщает `pactl subscribe`.
+    """
+    name = "pactl"
+    tool = "pactl"
+    notifies = True
+    _SINK = "@DEFAULT_SINK@"
+    _PERCENT = re.compile(r"(\d+)%")
+
+    def __init__(self, config: dict):
+        super().__init__(config)
+        self.echo_window = config.get("audio", {}).get("volume_echo_window_ms", 250) / 1000
+        self._monitor: Optional[subprocess.Popen] = None
+
+    def get_volume(self) -> int:
+        # "Volume: front-left: 42597 /  65% / -11.22 dB,   front-right: ..." - берём среднее каналов
+        levels = [int(p) for p in self._PERCENT.findall(self._run("get-sink-volume", self._SINK))]
+        if not levels:
+            raise RuntimeError("pactl не вернул громкость")
+        return round(sum(levels) / len(levels))
+
+    def set_volume(self, percent: int):
+        self._wrote()
+        self._run("set-sink-volume", self._SINK, f"{percent}%")
+        self._wrote()
+
+    def get_mute(self) -> bool:
+        return "yes" in self._run("get-sink-mute", self._SINK).lower()
+
+    def set_mute(self, muted: bool):
+        self._wrote()
+        self._run("set-sink-mute", self._SINK, "1" if muted else "0")
+        self._wrote()
+
+    def watch(self, callback: Callable[[], None]):
+        if self._monitor is not None:
+            return
+        try:
+            self._monitor = subprocess.Popen(
+                [self.tool, "subscribe"], stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL, text=True
+            )
+        except OSError as e:
+            self.logger.warning(f"Не удалось подписаться на события PulseAudio: {e}")
+            return
+        threading.Thread(
+            target=self._read_events, args=(self._monitor, callback),
+            name="pactl-subscribe", daemon=True
+        ).start()
+
+    def _read_events(self, monitor: subprocess.Popen, callback: Callable[[], None]):
+        # "Event 'change' on sink #0" - меняется громкость или mute устройства вывода
+        for line in monitor.stdout:
+            if "'change'" in line and " sink " in line and not self._is_echo():
+                callback()
+
+    def close(self):
+        if self._monitor is not None:
+            self._monitor.terminate()
+            self._monitor.wait(2)
+            self._monitor = None
+
+
+class AmixerBackend(_CommandBackend):
+    """ALSA через amixer (регулятор Master, шкала как в alsamixer)"""
+    name = "amixer"
+    tool = "amixer"
+    _LEVEL = re.compile(r"\[(\d+)%\]")
+    _SWITCH = re.compile(r"\[(on|off)\]")
+
+    def __init__(self, config: dict):
+        super().__init__(config)
+        self.control = config.get("audio", {}).get("alsa_control", "Master")
+
+    def get_volume(self) -> int:
+        levels = [int(p) for p in self._LEVEL.findall(self._run("-M", "get", self.control))]
+        if not levels:
+            raise RuntimeError(f"amixer не вернул громкость {self.control}")
+        return round(sum(levels) / len(levels))
+
+    def set_volume(self, percent: int):
+        self._run("-q", "-M", "set", self.control, f"{percent}%")
+
+    def get_mute(self) -> bool:
+        return "off" in self._SWITCH.findall(self._run("get", self.control))
+
+    def set_mute(self, muted: bool):
+        self._run("-q", "set", self.control, "mute" if muted else "unmute")
+
+
+class FakeVolumeBackend(VolumeBackend):
+    """
+    Громкость в памяти для тестов и замеров: считает обращения
+    и позволяет изобразить изменение громкости другой программой.
+    """
+    name = "fake"
+    notifies = True
+
+    def __init__(self, config: Optional[dict] = None, volume: int = 50, latency: float = 0.0,
+                 echo: bool = False, echo_window: float = 0.0):
+        """
+        :param latency: Задержка каждого обращения (сек), как у настоящего бэкенда
+        :param echo: Сообщать подписчикам и о своих записях (из отдельного потока, как pactl subscribe)
+        :param echo_window: Сколько секунд после записи события считаются эхом (0 - не отбрасывать)
+        """
+        super().__init__(config or {})
+        self.volume = volume
+        self.muted = False
+        self.latency = latency
+        self.echo = echo
+        self.echo_window = echo_window
+        self.reads = 0
+        self.writes: List[int] = []
+        self.history: List[Tuple[float, int]] = []  # (time.monotonic(), громкость) каждой записи
+        self._listeners: List[Callable[[], None]] = []
+        self._events: "queue.Queue[None]" = queue.Queue()
+        if echo:
+            threading.Thread(target=self._deliver, name="fake-volume-events", daemon=True).start()
+
+    def _delay(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def get_volume(self) -> int:
+        self.reads += 1
+        self._delay()
+        return self.volume
+
+    def set_volume(self, percent: int):
+        self._wrote()
+        self._delay()
+        self.writes.append(percent)
+        self.history.append((time.monotonic(), percent))
+        self.volume = percent
+        self._wrote()
+        if self.echo:
+            self._events.put(None)
+
+    def get_mute(self) -> bool:
+        self.reads += 1
+        return self.muted
+
+    def set_mute(self, muted: bool):
+        self._wrote()
+        self.muted = muted
+        if self.echo:
+            self._events.put(None)
+
+    def _deliver(self):
+        while True:
+            self._events.get()
+            try:
+                self._notify()
+            finally:
+                self._events.task_done()
+
+    def settle(self):
+        """Ожидание доставки всех событий о собственных записях"""
+        self._events.join()
+
+    def watch(self, callback: Callable[[], None]):
+        self._listeners.append(callback)
+
+    def _notify(self):
+        if self._is_echo():
+            return
+        for callback in self._listeners:
+            callback()
+
+    def external_change(self, volume: int):
+        """Громкость изменена в обход ассистента (микшер системы и т.п.)"""
+        self.volume = volume
+        self._notify()
+
+
+BACKENDS: Dict[str, Type[VolumeBackend]] = {
+    PycawBackend.name: PycawBackend,
+    PactlBackend.name: PactlBackend,
+    AmixerBackend.name: AmixerBackend,
+    FakeVolumeBackend.name: FakeVolumeBackend
+}
+
+# Порядок выбора при volume_backend = "auto"
+_AUTO_ORDER = (PycawBackend, PactlBackend, AmixerBackend)
+
+
+def create_volume_backend(config: dict, max_retries: int = 3) -> Optional[VolumeBackend]:
+    """
+    Бэкенд, указанный в config["audio"]["volume_backend"].
+    auto - первый доступный из pycaw, pactl, amixer; None, если нет ни одного.
+    """
+    name = config.get("audio", {}).get("volume_backend", "auto")
+    if name == "auto":
+        candidates = [cls for cls in _AUTO_ORDER if cls.available()]
+    elif name in BACKENDS:
+        candidates = [BACKENDS[name]]
+    else:
+        raise ValueError(f"Неизвестный бэкенд громкости: {name}")
+
+    logger = logging.getLogger("VolumeBackend")
+    for cls in candidates:
+        try:
+            if cls is PycawBackend:
+                return cls(config, max_retries=max_retries)
+            return cls(config)
+        except Exception as e:
+            logger.warning(f"Бэкенд громкости {cls.name} недоступен: {e}")
+    logger.error("Не найден ни один способ управлять громкостью")
+    return None
+
+
+# Тест
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for cls in _AUTO_ORDER:
+        print(f"{cls.name}: {'доступен' if cls.available() else 'нет'}")
+
+    backend = create_volume_backend({"audio": {}})
+    if backend:
+        print(f"Выбран {backend.name}: громкость {backend.get_volume()}%, mute {backend.get_mute()}")
+        backend.close()
@@ -0,0 +1,310 @@
+import json
+import logging
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+
+class WakeWordSpotter:
+    """
+    Базовый интерфейс поиска триггерного слова в потоке.
+
+    Работает на каждом блоке речи до полного распознавания, поэтому должен
+    быть дешёвым: begin() в начале фразы, feed() для каждого блока PCM
+    (int16, моно) возвращает True, как только слово услышано.
+    """
+    name = "base"
+
+    def __init__(self, wake_word: str):
+        self.wake_word = wake_word.lower()
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.sample_rate = 16000
+
+    def begin(self, sample_rate: int):
+        """Начало новой фразы"""
+        self.sample_rate = sample_rate
+
+    def feed(self, pcm: bytes) -> bool:
+        """Очередной блок звука. True - триггерное слово найдено"""
+        raise NotImplementedError
+
+
+class VoskSpotter(WakeWordSpotter):
+    """
+    Vosk с грамматикой из одного слова: распознаватель выбирает только
+    между триггерным словом и [unk], поэтому работает в разы быстрее
+    полного. Модель общая с VoskBackend.
+    """
+    name = "vosk"
+
+    def __init__(self, wake_word: str, model_path: str):
+        super().__init__(wake_word)
+        from vosk import KaldiRecognizer
+        from core.recognition_backends import load_vosk_model
+
+        self._model = load_vosk_model(model_path)
+        self._recognizer_cls = KaldiRecognizer
+        self._grammar = json.dumps([self.wake_word, "[unk]"], ensure_ascii=False)
+        self._recognizer = None
+
+    def begin(self, sample_rate: int):
+        super().begin(sample_rate)
+        self._recognizer = self._recognizer_cls(self._model, sample_rate, self._grammar)
+
+    def feed(self, pcm: bytes) -> bool:
+        if self._recognizer.AcceptWaveform(pcm):
+            text = json.loads(self._recognizer.Result()).get("text", "")
+        else:
+            text = json.loads(self._recognizer.PartialResult()).get("partial", "")
+        return self.wake_word in text
+
+
+class MfccExtractor:
+    """
+    MFCC на NumPy: окна 25 мс с шагом 10 мс, 26 мел-фильтров, 12 коэффициентов.
+    Нулевой коэффициент (энергия) отброшен - признаки не зависят от громкости.
+    Звук можно подавать порциями: остаток между вызовами сохраняется.
+    """
+
+    def __init__(self, sample_rate: int, n_mels: int = 26, n_coeffs: int = 13):
+        self.sample_rate = sample_rate
+        self.frame_len = int(sample_rate * 0.025)
+        self.hop = int(sample_rate * 0.010)
+        self.n_fft = 1 << (self.frame_len - 1).bit_length()
+        self.window = np.hamming(self.frame_len).astype(np.float32)
+        self.filters = self._mel_filters(sample_rate, self.n_fft, n_mels)
+        # DCT-II по мел-полосам; строка 0 (энергия) не нужна
+        k = np.arange(n_mels)
+        self.dct = np.cos(np.pi / n_mels * (k + 0.5)[None, :] * np.arange(1, n_coeffs)[:, None]).astype(np.float32)
+        self._rest = np.zeros(0, dtype=np.float32)
+
+    @staticmethod
+    def _mel_filters(sample_rate: int, n_fft: int, n_mels: int) -> np.ndarray:
+        def to_mel(hz):
+            return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+        def to_hz(mel):
+            return 700.0 * (10 ** (mel / 2595.0) - 1.0)
+
+        edges = to_hz(np.linspace(to_mel(80.0), to_mel(sample_rate / 2), n_mels + 2))
+        bins = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+        filters = np.zeros((n_mels, len(bins)), dtype=np.float32)
+        for m in range(n_mels):
+            left, center, right = edges[m], edges[m + 1], edges[m + 2]
+            rising = (bins - left) / (center - left)
+            falling = (right - bins) / (right - center)
+            filters[m] = np.maximum(0.0, np.minimum(rising, falling))
+        return filters
+
+    def reset(self):
+        self._rest = np.zeros(0, dtype=np.float32)
+
+    def push(self, samples: np.ndarray) -> np.ndarray:
+        """Новые кадры признаков (кадры x 12) для очередной порции звука"""
+        samples = np.concatenate((self._rest, samples.astype(np.float32)))
+        if len(samples) < self.frame_len:
+            self._rest = samples
+            return np.zeros((0, self.dct.shape[0]), dtype=np.float32)
+        frames = np.lib.stride_tricks.sliding_window_view(samples, self.frame_len)[::self.hop]
+        self._rest = samples[len(frames) * self.hop:]
+        spectrum = np.abs(np.fft.rfft(frames * self.window, self.n_fft)) ** 2
+        mel = np.log(spectrum @ self.filters.T + 1e-10)
+        return (mel @ self.dct.T).astype(np.float32)
+
+
+def _normalize(features: np.ndarray) -> np.ndarray:
+    return features / (np.linalg.norm(features, axis=1, keepdims=True) + 1e-9)
+
+
+def subsequence_dtw(template: np.ndarray, stream: np.ndarray) -> float:
+    """
+    Наименьшее среднее косинусное расстояние шаблона до любого отрезка потока.
+
+    Шаги (1,1), (1,0), (1,2): допускается темп от половинного до двойного,
+    и каждая строка считается целиком векторно.
+    """
+    cost = 1.0 - template @ stream.T
+    acc = cost[0].copy()
+    for i in range(1, len(template)):
+        previous = acc
+        acc = previous.copy()
+        acc[1:] = np.minimum(acc[1:], previous[:-1])
+        acc[2:] = np.minimum(acc[2:], previous[:-2])
+        acc += cost[i]
+    return float(acc.min() / len(template))
+
+
+class TemplateSpotter(WakeWordSpotter):
+    """
+    Сравнение с записанными образцами триггерного слова (WAV в папке templates)
+    по MFCC и DTW. Не требует модели: несколько своих записей слова
+    дают достаточно точное срабатывание для одного диктора.
+    """
+    name = "template"
+
+    def __init__(self, wake_word: str, templates: List[np.ndarray], sample_rate: int,
+                 threshold: float = 0.12, check_ms: int = 100):
+        """
+        :param templates: Образцы слова - float32 моно с частотой sample_rate
+        :param threshold: Порог среднего косинусного расстояния (меньше - строже)
+        :param check_ms: Как часто сравнивать накопленный звук с образцами
+        """
+        super().__init__(wake_word)
+        self.threshold = threshold
+        self._raw = [(samples, sample_rate) for samples in templates]
+        self._check_frames = max(1, check_ms // 10)
+        self._templates: List[np.ndarray] = []
+        self._extractor: Optional[MfccExtractor] = None
+        self._prepare(sample_rate)
+        self._frames: List[np.ndarray] = []
+        self._count = 0
+        self._since_check = 0
+        self.last_distance: Optional[float] = None
+
+    def _prepare(self, sample_rate: int):
+        """Признаки образцов для частоты потока (пересчёт только при её смене)"""
+        if self._extractor is not None and self._extractor.sample_rate == sample_rate:
+            return
+        templates = []
+        for samples, rate in self._raw:
+            if rate != sample_rate:
+                positions = np.linspace(0, len(samples) - 1, int(round(len(samples) * sample_rate / rate)))
+                samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+            extractor = MfccExtractor(sample_rate)
+            features = extractor.push(_trim_silence(samples, extractor.hop))
+            if len(features):
+                templates.append(_normalize(features))
+        if not templates:
+            raise ValueError("Нет образцов триггерного слова")
+        self._templates = templates
+        self._longest = max(len(t) for t in templates)
+        self._extractor = MfccExtractor(sample_rate)
+
+    @classmethod
+    def from_directory(cls, wake_word: str, path: str, **kwargs) -> "TemplateSpotter":
+        """Образцы из всех WAV в папке (приводятся к частоте потока при begin)"""
+        from core.audio_output import clip_to_float
+        from core.sound_cache import load_wav
+
+        files = sorted(Path(path).glob("*.wav"))
+        if not files:
+            raise FileNotFoundError(f"Нет образцов триггерного слова в {path}")
+        clips = [load_wav(f.stem, f) for f in files]
+        # Все образцы - к частоте первого, дальше пересчёт один на весь набор
+        rate = clips[0].sample_rate
+        templates = [clip_to_float(clip, rate, 1)[:, 0] for clip in clips]
+        return cls(wake_word, templates, rate, **kwargs)
+
+    def begin(self, sample_rate: int):
+        super().begin(sample_rate)
+        self._prepare(sample_rate)
+        self._extractor.reset()
+        self._frames = []
+        self._count = 0
+        self._since_check = 0
+        self.last_distance = None
+
+    def feed(self, pcm: bytes) -> bool:
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+        features = self._extractor.push(samples)
+        if not len(features):
+            return False
+        self._frames.append(_normalize(features))
+        self._count += len(features)
+        self._since_check += len(features)
+        if self._since_check < self._check_frames or self._count < self._longest // 2:
+            return False
+        self._since_check = 0
+
+        # Слово может быть только в последних 2x длины образца кадрах
+        stream = np.concatenate(self._frames)[-2 * self._longest:]
+        self._frames = [stream]
+        self.last_distance = min(subsequence_dtw(t, stream) for t in self._templates)
+        return self.last_distance <= self.threshold
+
+
+def _trim_silence(samples: np.ndarray, hop: int, floor_db: float = 30.0) -> np.ndarray:
+    """Обрезка тишины по краям образца (ниже пика на floor_db)"""
+    usable = len(samples) // hop * hop
+    if usable == 0:
+        return samples
+    energy = 10 * np.log10((samples[:usable].reshape(-1, hop) ** 2).mean(axis=1) + 1e-12)
+    loud = np.flatnonzero(energy > energy.max() - floor_db)
+    return samples[loud[0] * hop:(loud[-1] + 1) * hop]
+
+
+def create_spotter(config: dict) -> Optional[WakeWordSpotter]:
+    """
+    Поиск триггерного слова по разделу 'wake_spotter' конфига.
+
+    spotter: vosk, template, none или auto (vosk, если есть модель,
+    иначе образцы, иначе None - каждая фраза идёт в полное распознавание).
+    """
+    spotter_cfg = config.get("wake_spotter", {})
+    wake_word = config.get("metadata", {}).get("wake_word", "сайори")
+    kind = spotter_cfg.get("spotter", "auto")
+
+    def vosk():
+        return VoskSpotter(wake_word, config.get("recognition", {}).get("vosk_model_path", ""))
+
+    def template():
+        return TemplateSpotter.from_directory(
+            wake_word,
+            spotter_cfg.get("templates", ""),
+            threshold=spotter_cfg.get("threshold", 0.12)
+        )
+
+    if kind == "none":
+        return None
+    if kind == "vosk":
+        return vosk()
+    if kind == "template":
+        return template()
+    if kind != "auto":
+        raise ValueError(f"Неизвестный поиск триггерного слова: {kind}")
+
+    logger = logging.getLogger("WakeWordSpotter")
+    for factory in (vosk, template):
+        try:
+            spotter = factory()
+            logger.info(f"Поиск триггерного слова: {spotter.name}")
+            return spotter
+        except (ImportError, FileNotFoundError, ValueError) as e:
+            logger.debug(f"Поиск триггерного слова недоступен: {e}")
+    logger.info("Поиск триггерного слова отключён: каждая фраза распознаётся полностью")
+    return None
+
+
+# Тест
+if __name__ == "__main__":
+    import time
+
+    rate = 16000
+
+    def tone(freqs, seconds=0.5):
+        # «Слово» - смена частот, чтобы у спектра была форма во времени
+        t = np.arange(int(rate * seconds / len(freqs))) / rate
+        return np.concatenate([0.3 * np.sin(2 * np.pi * f * t) for f in freqs]).astype(np.float32)
+
+    def stream(samples):
+        pcm = (np.clip(samples, -1, 1) * 32767).astype(np.int16).tobytes()
+        return [pcm[i:i + 960] for i in range(0, len(pcm), 960)]  # блоки по 30 мс
+
+    word = tone([300, 800, 1500, 600])
+    spotter = TemplateSpotter("сайори", [word, tone([320, 850, 1400, 620], 0.6)], rate)
+    rng = np.random.default_rng(0)
+    cases = {
+        "слово": np.concatenate([0.01 * rng.standard_normal(rate // 2), 0.5 * word, tone([400, 900], 0.7)]),
+        "болтовня": tone([500, 700, 250, 1100, 2000, 350, 900, 1300], 1.6),
+        "те же звуки в другом порядке": tone([300, 1500, 800, 600]),
+        "шум": 0.05 * rng.standard_normal(rate * 2).astype(np.float32)
+    }
+    for name, signal in cases.items():
+        spotter.begin(rate)
+        blocks = stream(signal)
+        started = time.perf_counter()
+        hit = any(spotter.feed(block) for block in blocks)
+        spent = (time.perf_counter() - started) / (len(blocks) * 0.03) * 100
+        print(f"{name}: {'найдено' if hit else 'нет'} (расстояние {spotter.last_distance:.3f}, "
+              f"{spent:.2f}% реального времени)")
@@ -1,38 +1,56 @@
 import sys
 import signal
+import socket
 import threading
 from pathlib import Path
+from typing import Optional
 from core.assistant import Assistant
 from core.voice_recognizer import VoiceRecognizer
+from core.pipeline import VoicePipeline
+from core.startup import StartupTasks
+from core.wake_word import create_spotter
+from core.log_setup import setup_logging, shutdown_logging
+from core.tracing import configure as configure_tracing
 import config as cfg
 import logging
 
 class SayoriMain:
     def __init__(self):
         self._setup_logging()
+        self.tracer = configure_tracing(cfg.config)
         self._init_components()
         self._register_signals()
         self._start_system()
 
     def _setup_logging(self):
-        """Настройка системы логирования"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(cfg.config["paths"]["logs"]),
-                logging.StreamHandler()
-            ]
-        )
+        """Настройка системы логирования: одна очередь и один поток записи на весь процесс"""
+        cfg.ensure_directories()
+        setup_logging(cfg.config)
         self.logger = logging.getLogger("Main")
 
     def _init_components(self):
-        """Инициализация всех компонентов"""
+        """
+        Инициализация всех компонентов.
+
+        Ассистент и распознаватель создаются параллельно. Слушать начинаем,
+        как только готов распознаватель: фразы, сказанные до готовности
+        ассистента, ждут его в очереди конвейера.
+        """
         self.logger.info("Инициализация компонентов...")
+        self.assistant = None
+        self.pipeline = None
+        self.control = None
+        self.voice_recognizer = None
+        self.voice = cfg.config.get("control", {}).get("voice", True)
+        self._stopped = threading.Event()
+        self.startup = StartupTasks()
+        self.startup.submit("assistant", Assistant, cfg.config)
+        if not self.voice:
+            return  # Только управляющий сокет: микрофон и распознавание не нужны
+        self.startup.submit("recognizer", VoiceRecognizer, cfg.config)
+        self.startup.submit("spotter", create_spotter, cfg.config)
         try:
-            self.assistant = Assistant(cfg.config)
-            self.voice_recognizer = VoiceRecognizer(cfg.config)
-            self.logger.info("Все компоненты загружены")
+            self.voice_recognizer = self.startup.result("recognizer")
         except Exception as e:
             self.logger.critical(f"Ошибка инициализации: {e}")
             raise
@@ -41,44 +59,139 @@ class SayoriMain:
         """Обработка сигналов завершения"""
         signal.signal(signal.SIGINT, self._graceful_shutdown)
         signal.signal(signal.SIGTERM, self._graceful_shutdown)
+        if hasattr(signal, "SIGUSR1"):
+            # kill -USR1 <pid> - вывести перцентили задержек без остановки
+            signal.signal(signal.SIGUSR1, lambda signum, frame: self.tracer.dump(self.logger))
 
     def _start_system(self):
-        """Запуск основного цикла"""
+        """Запуск конвейера обработки голоса"""
         self.logger.info(f"Запуск Sayori v{cfg.config['version']}")
+        self.wake_word = cfg.config.get("metadata", {}).get("wake_word", "сайори")
+        try:
+            if self.voice:
+                self.pipeline = VoicePipeline(
+                    self.voice_recognizer,
+                    self._handle_phrase,
+                    queue_size=cfg.config.get("pipeline", {}).get("queue_size", 4),
+                    spotter=self._spotter(),
+                    follow_up=cfg.config.get("wake_spotter", {}).get("follow_up", 4.0),
+                    partial_handler=self._handle_partial
+                )
+                self.pipeline.start()
+                self.logger.info(f"Ожидаю команды с триггером '{self.wake_word}'...")
+            self.assistant = self.startup.result("assistant")
+            self._start_control()
+            self.logger.info(f"Все компоненты загружены за {self.startup.summary()}")
+        except Exception as e:
+            self.logger.critical(f"Ошибка инициализации: {e}")
+            self._shutdown()
+            raise
         try:
-            # Запуск в отдельном потоке
-            self.thread = threading.Thread(
-                target=self._voice_loop,
-                daemon=True
-            )
-            self.thread.start()
-            self.thread.join()  # Основной поток ждёт завершения
+            if self.pipeline:
+                self.pipeline.join()  # Основной поток ждёт завершения
+            else:
+                self.logger.info("Голос отключён, команды принимаются только через сокет")
+                while not self._stopped.wait(1.0):
+                    pass
         except Exception as e:
             self.logger.error(f"Ошибка в основном цикле: {e}")
+        # Сюда доходим, когда закончилась запись (--replay, --stdin)
+        self._shutdown()
+
+    def _spotter(self):
+        """Поиск триггерного слова в звуке; без него распознаётся каждая фраза"""
+        try:
+            return self.startup.result("spotter")
+        except Exception as e:
+            self.logger.warning(f"Поиск триггерного слова недоступен: {e}")
+            return None
 
-    def _voice_loop(self):
-        """Цикл обработки голосовых команд"""
-        wake_word = cfg.config.get("metadata", {}).get("wake_word", "сайори")
-        self.logger.info(f"Ожидаю команды с триггером '{wake_word}'...")
-        
-        while True:
-            try:
-                command = self.voice_recognizer.listen()
-                if command and wake_word in command.lower():
-                    clean_cmd = command.replace(wake_word, "").strip()
-                    self.assistant.process_command(clean_cmd)
-            except KeyboardInterrupt:
-                break
-            except Exception as e:
-                self.logger.error(f"Ошибка обработки команды: {e}")
+    def _start_control(self):
+        """Управляющий сокет для sayorictl.py, скриптов и горячих клавиш"""
+        control_cfg = cfg.config.get("control", {})
+        if not control_cfg.get("enabled", True):
+            return
+        if not hasattr(socket, "AF_UNIX"):
+            self.logger.warning("Unix-сокеты недоступны, управление через sayorictl.py отключено")
+            return
+        from core.control import ControlServer
+        self.control = ControlServer(self.assistant, control_cfg["socket"])
+        self.control.start()
+
+    def _command_text(self, text: str, awake: bool) -> Optional[str]:
+        """
+        Команда из фразы: текст без триггерного слова. Если слово уже найдено
+        в звуке (awake), командой считается вся фраза
+        """
+        if self.wake_word in text.lower():
+            return text.replace(self.wake_word, "").strip() or None
+        if awake:
+            return text.strip() or None
+        return None
+
+    def _handle_phrase(self, command: str, awake: bool = False):
+        """Выполнение распознанной фразы, если в ней есть триггерное слово"""
+        with self.tracer.span("wake_word"):
+            clean_cmd = self._command_text(command, awake)
+            if not clean_cmd:
+                return
+        # До готовности ассистента фраза ждёт здесь, в потоке выполнения
+        self.startup.result("assistant").process_command(clean_cmd)
+
+    def _handle_partial(self, text: str, awake: bool):
+        """Промежуточная гипотеза: ассистент заранее готовит команду (если уже запущен)"""
+        command = self._command_text(text, awake)
+        if command and self.assistant:
+            self.assistant.speculate(command)
 
     def _graceful_shutdown(self, signum, frame):
         """Корректное завершение работы"""
         self.logger.info("Получен сигнал завершения")
-        self.assistant.shutdown()
+        self._shutdown()
         sys.exit(0)
 
+    def _shutdown(self):
+        """Остановка конвейера и компонентов"""
+        self._stopped.set()
+        if self.control:
+            self.control.stop()
+        if self.pipeline:
+            self.pipeline.stop()
+        if self.voice_recognizer:
+            self.voice_recognizer.close()
+        if self.assistant:
+            self.assistant.shutdown()
+        if self.tracer.enabled:
+            self.tracer.dump(self.logger)
+        shutdown_logging()
+
+
+def _apply_cli_args(config: dict):
+    """Замена микрофона записью: --replay <wav|папка> или --stdin (сырой PCM)"""
+    import argparse
+    parser = argparse.ArgumentParser(description="Голосовой ассистент Sayori")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--replay", metavar="PATH", help="WAV-файл или папка с WAV вместо микрофона")
+    source.add_argument("--stdin", action="store_true", help="Сырой PCM s16le моно из stdin")
+    parser.add_argument("--rate", type=int, help="Частота PCM из stdin")
+    parser.add_argument("--fast", action="store_true", help="Воспроизводить запись без пауз реального времени")
+    parser.add_argument("--no-voice", action="store_true",
+                        help="Без микрофона: команды только через управляющий сокет (sayorictl.py)")
+    args = parser.parse_args()
+
+    mic_cfg = config["microphone"]
+    if args.replay:
+        mic_cfg.update(source="file", source_path=args.replay)
+    elif args.stdin:
+        mic_cfg.update(source="stdin", source_rate=args.rate)
+    if args.fast:
+        mic_cfg["source_realtime"] = False
+    if args.no_voice:
+        config.setdefault("control", {})["voice"] = False
+
+
 if __name__ == "__main__":
+    _apply_cli_args(cfg.config)
     try:
         app = SayoriMain()
     except Exception as e:
@@ -0,0 +1,70 @@
+"""
+Управление запущенным ассистентом (python main.py или main.py --no-voice):
+
+    python sayorictl.py mode game          # команды из раздела cli_commands
+    python sayorictl.py volume set 50
+    python sayorictl.py say "громкость на 30"
+    python sayorictl.py status | modes | ping
+    python sayorictl.py --list
+
+Клиент не загружает ни звуки, ни распознавание: только читает
+commands.json и отправляет один запрос в сокет, поэтому команда
+выполняется за миллисекунды.
+"""
+import argparse
+import json
+import sys
+
+import config as cfg
+from core.control import ControlError, resolve_cli_command, send_request
+
+_BUILTIN = ("status", "modes", "ping")
+
+
+def _load_cli_commands() -> dict:
+    with open(cfg.config["paths"]["commands_config"], "r", encoding="utf-8") as f:
+        return json.load(f).get("cli_commands", {})
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Управление запущенным ассистентом Sayori")
+    parser.add_argument("command", nargs="*", help="Например: volume set 50, say <фраза>, status")
+    parser.add_argument("--list", action="store_true", help="Показать команды из cli_commands")
+    parser.add_argument("--json", action="store_true", help="Вывести ответ как JSON")
+    parser.add_argument("--socket", default=cfg.config.get("control", {}).get("socket"))
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    try:
+        if args.list or not args.command:
+            for group, spec in _load_cli_commands().items():
+                print(f"{group}: {spec.get('description', '')}")
+                for name, action in spec.get("actions", {}).items():
+                    print(f"  {group} {name} -> {action['call']} {action.get('args', {})}")
+            return 0
+
+        head = args.command[0]
+        if head in _BUILTIN:
+            request = {"op": head}
+        elif head == "say":
+            request = {"op": "say", "text": " ".join(args.command[1:])}
+        else:
+            request = resolve_cli_command(_load_cli_commands(), args.command)
+        response = send_request(args.socket, request, timeout=args.timeout)
+    except (ControlError, ConnectionError, OSError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+    if args.json:
+        print(json.dumps(response, ensure_ascii=False))
+    elif response.get("ok"):
+        result = response.get("result")
+        print(json.dumps(result, ensure_ascii=False) if isinstance(result, (dict, list)) else result)
+    else:
+        print(f"❌ {response.get('error')}", file=sys.stderr)
+    # Действие выполнено, но вернуло неудачу - тоже ненулевой код для скриптов
+    return 0 if response.get("ok") and response.get("result") is not False else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
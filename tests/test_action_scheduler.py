@@ -0,0 +1,29 @@
+import time
+
+from core.action_scheduler import ActionScheduler
+
+
+def test_delay_does_not_hold_a_worker():
+    scheduler = ActionScheduler(lambda action, details: True, max_workers=1)
+    actions = [{"id": f"later{i}", "type": "noop", "delay": 0.3} for i in range(3)]
+    actions.append({"id": "now", "type": "noop"})
+
+    started = time.perf_counter()
+    timings = scheduler.run(actions)
+    elapsed = time.perf_counter() - started
+    scheduler.shutdown()
+
+    assert all(t.success for t in timings)
+    assert timings[3].start < 0.1  # Не ждёт задержек других действий в единственном потоке
+    assert elapsed < 0.6  # Задержки идут одновременно, а не по очереди
+    assert all(t.start >= 0.3 for t in timings[:3])
+
+
+def test_validate_reports_graph_and_delay_errors():
+    scheduler = ActionScheduler(lambda action, details: True)
+
+    assert scheduler.validate([{"id": "a", "type": "noop", "after": "b"}, {"id": "b", "type": "noop", "after": "a"}])
+    assert scheduler.validate([{"type": "noop", "after": "missing"}])
+    assert scheduler.validate([{"type": "noop", "delay": "1"}])
+    assert scheduler.validate([{"id": "a", "type": "noop"}, {"type": "noop", "after": "a", "delay": 0.5}]) == []
+    scheduler.shutdown()
@@ -0,0 +1,72 @@
+import json
+import logging
+
+import pytest
+
+from core.assistant import Assistant
+from core.command_index import CommandIndex
+
+COMMANDS = {
+    "звук": {"тише": {"action": "change_volume", "params": {"step": -10}}},
+    "режимы": {"игровой режим": {"action": "activate_mode", "params": {"mode": "игровой"}}}
+}
+
+
+@pytest.fixture
+def assistant(tmp_path):
+    """Ассистент без звука, микрофона и режимов: только команды"""
+    path = tmp_path / "commands.json"
+    path.write_text(json.dumps({"voice_commands": COMMANDS}, ensure_ascii=False), encoding="utf-8")
+    assistant = Assistant.__new__(Assistant)
+    assistant.config = {"paths": {"commands_config": str(path)}, "commands": {}}
+    assistant.logger = logging.getLogger("Assistant")
+    assistant.commands, assistant.command_index = assistant._build_command_index()
+    assistant.path = path
+    return assistant
+
+
+def _save(assistant, commands):
+    assistant.path.write_text(json.dumps({"voice_commands": commands}, ensure_ascii=False), encoding="utf-8")
+
+
+def test_broken_file_keeps_previous_index(assistant):
+    previous = assistant.command_index
+
+    assistant.path.write_text('{"voice_commands": {', encoding="utf-8")
+    assert not assistant.reload_commands()
+    assert assistant.command_index is previous
+
+    # Ошибка в одной команде тоже не применяет файл целиком
+    _save(assistant, {**COMMANDS, "прочее": {"(\\w+) и \\1": {"action": "show_help", "regex": True}}})
+    assert not assistant.reload_commands()
+    assert assistant.command_index is previous
+    assert assistant.command_index.match("тише").action == "change_volume"
+
+
+def test_only_changed_categories_are_recompiled(assistant, monkeypatch):
+    previous = assistant.command_index
+    compiled = []
+    original = CommandIndex._compile_category
+
+    def compile_category(self, category, commands):
+        compiled.append(category)
+        return original(self, category, commands)
+
+    monkeypatch.setattr(CommandIndex, "_compile_category", compile_category)
+
+    _save(assistant, {**COMMANDS, "режимы": {"рабочий режим": {"action": "activate_mode",
+                                                               "params": {"mode": "рабочий"}}}})
+    assert assistant.reload_commands()
+    assert compiled == ["режимы"]
+    assert assistant.command_index.changed == ["режимы"]
+    assert assistant.command_index._categories["звук"] is previous._categories["звук"]
+    assert assistant.command_index.match("рабочий режим").params == {"mode": "рабочий"}
+    assert assistant.command_index.match("игровой режим") is None
+
+
+def test_unchanged_file_keeps_index(assistant):
+    previous = assistant.command_index
+
+    _save(assistant, COMMANDS)
+    assert assistant.reload_commands()
+    assert assistant.command_index is previous
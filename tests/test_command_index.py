@@ -0,0 +1,23 @@
+from core.command_index import CommandIndex
+
+VOLUME = {"action": "set_volume", "regex": True, "params": {"level": "$1"}}
+
+
+def test_regex_matches_whole_words_only():
+    index = CommandIndex({"звук": {"громкость на (\\d{1,3})": VOLUME}})
+
+    assert index.match("громкость на 50").params == {"level": "50"}
+    assert index.match("ну громкость на 50 пожалуйста").params == {"level": "50"}
+    assert index.match("громкость на 5000") is None
+
+
+def test_unmergeable_regex_is_dropped_not_fatal():
+    index = CommandIndex({"звук": {
+        "громкость на (\\d{1,3})": VOLUME,
+        "(?i)привет (\\w+)": {"action": "greet", "regex": True},
+        "(\\w+) и \\1": {"action": "repeat", "regex": True}
+    }})
+
+    assert len(index.errors) == 2
+    assert index.match("громкость на 20").params == {"level": "20"}
+    assert index.match("привет мир") is None
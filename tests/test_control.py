@@ -0,0 +1,142 @@
+import json
+import os
+import socket
+import stat
+
+import pytest
+
+import sayorictl
+from core.control import ControlError, ControlServer, resolve_cli_command, send_request
+
+CLI = {"volume": {"actions": {
+    "set": {"call": "set_volume", "args": {"level": "$1"}},
+    "mute": {"call": "set_mute", "args": {"muted": True}}
+}}}
+
+
+class FakeAssistant:
+    """Достаточно для протокола: без звука, микрофона и режимов"""
+
+    class modes:
+        current_mode = "рабочий"
+
+        @staticmethod
+        def get_available_modes():
+            return ["игровой", "рабочий"]
+
+    class audio:
+        @staticmethod
+        def get_current_volume():
+            return 40
+
+    command_index = range(12)
+    speculation = None
+
+    def __init__(self):
+        self.actions = []
+
+    def run_action(self, action, params):
+        if action == "explode":
+            raise RuntimeError("обработчик упал")
+        self.actions.append((action, params))
+        return action == "set_volume"
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = ControlServer(FakeAssistant(), str(tmp_path / "s.sock"))
+    server.start()
+    yield server
+    server.stop()
+
+
+def _exchange(path, *lines: bytes):
+    """Сырые строки в одном соединении, ответы по одному на строку"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(5)
+        sock.connect(path)
+        sock.sendall(b"".join(line + b"\n" for line in lines))
+        with sock.makefile("rb") as reader:
+            return [json.loads(reader.readline()) for _ in lines]
+
+
+def test_ping_and_status(server):
+    assert send_request(server.socket_path, {"op": "ping", "id": 7})["result"] == "pong"
+
+    response = send_request(server.socket_path, {"op": "status", "id": 8})
+    assert response["ok"] and response["id"] == 8
+    assert response["result"] == {"mode": "рабочий", "volume": 40, "commands": 12,
+                                  "requests": 2, "speculation": None}
+
+
+def test_errors_are_returned_and_connection_survives(server):
+    unknown, malformed, not_object, failed, ping = _exchange(
+        server.socket_path,
+        b'{"op": "reboot", "id": 1}',
+        b'{"op": "ping",',
+        b'["ping"]',
+        json.dumps({"op": "action", "action": "explode", "id": 4}).encode(),
+        b'{"op": "ping", "id": 5}'
+    )
+
+    assert (unknown["ok"], unknown["id"], unknown["error"]) == (False, 1, "Неизвестная операция: reboot")
+    assert not malformed["ok"] and malformed["id"] is None
+    assert not not_object["ok"]
+    assert (failed["ok"], failed["id"], failed["error"]) == (False, 4, "обработчик упал")
+    assert ping["ok"] and ping["id"] == 5
+
+
+def test_oversized_request_is_rejected(server):
+    response = _exchange(server.socket_path, b'{"op": "ping", "pad": "' + b"x" * 70000 + b'"}')[0]
+    assert response == {"ok": False, "error": "Слишком длинный запрос"}
+
+
+def test_action_from_cli_command(server):
+    request = resolve_cli_command(CLI, ["volume", "set", "50"])
+    assert request == {"op": "action", "action": "set_volume", "params": {"level": "50"}}
+
+    assert send_request(server.socket_path, request)["result"] is True
+    assert server.assistant.actions == [("set_volume", {"level": "50"})]
+
+
+def test_socket_is_private(server):
+    assert stat.S_IMODE(os.stat(server.socket_path).st_mode) == 0o600
+
+
+def test_stale_socket_is_replaced_live_one_is_not(tmp_path):
+    path = str(tmp_path / "s.sock")
+    # Сокет упавшего процесса: файл есть, никто не слушает
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(path)
+    stale.close()
+
+    server = ControlServer(FakeAssistant(), path)
+    server.start()
+    try:
+        assert send_request(path, {"op": "ping"})["ok"]
+        with pytest.raises(RuntimeError):
+            ControlServer(FakeAssistant(), path).start()
+        assert send_request(path, {"op": "ping"})["ok"]
+    finally:
+        server.stop()
+    assert not os.path.exists(path)
+
+
+def test_resolve_cli_command_errors():
+    assert resolve_cli_command(CLI, ["volume", "mute"])["params"] == {"muted": True}
+    with pytest.raises(ControlError, match="Нужны группа и действие"):
+        resolve_cli_command(CLI, ["volume"])
+    with pytest.raises(ControlError, match="Доступны: volume set, volume mute"):
+        resolve_cli_command(CLI, ["volume", "louder"])
+    with pytest.raises(ControlError, match=r"не хватает аргумента \$1"):
+        resolve_cli_command(CLI, ["volume", "set"])
+
+
+def test_sayorictl_exit_codes(server, monkeypatch, capsys):
+    monkeypatch.setattr("sys.argv", ["sayorictl.py", "--socket", server.socket_path, "ping"])
+    assert sayorictl.main() == 0
+    assert capsys.readouterr().out.strip() == "pong"
+
+    monkeypatch.setattr("sys.argv", ["sayorictl.py", "--socket", server.socket_path + ".missing", "ping"])
+    assert sayorictl.main() == 2
+    assert "не запущен" in capsys.readouterr().err
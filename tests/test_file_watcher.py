@@ -0,0 +1,89 @@
+import os
+import threading
+import time
+
+import pytest
+
+from core.file_watcher import FileWatcher
+
+
+class _Counter:
+    def __init__(self):
+        self.calls = 0
+        self.changed = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.changed.set()
+
+
+@pytest.fixture
+def watch(tmp_path):
+    watchers = []
+
+    def make(**kwargs):
+        path = tmp_path / "commands.json"
+        path.write_text("{}")
+        counter = _Counter()
+        watcher = FileWatcher(**kwargs)
+        watcher.watch(str(path), counter)
+        watcher.start()
+        watchers.append(watcher)
+        return watcher, path, counter
+
+    yield make
+    for watcher in watchers:
+        watcher.stop()
+
+
+def test_burst_of_writes_is_reported_once(watch):
+    watcher, path, counter = watch(poll_interval=0.05, debounce=0.2)
+    if watcher._inotify is None:
+        pytest.skip("inotify недоступен")
+
+    # Редактор сохраняет файл несколькими записями подряд
+    for i in range(5):
+        path.write_text(f'{{"step": {i}}}')
+        time.sleep(0.01)
+
+    assert counter.changed.wait(2.0)
+    time.sleep(0.4)
+    assert counter.calls == 1
+
+
+def test_atomic_replace_is_noticed(watch, tmp_path):
+    watcher, path, counter = watch(poll_interval=0.05, debounce=0.05)
+
+    replacement = tmp_path / "commands.json.tmp"
+    replacement.write_text('{"voice_commands": {}}')
+    os.replace(replacement, path)
+
+    assert counter.changed.wait(2.0)
+    assert counter.calls == 1
+
+
+def test_polling_reports_each_change_once(watch):
+    watcher, path, counter = watch(poll_interval=0.05, debounce=0, use_inotify=False)
+    assert watcher._inotify is None
+
+    path.write_text('{"voice_commands": {}}')
+    assert counter.changed.wait(2.0)
+    # Файл больше не меняется - несколько следующих опросов молчат
+    time.sleep(0.3)
+    assert counter.calls == 1
+
+    counter.changed.clear()
+    path.write_text('{"voice_commands": {"звук": {}}}')
+    assert counter.changed.wait(2.0)
+    time.sleep(0.2)
+    assert counter.calls == 2
+
+
+def test_touch_without_changes_is_ignored(watch):
+    watcher, path, counter = watch(poll_interval=0.05, debounce=0, use_inotify=False)
+    stat = path.stat()
+
+    # Время изменения и размер те же - событие не считается изменением
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    time.sleep(0.3)
+    assert counter.calls == 0
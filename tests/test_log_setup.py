@@ -0,0 +1,38 @@
+import logging
+import queue
+import sys
+
+from core.log_setup import DeferredQueueHandler, LogPipeline
+
+
+def test_prepare_does_not_format():
+    handler = DeferredQueueHandler(queue.SimpleQueue())
+    items = ["до"]
+    try:
+        raise ValueError("сбой")
+    except ValueError:
+        record = logging.LogRecord("Test", logging.ERROR, __file__, 1, "Список: %s", (items,), sys.exc_info())
+
+    prepared = handler.prepare(record)
+    items.append("после")
+
+    assert prepared.msg == "Список: ['до']" and prepared.args is None
+    assert prepared.exc_info is not None  # Трассировку оформит обработчик в фоновом потоке
+    assert record.args == (items,)  # Исходная запись не изменена
+
+
+def test_traceback_reaches_log_file(tmp_path):
+    log_path = tmp_path / "assistant.log"
+    pipeline = LogPipeline({"paths": {"logs": str(log_path)}, "logging": {"console": False}})
+    pipeline.start()
+    try:
+        try:
+            raise ValueError("сбой")
+        except ValueError:
+            logging.getLogger("Test").exception("Ошибка")
+    finally:
+        pipeline.stop()
+
+    text = log_path.read_text(encoding="utf-8")
+    assert "Test - ERROR - Ошибка" in text
+    assert "ValueError: сбой" in text
@@ -0,0 +1,99 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from core.audio_controller import AudioController
+from core.mode_manager import ModeManager
+from core.process_index import FakeProcessSource
+from core.process_supervisor import ProcessSupervisor
+from core.volume_backends import FakeVolumeBackend
+
+
+class FakePopen:
+    """Процесс, который сразу появляется в FakeProcessSource"""
+    source: FakeProcessSource = None
+
+    def __init__(self, command, **kwargs):
+        self.pid = self.source.spawn(Path(command[0]).name)
+        self.returncode = None
+        self.stderr = None
+
+    def poll(self):
+        return self.returncode
+
+
+@pytest.fixture
+def manager(tmp_path):
+    modes = {
+        "игра": {"actions": [
+            {"type": "launch", "target": "discord.exe", "check_running": True},
+            {"type": "launch", "target": "game.exe", "check_running": True}
+        ]},
+        "работа": {"keep": ["discord.exe"], "actions": [
+            {"type": "launch", "target": "code.exe", "check_running": True}
+        ]},
+        "кино": {"actions": [{"type": "launch", "target": "player.exe"}]},
+        "ночь": {"actions": [{"type": "volume", "target": "system", "level": 20}]}
+    }
+    path = tmp_path / "modes.json"
+    path.write_text(json.dumps(modes, ensure_ascii=False), encoding="utf-8")
+    source = FakeProcessSource({1: "steam.exe"})  # Запущен пользователем
+    FakePopen.source = source
+    backend = FakeVolumeBackend(volume=50, echo=True)
+    audio = AudioController({"audio": {"volume_write_interval_ms": 0}}, backend=backend)
+    manager = ModeManager(str(path), process_source=source, supervisor=ProcessSupervisor(popen=FakePopen),
+                          audio=audio)
+    manager.source = source
+    manager.backend = backend
+    yield manager
+    manager.shutdown()
+    audio.close()
+
+
+def _running(manager):
+    return sorted(set(manager.source.processes.values()))
+
+
+def test_switch_closes_only_apps_the_new_mode_excludes(manager):
+    assert manager.activate("игра")
+    assert _running(manager) == ["discord.exe", "game.exe", "steam.exe"]
+
+    result = manager.activate("работа")
+    assert _running(manager) == ["code.exe", "discord.exe", "steam.exe"]
+    assert [t.id for t in result.executed] == ["0", "close:game"]
+
+    result = manager.activate("игра")
+    assert _running(manager) == ["discord.exe", "game.exe", "steam.exe"]
+    assert result.actions[0].details == {"reason": "уже запущено"}
+
+
+def test_launch_without_check_running_starts_new_instance(manager):
+    manager.activate("кино")
+    manager.activate("кино")
+
+    assert list(manager.source.processes.values()).count("player.exe") == 2
+
+
+def test_volume_changed_externally_is_set_again(manager):
+    backend = manager.backend
+    assert manager.activate("ночь")
+    backend.settle()
+    assert backend.writes == [20]
+
+    result = manager.activate("ночь")
+    assert result.actions[0].details == {"reason": "уже установлено"}
+    assert backend.writes == [20]
+
+    backend.external_change(70)
+    assert manager.activate("ночь")
+    assert backend.writes == [20, 20]
+    assert backend.volume == 20
+
+
+def test_unverifiable_state_actions_always_run(manager):
+    # Яркость и план питания проверить нечем - повтор не пропускается
+    mode = {"actions": [{"type": "display", "action": "dim", "brightness": 30},
+                        {"type": "power", "plan": "balanced"}]}
+    manager.planner.commit(mode["actions"])
+    assert manager.planner.plan("ночь", mode).skipped == {}
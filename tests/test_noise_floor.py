@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+from core.audio_capture import NoiseFloorTracker, RingBuffer, UtteranceSegmenter
+
+RATE = 16000
+BLOCK = 480  # 30 мс
+
+
+def tone(blocks: int, rms: float) -> np.ndarray:
+    """Синус 200 Гц: целое число периодов в кадре и блоке, RMS каждого блока ровно rms"""
+    t = np.arange(blocks * BLOCK) / RATE
+    return np.round(np.sin(2 * np.pi * 200 * t) * rms * np.sqrt(2)).astype(np.int16)
+
+
+def seconds(value: float) -> int:
+    """Число блоков в value секундах"""
+    return round(value * RATE / BLOCK)
+
+
+def segment(*parts, **kwargs):
+    """Все фразы записи и сегментатор (запись уже целиком в буфере)"""
+    samples = np.concatenate(parts)
+    buffer = RingBuffer(len(samples) + BLOCK, backpressure=True)
+    buffer.write(samples)
+    buffer.close()
+    kwargs.setdefault("pre_roll", 0.0)
+    segmenter = UtteranceSegmenter(buffer, RATE, BLOCK, noise=NoiseFloorTracker(RATE), **kwargs)
+    utterances = []
+    while True:
+        utterance = segmenter.next_utterance(timeout=None)
+        if utterance is None:
+            return utterances, segmenter
+        utterances.append(len(utterance) / RATE)
+
+
+def feed(tracker: NoiseFloorTracker, samples: np.ndarray):
+    for i in range(0, len(samples), BLOCK):
+        tracker.update(samples[i:i + BLOCK])
+
+
+def test_floor_follows_step_in_background_noise():
+    tracker = NoiseFloorTracker(RATE, window=1.0)
+    feed(tracker, tone(seconds(1.0), 30))
+    assert tracker.floor == pytest.approx(30, rel=0.02)
+    assert tracker.onset_threshold == pytest.approx(30 * 10 ** (9 / 20), rel=0.02)
+
+    # Включился вентилятор: полсекунды - ещё не шум (так выглядит и речь)
+    feed(tracker, tone(seconds(0.5), 600))
+    assert tracker.floor == pytest.approx(30, rel=0.02)
+    # Дольше 80% окна - это уже новый уровень шума
+    feed(tracker, tone(seconds(0.5), 600))
+    assert tracker.floor == pytest.approx(600, rel=0.02)
+
+    # Вентилятор выключился: снижение заметно за 20% окна
+    feed(tracker, tone(seconds(0.3), 30))
+    assert tracker.floor == pytest.approx(30, rel=0.02)
+
+
+def test_thresholds_never_drop_below_min_energy():
+    tracker = NoiseFloorTracker(RATE, min_energy=50.0)
+    feed(tracker, np.zeros(seconds(1.0) * BLOCK, dtype=np.int16))
+
+    assert tracker.floor == 0
+    assert tracker.onset_threshold == tracker.release_threshold == 50.0
+
+
+def test_hysteresis_keeps_phrase_through_quieter_syllables():
+    # Шум 30: начало речи выше ~85, продолжение выше ~53
+    utterances, _ = segment(
+        tone(seconds(1.0), 30),
+        tone(seconds(0.3), 300),
+        tone(seconds(0.3), 70),  # Тише порога начала, но громче порога продолжения
+        tone(seconds(0.3), 300),
+        tone(seconds(1.0), 30),
+        pause_threshold=0.21
+    )
+
+    assert utterances == [pytest.approx(0.9 + 0.21, abs=BLOCK / RATE)]
+
+
+def test_level_between_thresholds_does_not_start_phrase():
+    utterances, segmenter = segment(
+        tone(seconds(1.0), 30),
+        tone(seconds(0.6), 70),
+        tone(seconds(1.0), 30),
+        pause_threshold=0.21
+    )
+
+    assert utterances == []
+    assert segmenter.false_triggers == 0
+
+
+def test_short_bursts_are_counted_as_false_triggers():
+    click = tone(2, 3000)  # 60 мс - короче min_speech
+    quiet = tone(seconds(0.6), 30)
+    utterances, segmenter = segment(
+        tone(seconds(1.0), 30),
+        click, quiet, click, quiet, click, quiet,
+        tone(seconds(0.6), 1500),  # Настоящая фраза
+        tone(seconds(1.0), 30),
+        pause_threshold=0.21, min_speech=0.1
+    )
+
+    assert segmenter.false_triggers == 3
+    assert utterances == [pytest.approx(0.6 + 0.21, abs=BLOCK / RATE)]
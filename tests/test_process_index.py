@@ -0,0 +1,73 @@
+from core.process_index import FakeProcessSource, ProcessIndex
+
+
+def test_refresh_queries_only_new_pids():
+    source = FakeProcessSource({1: "Discord.exe", 2: "steam.exe", 3: None})  # 3 - нет доступа к имени
+    index = ProcessIndex(source, ttl=60)
+    index.refresh()
+    assert source.name_calls == 3
+
+    index.refresh()
+    assert source.name_calls == 3  # Ни один PID, даже без имени, не опрашивается повторно
+
+    pid = source.spawn("code.exe")
+    index.refresh()
+    assert source.name_calls == 4
+    assert index.find("code") == {pid}
+
+    # Процесс без имени завершился, его PID занял другой
+    del source.processes[3]
+    index.refresh()
+    source.processes[3] = "telegram.exe"
+    index.refresh()
+    assert index.find("Telegram.exe") == {3}
+
+
+def test_find_is_exact_with_substring_fallback():
+    source = FakeProcessSource({1: "discord.exe", 2: "DiscordPTB.exe", 3: "bash"})
+    index = ProcessIndex(source, ttl=60)
+
+    assert index.find("Discord") == {1}
+    assert index.find("discordptb.exe") == {2}
+    assert index.find("ptb") == {2}
+    assert ProcessIndex(source, ttl=60, substring=False).find("ptb") == set()
+
+
+def test_kill_forgets_processes():
+    source = FakeProcessSource({1: "discord.exe", 2: "discord.exe", 3: "steam.exe"})
+    index = ProcessIndex(source, ttl=60)
+
+    assert index.kill("discord.exe") == ([1, 2], [])
+    assert source.terminated == [1, 2]
+    assert not index.is_running("discord")
+    assert index.is_running("steam")
+
+
+class _CountingDict(dict):
+    scans = 0
+
+    def items(self):
+        self.scans += 1
+        return super().items()
+
+
+def test_substring_fallback_scans_once_per_key():
+    source = FakeProcessSource({1: "discord.exe", 2: "DiscordPTB.exe", 3: "bash"})
+    index = ProcessIndex(source, ttl=60)
+    index._by_name = _CountingDict()
+    index.refresh()
+
+    for _ in range(3):
+        assert index.find("ptb") == {2}
+    assert index._by_name.scans == 1
+
+    # Результат следит за обновлениями индекса без повторного обхода
+    pid = source.spawn("ptb-updater")
+    index.refresh()
+    assert index.find("ptb") == {2, pid}
+    index.kill("discordptb")
+    assert index.find("ptb") == {pid}
+    del source.processes[pid]
+    index.refresh()
+    assert index.find("ptb") == set()
+    assert index._by_name.scans == 1
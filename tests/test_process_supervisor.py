@@ -0,0 +1,35 @@
+import sys
+import time
+
+from core.process_supervisor import ProcessSupervisor
+
+
+def _wait_reaped(supervisor: ProcessSupervisor, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if not supervisor.active()["launched"]:
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_launch_after_shutdown_is_reaped():
+    supervisor = ProcessSupervisor(reap_interval=0.05)
+    first = supervisor.launch([sys.executable, "-c", "pass"])
+    assert _wait_reaped(supervisor)
+    supervisor.shutdown()
+
+    second = supervisor.launch([sys.executable, "-c", "import sys; sys.exit(3)"])
+
+    assert _wait_reaped(supervisor)
+    assert (first.returncode, second.returncode) == (0, 3)
+    supervisor.shutdown()
+
+
+def test_script_timeout_terminates_process():
+    supervisor = ProcessSupervisor()
+
+    record = supervisor.run([sys.executable, "-c", "import time; time.sleep(10)"], timeout=0.3)
+
+    assert record.timed_out and not record.ok
+    assert record.duration < 5
@@ -0,0 +1,127 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from core.audio_capture import MicrophoneStream, RingBuffer
+
+
+def _ramp(start: int, count: int) -> np.ndarray:
+    return np.arange(start, start + count, dtype=np.int16)
+
+
+def test_read_across_wraparound():
+    buffer = RingBuffer(8)
+    buffer.write(_ramp(0, 6))
+    buffer.write(_ramp(6, 5))  # Запись переходит через конец массива
+
+    assert buffer.written == 11
+    assert buffer.oldest == 3
+    # Затёртое начало обрезается, оставшееся читается по порядку
+    assert buffer.read(0, 11).tolist() == list(range(3, 11))
+    assert buffer.read(5, 9).tolist() == [5, 6, 7, 8]
+
+
+def test_block_larger_than_capacity_keeps_its_tail():
+    buffer = RingBuffer(4)
+    buffer.write(_ramp(0, 3))
+    buffer.write(_ramp(3, 10))
+
+    assert buffer.written == 13
+    assert buffer.read(0, 13).tolist() == [9, 10, 11, 12]
+
+
+def test_backpressure_write_times_out_until_release():
+    buffer = RingBuffer(8, backpressure=True)
+    assert buffer.write(_ramp(0, 8))
+
+    started = time.monotonic()
+    assert not buffer.write(_ramp(8, 4), timeout=0.05)
+    assert time.monotonic() - started >= 0.05
+    # Ничего не затёрто и не засчитано
+    assert buffer.written == 8
+    assert buffer.read(0, 8).tolist() == list(range(8))
+
+    buffer.release(4)
+    assert buffer.write(_ramp(8, 4), timeout=0.05)
+    assert buffer.read(4, 12).tolist() == list(range(4, 12))
+
+
+def test_backpressure_writer_blocks_until_reader_releases():
+    buffer = RingBuffer(8, backpressure=True)
+    buffer.write(_ramp(0, 8))
+    done = threading.Event()
+
+    def writer():
+        buffer.write(_ramp(8, 4))
+        done.set()
+
+    thread = threading.Thread(target=writer, daemon=True)
+    thread.start()
+    assert not done.wait(0.05)
+
+    buffer.release(4)
+    assert done.wait(1.0)
+    assert buffer.written == 12
+    thread.join(1.0)
+
+
+def test_overwrite_without_backpressure_advances_oldest():
+    # Микрофон не ждёт читателя: переполнение затирает самые старые данные
+    buffer = RingBuffer(8)
+    for i in range(5):
+        assert buffer.write(_ramp(i * 4, 4), timeout=0)
+
+    assert buffer.written == 20
+    assert buffer.oldest == 12
+    assert buffer.read(0, 20).tolist() == list(range(12, 20))
+
+
+def test_microphone_counts_input_overflows():
+    stream = MicrophoneStream(16000, block_ms=10)
+    block = np.ones((stream.block_size, 1), dtype=np.int16)
+
+    stream._on_audio(block, stream.block_size, None, SimpleNamespace(input_overflow=False))
+    stream._on_audio(block, stream.block_size, None, SimpleNamespace(input_overflow=True))
+    stream._on_audio(block, stream.block_size, None, None)
+
+    assert stream.overflows == 1
+    # Блок с переполнением всё равно записан
+    assert stream.buffer.written == 3 * stream.block_size
+
+
+def test_close_wakes_blocked_writer():
+    buffer = RingBuffer(8, backpressure=True)
+    buffer.write(_ramp(0, 8))
+    results = []
+
+    thread = threading.Thread(target=lambda: results.append(buffer.write(_ramp(8, 4))), daemon=True)
+    thread.start()
+    time.sleep(0.05)
+    assert results == []
+
+    buffer.close()
+    thread.join(1.0)
+    assert results == [True]
+    assert buffer.closed
+    # После закрытия ожидание данных сразу возвращает False
+    assert buffer.wait(100, timeout=1.0) is False
+
+
+def test_close_wakes_reader_waiting_for_data():
+    buffer = RingBuffer(8)
+    woke = threading.Event()
+    results = []
+
+    def reader():
+        results.append(buffer.wait(4))
+        woke.set()
+
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+    assert not woke.wait(0.05)
+
+    buffer.close()
+    assert woke.wait(1.0)
+    assert results == [False]
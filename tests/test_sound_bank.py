@@ -0,0 +1,51 @@
+import wave
+
+import numpy as np
+
+from core.sound_bank import SoundBank, build_bank
+from core.voice_engine import VoiceEngine
+
+
+def _make_sounds(root):
+    (root / "system").mkdir(parents=True)
+    t = np.arange(8000) / 16000
+    with wave.open(str(root / "system" / "start.wav"), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(16000)
+        f.writeframes((np.sin(2 * np.pi * 440 * t) * 8000).astype(np.int16).tobytes())
+    # Не декодируется ни без ffmpeg, ни с ним
+    (root / "system" / "broken.mp3").write_bytes(b"not an mp3")
+
+
+def test_failed_source_does_not_force_rebuild(tmp_path):
+    _make_sounds(tmp_path / "sounds")
+    bank = tmp_path / "sounds.bank"
+
+    first = build_bank(str(tmp_path / "sounds"), str(bank), sample_rate=16000)
+    written = (bank.stat().st_ino, bank.stat().st_mtime_ns)  # Новый банк пишется через os.replace
+    second = build_bank(str(tmp_path / "sounds"), str(bank), sample_rate=16000)
+
+    assert (first["converted"], first["failed"]) == (1, 1)
+    assert (second["reused"], second["failed"]) == (1, 1)
+    assert (bank.stat().st_ino, bank.stat().st_mtime_ns) == written
+    opened = SoundBank(str(bank))
+    assert list(opened.failed) == ["system/broken"]
+    opened.close()
+
+
+def test_missing_bank_falls_back_to_wav_scan(tmp_path, caplog):
+    _make_sounds(tmp_path / "sounds")
+    bank = tmp_path / "sounds.bank"
+
+    engine = VoiceEngine({
+        "paths": {"sounds": str(tmp_path / "sounds"), "sound_bank": str(bank)},
+        "audio": {"output": "mixer", "mixer_sink": "null", "sample_rate": 16000, "preload_sounds": []}
+    })
+    try:
+        # Банк собирается только офлайн, при запуске MP3 не декодируются
+        assert not bank.exists()
+        assert engine.get_loaded_sounds() == ["system/start"]
+        assert any("не найден" in r.getMessage() for r in caplog.records if r.levelname == "WARNING")
+    finally:
+        engine.close()
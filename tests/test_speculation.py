@@ -0,0 +1,186 @@
+import threading
+import time
+
+import pytest
+
+from core.command_index import CommandEntry, CommandMatch
+from core.speculation import Speculator
+from core.tracing import tracer
+
+MUTE = CommandEntry("громкость", "выключи звук", {"action": "set_mute"})
+VOLUME = CommandEntry("громкость", "громкость (\\d+)", {"action": "set_volume"})
+GAME = CommandEntry("режимы", "включи игровой режим", {"action": "activate_mode"})
+
+# Гипотеза -> (команда, оценка); чего нет - не сопоставилось
+MATCHES = {
+    "выключи звук": (MUTE, 1.0),
+    "громкость 5": (VOLUME, 1.0),
+    "громкость 50": (VOLUME, 1.0),
+    "громкость 20": (VOLUME, 1.0),
+    "включи игровой": (GAME, 0.6),
+    "включи игровой режим": (GAME, 1.0),
+}
+
+
+def fake_match(text):
+    found = MATCHES.get(text)
+    return CommandMatch(found[0], score=found[1]) if found else None
+
+
+def wait_for(condition, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "условие не выполнилось"
+        time.sleep(0.005)
+
+
+class Gate:
+    """Шаг, который ждёт разрешения теста: entered - шаг начат, release() - продолжить"""
+
+    def __init__(self):
+        self.entered = threading.Event()
+        self._open = threading.Event()
+
+    def wait(self):
+        self.entered.set()
+        assert self._open.wait(2.0)
+
+    def release(self):
+        self._open.set()
+
+
+@pytest.fixture
+def make_speculator():
+    speculators = []
+
+    def make(match=fake_match, warmers=None, **kwargs):
+        warmed = []
+        steps = [lambda m: warmed.append(m.entry.phrase)] + list(warmers or [])
+        speculator = Speculator(match, steps, **kwargs)
+        speculator.warmed = warmed
+        speculators.append(speculator)
+        return speculator
+
+    tracer.bind(1)
+    yield make
+    tracer.bind(None)
+    for speculator in speculators:
+        speculator.close()
+
+
+def test_confident_partial_is_warmed_and_hit(make_speculator):
+    speculator = make_speculator()
+    for text in ("включи", "включи игровой", "включи игровой режим"):
+        speculator.offer(text)
+    wait_for(lambda: speculator.warmed)
+
+    assert speculator.resolve(fake_match("включи игровой режим")) is True
+    # Неуверенная гипотеза ("включи игровой", 0.6) не готовится
+    assert speculator.warmed == ["включи игровой режим"]
+    stats = speculator.stats()
+    assert (stats["partials"], stats["speculated"], stats["hits"], stats["hit_rate"]) == (3, 1, 1, 1.0)
+
+
+def test_wrong_prediction_is_a_miss(make_speculator):
+    speculator = make_speculator()
+    speculator.offer("выключи звук")
+    wait_for(lambda: speculator.warmed)
+
+    assert speculator.resolve(fake_match("громкость 20")) is False
+    assert speculator.resolve(None) is None  # Предсказание уже сверено
+    stats = speculator.stats()
+    assert (stats["misses"], stats["unpredicted"], stats["hit_rate"]) == (1, 1, 0.0)
+
+
+def test_same_command_from_new_partial_is_not_reprepared(make_speculator):
+    speculator = make_speculator()
+    for text in ("громкость 5", "громкость 50"):
+        speculator.offer(text)
+        time.sleep(0.02)
+    wait_for(lambda: speculator.stats()["partials"] == 2 and speculator.warmed)
+
+    assert speculator.resolve(fake_match("громкость 50")) is True
+    assert speculator.warmed == ["громкость (\\d+)"]
+    assert speculator.stats()["cancelled"] == 0
+
+
+def test_new_command_cancels_preparation_in_progress(make_speculator):
+    gate = Gate()
+    finished = []
+    speculator = make_speculator(warmers=[lambda m: gate.wait(), lambda m: finished.append(m.entry.phrase)])
+
+    speculator.offer("выключи звук")
+    assert gate.entered.wait(2.0)
+    speculator.offer("громкость 20")  # Пользователь договорил иначе
+    gate.release()
+    wait_for(lambda: finished)
+
+    # Оставшиеся шаги для «выключи звук» пропущены, готовится новая команда
+    assert finished == ["громкость (\\d+)"]
+    assert speculator.warmed == ["выключи звук", "громкость (\\d+)"]
+    stats = speculator.stats()
+    assert (stats["speculated"], stats["cancelled"]) == (2, 1)
+    assert speculator.resolve(fake_match("громкость 20")) is True
+
+
+def test_unresolved_utterances_are_abandoned(make_speculator):
+    speculator = make_speculator(keep=2)
+    for utterance in (1, 2, 3):
+        tracer.bind(utterance)
+        speculator.offer("выключи звук")
+        wait_for(lambda: len(speculator.warmed) == utterance)
+
+    # Фраза 1 вытеснена, так и не дойдя до выполнения
+    stats = speculator.stats()
+    assert (stats["speculated"], stats["abandoned"]) == (3, 1)
+    tracer.bind(1)
+    assert speculator.resolve(fake_match("выключи звук")) is None
+    tracer.bind(3)
+    assert speculator.resolve(fake_match("выключи звук")) is True
+    assert speculator.stats()["hit_rate"] == 0.5
+
+
+def test_resolve_during_matching_drops_the_stale_prediction(make_speculator):
+    gate = Gate()
+
+    def slow_match(text):
+        gate.wait()
+        return fake_match(text)
+
+    speculator = make_speculator(match=slow_match)
+    speculator.offer("выключи звук")
+    assert gate.entered.wait(2.0)
+
+    # Итоговый текст пришёл раньше, чем закончилось сопоставление гипотезы
+    assert speculator.resolve(fake_match("выключи звук")) is None
+    gate.release()
+    time.sleep(0.05)
+
+    assert speculator.warmed == []
+    stats = speculator.stats()
+    assert (stats["speculated"], stats["unpredicted"], stats["abandoned"]) == (0, 1, 0)
+
+
+def test_resolve_during_warming_stops_remaining_steps(make_speculator):
+    gate = Gate()
+    finished = []
+    speculator = make_speculator(warmers=[lambda m: gate.wait(), lambda m: finished.append(m)])
+    speculator.offer("выключи звук")
+    assert gate.entered.wait(2.0)
+
+    # Команда уже выполняется: догревать её незачем, но это не отмена
+    assert speculator.resolve(fake_match("выключи звук")) is True
+    gate.release()
+    time.sleep(0.05)
+
+    assert finished == []
+    stats = speculator.stats()
+    assert (stats["hits"], stats["cancelled"]) == (1, 0)
+
+
+def test_offer_without_utterance_is_ignored(make_speculator):
+    speculator = make_speculator()
+    tracer.bind(None)
+    speculator.offer("выключи звук")
+    assert speculator.resolve(fake_match("выключи звук")) is None
+    assert speculator.stats()["partials"] == 0
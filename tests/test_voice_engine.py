@@ -0,0 +1,79 @@
+import wave
+
+import numpy as np
+import pytest
+
+import core.voice_engine as voice_engine
+from core.voice_engine import VoiceEngine
+
+MIXER_RATE = 16000
+
+
+def _write_tone(path, rate: int, seconds: float, channels: int = 1):
+    t = np.arange(int(rate * seconds)) / rate
+    tone = (np.sin(2 * np.pi * 440 * t) * 8000).astype(np.int16)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(channels)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(np.repeat(tone, channels).tobytes())
+
+
+@pytest.fixture
+def make_engine(tmp_path):
+    engines = []
+    _write_tone(tmp_path / "sounds" / "system" / "start.wav", rate=48000, seconds=0.2, channels=2)
+    _write_tone(tmp_path / "sounds" / "volume" / "change.wav", rate=MIXER_RATE, seconds=0.1)
+
+    def make(sink: str) -> VoiceEngine:
+        engine = VoiceEngine({
+            "paths": {"sounds": str(tmp_path / "sounds"), "sound_bank": None},
+            "audio": {
+                "output": "mixer",
+                "mixer_sink": sink,
+                "mixer_file": str(tmp_path / "mixer.wav"),
+                "sample_rate": MIXER_RATE,
+                "mixer_channels": 2,
+                "preload_sounds": []
+            }
+        })
+        engines.append(engine)
+        return engine
+
+    yield make
+    for engine in engines:
+        engine.close()
+
+
+def test_clip_is_converted_once_per_sound(make_engine, monkeypatch):
+    conversions = []
+    convert = voice_engine.clip_to_float
+
+    def counting(clip, *args):
+        conversions.append(clip.sound_id)
+        return convert(clip, *args)
+
+    monkeypatch.setattr(voice_engine, "clip_to_float", counting)
+    engine = make_engine("null")
+
+    for _ in range(3):
+        assert engine.play("system/start")
+        assert engine.play("volume/change")
+
+    assert conversions == ["system/start", "volume/change"]
+    assert engine.get_cache_stats()["hits"] == 4
+
+
+def test_mixer_output_is_in_mixer_format(make_engine, tmp_path):
+    engine = make_engine("file")
+
+    assert engine.play("system/start", blocking=True)
+    engine.close()
+
+    with wave.open(str(tmp_path / "mixer.wav"), "rb") as f:
+        assert (f.getframerate(), f.getnchannels()) == (MIXER_RATE, 2)
+        frames = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16).reshape(-1, 2)
+    # 48 кГц пересчитаны в частоту микшера: около 0.2 с звука (плюс хвост последнего блока)
+    assert 0.15 * MIXER_RATE <= len(frames) <= 0.2 * MIXER_RATE + 512
+    assert np.abs(frames).max() > 1000
@@ -0,0 +1,83 @@
+import wave
+
+import numpy as np
+import pytest
+
+from core.recognition_backends import StubBackend
+from core.voice_recognizer import VoiceRecognizer
+
+RATE = 16000
+
+
+def _write_phrases(path, count: int):
+    """Тон по 1 с на каждую фразу, между ними 1.5 с тишины"""
+    t = np.arange(RATE) / RATE
+    tone = (np.sin(2 * np.pi * 220 * t) * 3000).astype(np.int16)
+    silence = np.zeros(int(RATE * 1.5), dtype=np.int16)
+    samples = np.concatenate([part for _ in range(count) for part in (silence, tone)])
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(RATE)
+        f.writeframes(samples.tobytes())
+
+
+@pytest.fixture
+def make_recognizer(tmp_path):
+    recognizers = []
+
+    def make(transcripts, phrases: int, words_per_second: float = 0):
+        path = tmp_path / "phrases.wav"
+        _write_phrases(path, phrases)
+        recognizer = VoiceRecognizer({
+            "audio": {"sample_rate": RATE},
+            "microphone": {
+                "source": "file",
+                "source_path": str(path),
+                "source_realtime": False,
+                "source_lead_in": 0.5,
+                "timeout": 5
+            },
+            "recognition": {
+                "backend": "stub",
+                "stub_transcripts": transcripts,
+                "stub_words_per_second": words_per_second
+            }
+        })
+        recognizers.append(recognizer)
+        return recognizer
+
+    yield make
+    for recognizer in recognizers:
+        recognizer.close()
+
+
+def test_listen_returns_each_transcript(make_recognizer):
+    recognizer = make_recognizer(["Громкость на 50", "Тише"], phrases=2)
+
+    assert isinstance(recognizer.backend, StubBackend)
+    assert recognizer.listen() == "громкость на 50"
+    assert recognizer.listen() == "тише"
+    assert recognizer.backend.fed_bytes > 2 * 2 * RATE  # Обе фразы дошли до движка целиком
+    assert recognizer.empty_results == 0
+
+
+def test_recognize_stream_reports_partials(make_recognizer):
+    recognizer = make_recognizer(["Включи игровой режим"], phrases=1, words_per_second=2)
+    blocks = []
+    assert recognizer.capture(blocks.append)
+
+    partials = []
+    text = recognizer.recognize_stream(blocks, on_partial=partials.append)
+
+    assert text == "включи игровой режим"
+    assert partials == ["включи", "включи игровой", "включи игровой режим"]
+
+
+def test_phrase_without_transcript_counts_as_empty(make_recognizer):
+    recognizer = make_recognizer(["тише"], phrases=2)
+
+    assert recognizer.listen() == "тише"
+    assert recognizer.listen() is None
+    assert recognizer.empty_results == 1
+    assert recognizer.noise_stats()["empty_results"] == 1
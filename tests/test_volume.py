@@ -0,0 +1,54 @@
+import time
+
+from core.audio_controller import AudioController
+from core.volume_backends import FakeVolumeBackend
+
+
+def _controller(backend: FakeVolumeBackend) -> AudioController:
+    return AudioController({"audio": {"volume_write_interval_ms": 0, "volume_step": 5}}, backend=backend)
+
+
+def test_own_writes_do_not_trigger_reads():
+    backend = FakeVolumeBackend(volume=50, echo=True, echo_window=0.25)
+    controller = _controller(backend)
+    reads = backend.reads
+
+    for _ in range(5):
+        controller.volume_up()
+        assert controller.flush()
+        backend.settle()
+
+    assert backend.writes == [55, 60, 65, 70, 75]
+    assert backend.echoes == 5
+    assert backend.reads == reads
+    controller.close()
+
+
+def test_external_change_is_picked_up():
+    backend = FakeVolumeBackend(volume=50, echo=True, echo_window=0.05)
+    controller = _controller(backend)
+    controller.set_volume(40)
+    controller.flush()
+
+    time.sleep(0.1)
+    backend.external_change(20)
+
+    assert controller.get_current_volume() == 20
+    controller.volume_up()
+    controller.flush()
+    assert backend.volume == 25
+    controller.close()
+
+
+def test_unfiltered_echo_keeps_no_op_steps_skipped():
+    for target, writes in ((62, [61, 62]), (60, [])):
+        backend = FakeVolumeBackend(volume=60, echo=True)  # Эхо доходит до контроллера
+        controller = AudioController({"audio": {"volume_write_interval_ms": 10}}, backend=backend)
+
+        controller.set_volume(target, smooth=True, duration=0.3)
+        assert controller.flush()
+        backend.settle()
+
+        assert backend.writes == writes
+        assert controller.get_current_volume() == target
+        controller.close()